@@ -0,0 +1,5 @@
+"""
+generateパイプラインのベンチマーク
+
+python -m benchmarks.run で実行し、結果をJSONに保存する。
+"""
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""モックLLMサーバーを使ったgenerateパイプライン全体のベンチマーク"""
+
+import itertools
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.log_writer import flush_log_writer
+from easy_dataset_cli.mock_server import MockLLMServer
+from easy_dataset_cli.task_engine import build_qa_entries, build_qa_tasks, create_qa_task_runner, run_qa_tasks
+from easy_dataset_cli.text_splitter import split_text
+from easy_dataset_cli.xml_utils import convert_to_xml_by_genre
+
+from .bench_stages import BENCH_GA_PAIRS, quiet
+from .metrics import make_result, timed
+
+
+def bench_generate(
+    text: str,
+    params: Dict,
+    concurrency: int = 8,
+    latency_ms: float = 50.0,
+    latency_distribution: str = "lognormal",
+    num_qa_pairs: int = 3,
+    chunk_size: int = 2000,
+    chunk_overlap: int = 200,
+    max_tasks: int = None,
+    write_logs: bool = True
+) -> Dict:
+    """分割からGenre別XMLの出力までを、モックLLMに対して端から端まで実行する"""
+    with MockLLMServer(latency_ms=latency_ms, latency_distribution=latency_distribution, seed=0) as server:
+        llm_client.configure_default_endpoint(server.base_url, "mock")
+        llm_client.ensure_pool_capacity(concurrency)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            logs_dir = Path(temp_dir) / "logs"
+            logs_dir.mkdir()
+
+            latencies: List[float] = []
+            entries = []
+
+            def timed_runner(runner):
+                def run(task):
+                    start = time.perf_counter()
+                    result = runner(task)
+                    latencies.append(time.perf_counter() - start)
+                    return result
+                return run
+
+            with quiet(), timed() as t:
+                chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+                tasks = build_qa_tasks(chunks, BENCH_GA_PAIRS)
+                if max_tasks:
+                    tasks = itertools.islice(tasks, max_tasks)
+                runner = create_qa_task_runner(
+                    model="mock-model",
+                    logs_dir=logs_dir if write_logs else None,
+                    num_qa_pairs=num_qa_pairs
+                )
+                for task, qa_pairs in run_qa_tasks(tasks, timed_runner(runner), concurrency=concurrency):
+                    entries.extend(build_qa_entries(task["ga_pair"], qa_pairs))
+                convert_to_xml_by_genre(entries)
+                # バックグラウンドで書き出し中のログも計測に含める
+                flush_log_writer()
+
+        stats = dict(server.stats)
+
+    llm_client.close_all_clients()
+    return make_result(
+        "generate[mock]",
+        dict(params, concurrency=concurrency, latency_ms=latency_ms, latency_distribution=latency_distribution,
+             num_qa_pairs=num_qa_pairs, write_logs=write_logs, max_tasks=max_tasks),
+        t["seconds"],
+        {"tasks": len(latencies), "pairs": len(entries), "requests": stats["requests"]},
+        latencies
+    )
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""パイプラインの各段階（分割・解析・XML変換・集約・Alpaca変換）のベンチマーク"""
+
+import io
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Dict, List
+
+from easy_dataset_cli.alpaca_converter import convert_all_xml_to_alpaca
+from easy_dataset_cli.generators import qa_generator, qa_generator_fulltext, qa_generator_thinking
+from easy_dataset_cli.log_writer import flush_log_writer
+from easy_dataset_cli.mock_server import MALFORMED_VARIANTS, build_qa_response
+from easy_dataset_cli.text_splitter import create_augmented_chunks, split_text
+from easy_dataset_cli.xml_utils import aggregate_logs_xml_to_qa, convert_to_xml_by_genre
+
+from .metrics import make_result, timed
+
+PARSERS = {
+    "qa_generator": qa_generator._parse_qa_response,
+    "qa_generator_fulltext": qa_generator_fulltext._parse_qa_response,
+    "qa_generator_thinking": qa_generator_thinking._parse_qa_response,
+}
+
+BENCH_GA_PAIRS = [
+    {"genre": {"title": "FAQ", "description": ""}, "audience": {"title": "初心者", "description": ""}},
+    {"genre": {"title": "教科書", "description": ""}, "audience": {"title": "学生", "description": ""}},
+]
+
+
+@contextmanager
+def quiet():
+    """ジェネレーターのコンソール出力を計測から除外する"""
+    with redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_split_text(text: str, params: Dict, chunk_size: int, chunk_overlap: int, splitter: str = "native") -> Dict:
+    """split_textを計測する（組み込みの実装は"split_text"、それ以外は"split_text[<方式>]"として記録）"""
+    with timed() as t:
+        chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap, splitter=splitter)
+    name = "split_text" if splitter == "native" else f"split_text[{splitter}]"
+    return make_result(
+        name, dict(params, chunk_size=chunk_size, chunk_overlap=chunk_overlap), t["seconds"],
+        {"chunks": len(chunks), "mb": len(text.encode("utf-8")) / (1024 * 1024)}
+    ), chunks
+
+
+def bench_create_augmented_chunks(chunks: List[str], params: Dict) -> Dict:
+    with timed() as t:
+        augmented = create_augmented_chunks(chunks, context_before=1, context_after=1)
+    return make_result("create_augmented_chunks", params, t["seconds"], {"chunks": len(augmented)})
+
+
+def bench_parse_qa_response(params: Dict, responses_per_variant: int = 200, pairs_per_response: int = 10) -> List[Dict]:
+    """3つの_parse_qa_responseに正常なXMLと壊れたXMLのバリエーションを解析させる"""
+    prompt = f"{pairs_per_response}個のユニークな"
+    responses = []
+    for variant in ("valid",) + MALFORMED_VARIANTS:
+        responses.extend([build_qa_response(prompt, variant=variant)] * responses_per_variant)
+    responses.extend([build_qa_response(prompt + "<Answer><think>", variant="valid")] * responses_per_variant)
+
+    results = []
+    for name, parse in PARSERS.items():
+        latencies = []
+        pairs = 0
+        with quiet(), timed() as t:
+            for response in responses:
+                start = time.perf_counter()
+                pairs += len(parse(response))
+                latencies.append(time.perf_counter() - start)
+        results.append(make_result(
+            f"parse_qa_response[{name}]", dict(params, pairs_per_response=pairs_per_response),
+            t["seconds"], {"responses": len(responses), "pairs": pairs}, latencies
+        ))
+    return results
+
+
+def synthesize_qa_entries(chunks: List[str], pairs_per_task: int = 3) -> List[Dict[str, str]]:
+    """チャンク×GAペアごとに生成されたとみなすQ&Aエントリを作る"""
+    entries = []
+    for chunk_index, chunk in enumerate(chunks):
+        for ga_pair in BENCH_GA_PAIRS:
+            for pair_index in range(pairs_per_task):
+                answer = chunk[:200]
+                if pair_index == 0:
+                    answer = f"<think>チャンク{chunk_index}の要点を整理する。</think>{answer}"
+                entries.append({
+                    "genre": ga_pair["genre"]["title"],
+                    "audience": ga_pair["audience"]["title"],
+                    "question": f"チャンク{chunk_index}の質問{pair_index}は何ですか？",
+                    "answer": answer
+                })
+    return entries
+
+
+def bench_output_stages(chunks: List[str], params: Dict, pairs_per_task: int = 3) -> List[Dict]:
+    """convert_to_xml_by_genre・aggregate_logs_xml_to_qa・convert_all_xml_to_alpacaを計測する"""
+    entries = synthesize_qa_entries(chunks, pairs_per_task)
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base = Path(temp_dir)
+        qa_dir = base / "qa"
+        logs_dir = base / "logs"
+        qa_dir.mkdir()
+        logs_dir.mkdir()
+
+        with quiet(), timed() as t:
+            xml_outputs = convert_to_xml_by_genre(entries, qa_dir)
+        results.append(make_result("convert_to_xml_by_genre", params, t["seconds"], {"pairs": len(entries)}))
+
+        for genre, xml_content in xml_outputs.items():
+            (qa_dir / f"{genre}.xml").write_text(xml_content, encoding="utf-8")
+
+        with quiet(), timed() as t:
+            alpaca_stats = convert_all_xml_to_alpaca(qa_dir, base / "dataset_alpaca.json")
+        results.append(make_result("convert_all_xml_to_alpaca", params, t["seconds"], {"pairs": alpaca_stats["total_entries"]}))
+
+        # 生成時と同じ形式のログXMLをタスクごとに書き出してから集約する
+        with quiet():
+            for task_index in range(0, len(entries), pairs_per_task):
+                task_entries = entries[task_index:task_index + pairs_per_task]
+                first = task_entries[0]
+                qa_generator._save_qa_pairs_to_xml(
+                    task_entries, logs_dir,
+                    f"qa_pairs_{first['genre']}_{first['audience']}_20250101_{task_index:06d}.xml"
+                )
+            flush_log_writer()
+        aggregated_dir = base / "aggregated"
+        with quiet(), timed() as t:
+            aggregate_logs_xml_to_qa(logs_dir, aggregated_dir)
+        results.append(make_result(
+            "aggregate_logs_xml_to_qa", params, t["seconds"],
+            {"files": len(entries) // pairs_per_task, "pairs": len(entries)}
+        ))
+
+    return results
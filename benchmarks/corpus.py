@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""ベンチマーク用の合成コーパス（日本語・英語）"""
+
+import random
+import re
+
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+JA_SUBJECTS = ["ミトコンドリア", "量子コンピュータ", "東京大学の研究チーム", "新しい治療法", "地方自治体", "人工知能モデル", "半導体産業", "気候変動"]
+JA_PREDICATES = ["細胞のエネルギーを生成する", "計算速度を大きく向上させた", "新しい酵素を発見した", "副作用を三割減らした",
+                 "住民サービスを電子化した", "大量のデータから規則性を学習する", "世界的な供給不足に直面している", "農業に深刻な影響を与えている"]
+JA_CONNECTIVES = ["また、", "一方で、", "さらに、", "その結果、", "具体的には、", ""]
+
+EN_SUBJECTS = ["The mitochondria", "A quantum computer", "The research team", "The new treatment", "The city council",
+               "The language model", "The semiconductor industry", "Climate change"]
+EN_PREDICATES = ["produces most of the cell's energy", "improved computation speed dramatically", "discovered a new enzyme",
+                 "reduced side effects by thirty percent", "digitized public services", "learns patterns from large datasets",
+                 "faces a global supply shortage", "has a serious impact on agriculture"]
+EN_CONNECTIVES = ["Moreover, ", "However, ", "As a result, ", "In particular, ", ""]
+
+
+def parse_size(size: str) -> int:
+    """"1KB" や "100MB" などのサイズ表記をバイト数に変換する"""
+    match = SIZE_PATTERN.match(size)
+    if not match:
+        raise ValueError(f"サイズの形式が不正です: {size}")
+    value, unit = match.groups()
+    return int(float(value) * SIZE_UNITS[(unit or "B").upper()])
+
+
+def _sentence(rng: random.Random, language: str) -> str:
+    if language == "ja":
+        return f"{rng.choice(JA_CONNECTIVES)}{rng.choice(JA_SUBJECTS)}は{rng.choice(JA_PREDICATES)}。"
+    connective = rng.choice(EN_CONNECTIVES)
+    subject = rng.choice(EN_SUBJECTS)
+    if connective:
+        subject = subject[0].lower() + subject[1:]
+    return f"{connective}{subject} {rng.choice(EN_PREDICATES)}. "
+
+
+def generate_corpus(size_bytes: int, language: str = "ja", seed: int = 0) -> str:
+    """UTF-8でおよそsize_bytesバイトになる決定的な合成テキストを生成する
+
+    見出し・段落・文の区切りを含むため、テキスト分割の挙動も実際の文書に近くなる。
+    """
+    if language not in ("ja", "en"):
+        raise ValueError(f"未対応の言語です: {language}")
+
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    section = 0
+    while total < size_bytes:
+        section += 1
+        heading = f"## 第{section}節\n\n" if language == "ja" else f"## Section {section}\n\n"
+        parts.append(heading)
+        total += len(heading.encode("utf-8"))
+        for _ in range(rng.randint(2, 5)):
+            paragraph = "".join(_sentence(rng, language) for _ in range(rng.randint(3, 8))).strip() + "\n\n"
+            parts.append(paragraph)
+            total += len(paragraph.encode("utf-8"))
+            if total >= size_bytes:
+                break
+
+    text = "".join(parts).encode("utf-8")[:size_bytes]
+    return text.decode("utf-8", errors="ignore")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""ベンチマークの計測ユーティリティ"""
+
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """線形補間によるパーセンタイル（qは0〜100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """レイテンシ（秒）のリストからp50/p95/p99（ミリ秒）を求める"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    """プロセスの最大常駐メモリ（MB）。プロセス開始からの最大値である点に注意"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # LinuxはKB、macOSはバイト単位
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+@contextmanager
+def timed() -> Iterator[Dict[str, float]]:
+    """with timed() as t: ... の後に t["seconds"] で経過時間を取得する"""
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def make_result(name: str, params: Dict, seconds: float, counts: Dict[str, float], latencies: List[float] = None) -> Dict:
+    """ベンチマーク1件分の結果を組み立てる（countsの各値から毎秒あたりのスループットを算出）"""
+    result = {
+        "name": name,
+        "params": params,
+        "seconds": round(seconds, 6),
+        "counts": counts,
+        "throughput": {
+            f"{key}_per_s": round(value / seconds, 3) if seconds > 0 else None
+            for key, value in counts.items()
+        },
+        "peak_rss_mb": peak_rss_mb()
+    }
+    if latencies is not None:
+        result["latency"] = latency_summary(latencies)
+    return result
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+ベンチマークの実行エントリーポイント
+
+例:
+    python -m benchmarks.run --sizes 1KB,1MB --output benchmark_results.json
+    python -m benchmarks.run --sizes 100MB --skip-generate --compare previous.json
+"""
+
+import importlib.util
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import typer
+from rich.console import Console
+from rich.table import Table
+from typing_extensions import Annotated
+
+from .bench_generate import bench_generate
+from .bench_stages import bench_create_augmented_chunks, bench_output_stages, bench_parse_qa_response, bench_split_text
+from .corpus import generate_corpus, parse_size
+
+console = Console()
+app = typer.Typer(help="easy-dataset-cli のパイプラインベンチマーク", add_completion=False)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _result_key(result: Dict) -> str:
+    params = result["params"]
+    return f"{result['name']}|{params.get('size')}|{params.get('language')}"
+
+
+def print_results(results: List[Dict], baseline: Dict[str, Dict] = None) -> None:
+    table = Table(title="ベンチマーク結果")
+    table.add_column("ベンチマーク", style="cyan")
+    table.add_column("サイズ")
+    table.add_column("言語")
+    table.add_column("秒", justify="right")
+    table.add_column("スループット", justify="right")
+    table.add_column("p50/p95/p99 (ms)", justify="right")
+    table.add_column("RSS (MB)", justify="right")
+    if baseline is not None:
+        table.add_column("前回比", justify="right")
+
+    for result in results:
+        params = result["params"]
+        throughput = ", ".join(f"{key}={value:,.1f}" for key, value in result["throughput"].items() if value is not None)
+        latency = result.get("latency")
+        latency_text = f"{latency['p50_ms']:.2f}/{latency['p95_ms']:.2f}/{latency['p99_ms']:.2f}" if latency else "-"
+        row = [
+            result["name"], params.get("size", "-"), params.get("language", "-"),
+            f"{result['seconds']:.3f}", throughput, latency_text, f"{result['peak_rss_mb']:.1f}"
+        ]
+        if baseline is not None:
+            previous = baseline.get(_result_key(result))
+            if previous and previous["seconds"] > 0:
+                ratio = result["seconds"] / previous["seconds"]
+                color = "red" if ratio > 1.1 else "green" if ratio < 0.9 else "white"
+                row.append(f"[{color}]{ratio:.2f}x[/{color}]")
+            else:
+                row.append("-")
+        table.add_row(*row)
+
+    console.print(table)
+
+
+@app.command()
+def main(
+    sizes: Annotated[str, typer.Option(help="コーパスサイズのカンマ区切りリスト（例: 1KB,1MB,100MB）")] = "1KB,100KB,1MB",
+    languages: Annotated[str, typer.Option(help="コーパスの言語（ja,en）")] = "ja,en",
+    output: Annotated[Path, typer.Option("--output", "-o", help="結果を保存するJSONファイル")] = Path("benchmark_results.json"),
+    compare: Annotated[Path, typer.Option(help="比較対象の過去の結果JSON")] = None,
+    chunk_size: Annotated[int, typer.Option(help="チャンクの最大サイズ")] = 2000,
+    chunk_overlap: Annotated[int, typer.Option(help="チャンク間のオーバーラップ")] = 200,
+    skip_generate: Annotated[bool, typer.Option(help="モックLLMを使った全体実行を省略する")] = False,
+    concurrency: Annotated[int, typer.Option(help="全体実行時の並列数")] = 8,
+    latency_ms: Annotated[float, typer.Option(help="モックLLMの遅延（中央値, ms）")] = 50.0,
+    max_generate_tasks: Annotated[int, typer.Option(help="全体実行で処理するタスク数の上限（大きなコーパス用）")] = 2000,
+):
+    """合成コーパスで各段階とパイプライン全体を計測し、JSONに保存します。"""
+    results: List[Dict] = []
+
+    for size in [s.strip() for s in sizes.split(",") if s.strip()]:
+        for language in [l.strip() for l in languages.split(",") if l.strip()]:
+            params = {"size": size, "language": language}
+            console.print(f"[bold blue]▶ {size} / {language}[/bold blue]")
+            text = generate_corpus(parse_size(size), language=language)
+
+            split_result, chunks = bench_split_text(text, params, chunk_size, chunk_overlap)
+            results.append(split_result)
+            if importlib.util.find_spec("langchain_text_splitters"):
+                # 組み込みの分割との比較用（チャンクは同じになる）
+                langchain_result, langchain_chunks = bench_split_text(text, params, chunk_size, chunk_overlap, splitter="langchain")
+                if langchain_chunks != chunks:
+                    console.print("[yellow]⚠️ 組み込みの分割とLangChainの分割でチャンクが一致しません[/yellow]")
+                results.append(langchain_result)
+            results.append(bench_split_text(text, params, chunk_size, chunk_overlap, splitter="ja")[0])
+            results.append(bench_create_augmented_chunks(chunks, params))
+            results.extend(bench_output_stages(chunks, params))
+            if not skip_generate:
+                results.append(bench_generate(
+                    text, params,
+                    concurrency=concurrency,
+                    latency_ms=latency_ms,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    max_tasks=max_generate_tasks
+                ))
+
+    # 解析処理はコーパスサイズに依存しないため1回だけ計測する
+    results.extend(bench_parse_qa_response({}))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "languages": languages
+        },
+        "results": results
+    }
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    baseline = None
+    if compare is not None:
+        previous = json.loads(compare.read_text(encoding="utf-8"))
+        baseline = {_result_key(result): result for result in previous["results"]}
+
+    print_results(results, baseline)
+    console.print(f"[green]✓[/green] 結果を保存しました: {output}")
+
+
+if __name__ == "__main__":
+    app()
@@ -1,89 +1,168 @@
 # easy_dataset_cli/alpaca_converter.py
 """アルパカデータセット形式への変換とHugging Faceアップロード機能"""
 
+import gzip
 import json
-import xml.etree.ElementTree as ET
+from json.encoder import encode_basestring
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, TextIO, Union
 from rich.console import Console
 from huggingface_hub import HfApi, create_repo
 from datasets import Dataset
 import os
 
+from .qa_store import QAStore
+from .xml_utils import iter_qa_pairs_from_xml_files, load_qa_pairs_from_xml
+
 console = Console()
 
+ALPACA_FORMATS = ("json", "jsonl", "jsonl.gz", "jsonl.zst")
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def _to_alpaca_entry(qa_pair: Dict[str, str]) -> Dict[str, str]:
+    # Answerタグの内容をそのままoutputに入れる（<think>...</think>含む）
+    return {
+        "instruction": qa_pair["question"],
+        "input": "",  # アルパカ形式では通常空文字
+        "output": qa_pair["answer"],
+        "genre": qa_pair["genre"],
+        "audience": qa_pair["audience"]
+    }
+
 def xml_to_alpaca_format(xml_file_path: Path) -> List[Dict[str, str]]:
     """XMLファイルをアルパカ形式のデータに変換する"""
-    alpaca_data = []
-    
-    try:
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
-        
-        genre = root.get('genre', 'Unknown')
-        
-        for pair in root.findall('Pair'):
-            audience_elem = pair.find('Audience')
-            question_elem = pair.find('Question')
-            answer_elem = pair.find('Answer')
-            
-            if all([audience_elem is not None, question_elem is not None, answer_elem is not None]):
-                audience = audience_elem.text or ""
-                question = question_elem.text or ""
-                answer = answer_elem.text or ""
-                # Answerタグの内容をそのままoutputに入れる（<think>...</think>含む）
-                alpaca_entry = {
-                    "instruction": question,
-                    "input": "",  # アルパカ形式では通常空文字
-                    "output": answer,
-                    "genre": genre,
-                    "audience": audience
-                }
-                alpaca_data.append(alpaca_entry)
-                
-    except ET.ParseError as e:
-        console.print(f"[bold red]XMLファイルの解析エラー:[/bold red] {e}")
-    except Exception as e:
-        console.print(f"[bold red]予期しないエラー:[/bold red] {e}")
-    
-    return alpaca_data
+    return [_to_alpaca_entry(qa_pair) for qa_pair in load_qa_pairs_from_xml(xml_file_path)]
 
-def convert_all_xml_to_alpaca(qa_dir: Path, output_file: Path) -> List[Dict[str, str]]:
-    """QAディレクトリ内のすべてのXMLファイルをアルパカ形式に変換"""
-    all_alpaca_data = []
-    
+def _format_alpaca_entry(entry: Dict[str, str]) -> str:
+    """配列の要素として、json.dump(indent=2)と同じ形式でエントリを文字列にする"""
+    # indent指定時のjsonはC実装のエンコーダーを使わないため、文字列を直接エンコードする
+    fields = [
+        f"    {encode_basestring(key)}: {encode_basestring(value)}"
+        for key, value in entry.items()
+    ]
+    return "{\n" + ",\n".join(fields) + "\n  }"
+
+def _write_alpaca_entries(entries: Iterable[Dict[str, str]], f: TextIO) -> None:
+    """エントリを1件ずつJSON配列として書き出す（json.dump(indent=2)と同じ出力になる）"""
+    count = 0
+    f.write("[")
+    for entry in entries:
+        f.write(",\n  " if count else "\n  ")
+        f.write(_format_alpaca_entry(entry))
+        count += 1
+    f.write("\n]" if count else "]")
+
+def get_alpaca_output_file(output_dir: Path, output_format: str = "json") -> Path:
+    """出力形式に応じたアルパカ形式ファイルのパス（dataset_alpaca.json / .jsonl / .jsonl.gz / .jsonl.zst）"""
+    return Path(output_dir) / f"dataset_alpaca.{output_format}"
+
+def _open_alpaca_output(output_file: Path, output_format: str) -> TextIO:
+    if output_format == "jsonl.gz":
+        return gzip.open(output_file, "wt", encoding="utf-8", compresslevel=6)
+    if output_format == "jsonl.zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("jsonl.zst形式で書き出すには zstandard パッケージが必要です（pip install zstandard）")
+        return zstandard.open(output_file, "wt", encoding="utf-8")
+    return open(output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+
+def compute_dataset_stats(entries: Iterable[Dict[str, str]]) -> Dict:
+    """データセットカード用の統計（総エントリ数・ジャンル・対象読者）を計算する"""
+    stats = {"total_entries": 0, "genres": set(), "audiences": set()}
+    for entry in entries:
+        _update_dataset_stats(stats, entry)
+    return stats
+
+def _update_dataset_stats(stats: Dict, entry: Dict[str, str]) -> None:
+    stats["total_entries"] += 1
+    stats["genres"].add(entry.get('genre', 'Unknown'))
+    stats["audiences"].add(entry.get('audience', 'Unknown'))
+
+def write_alpaca_dataset(
+    entries: Iterable[Dict[str, str]],
+    output_file: Path,
+    output_format: str = "json"
+) -> Dict:
+    """エントリを受け取った順に書き出し、同じ走査でデータセットカード用の統計を計算する
+
+    jsonl系の形式では1行1エントリで書き出すため、利用側もファイル全体を読み込まずに扱える。
+
+    Returns:
+        compute_dataset_statsと同じ形式の統計
+    """
+    if output_format not in ALPACA_FORMATS:
+        raise ValueError(f"未対応の出力形式です: {output_format}（{', '.join(ALPACA_FORMATS)}）")
+
+    stats = compute_dataset_stats([])
+
+    def counted_entries():
+        for entry in entries:
+            _update_dataset_stats(stats, entry)
+            yield entry
+
+    with _open_alpaca_output(output_file, output_format) as f:
+        if output_format == "json":
+            _write_alpaca_entries(counted_entries(), f)
+        else:
+            for entry in counted_entries():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    console.print(f"[bold green]✓[/bold green] 合計{stats['total_entries']}個のエントリを "
+                  f"[cyan]{output_file}[/cyan] に保存しました")
+    return stats
+
+def convert_all_xml_to_alpaca(
+    qa_dir: Path,
+    output_file: Path,
+    max_workers: int = None,
+    output_format: str = "json"
+) -> Dict:
+    """QAディレクトリ内のすべてのXMLファイルをアルパカ形式に変換
+
+    XMLファイルはプロセスプールで並列に読み込み、読み終えた順（ファイル順）に出力ファイルへ書き出す。
+    max_workersを指定しない場合は、ファイルの合計サイズに応じてCPU数まで並列化する。
+    エントリはメモリに溜めず、データセットカード用の統計だけを返す。
+    """
     xml_files = list(qa_dir.glob("*.xml"))
     
     if not xml_files:
         console.print(f"[yellow]XMLファイルが見つかりません: {qa_dir}[/yellow]")
-        return all_alpaca_data
+        return compute_dataset_stats([])
     
     console.print(f"[green]{len(xml_files)}個のXMLファイルを変換中...[/green]")
+
+    def iter_entries():
+        for xml_file, qa_pairs in iter_qa_pairs_from_xml_files(xml_files, max_workers):
+            console.print(f"[dim]変換中: {xml_file.name}[/dim]")
+            for qa_pair in qa_pairs:
+                yield _to_alpaca_entry(qa_pair)
+            console.print(f"[green]✓[/green] {len(qa_pairs)}個のエントリを追加")
     
-    for xml_file in xml_files:
-        console.print(f"[dim]変換中: {xml_file.name}[/dim]")
-        alpaca_data = xml_to_alpaca_format(xml_file)
-        all_alpaca_data.extend(alpaca_data)
-        console.print(f"[green]✓[/green] {len(alpaca_data)}個のエントリを追加")
-    
-    # JSONファイルに保存
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_alpaca_data, f, ensure_ascii=False, indent=2)
-    
-    console.print(f"[bold green]✓[/bold green] 合計{len(all_alpaca_data)}個のエントリを "
-                  f"[cyan]{output_file}[/cyan] に保存しました")
-    
-    return all_alpaca_data
+    return write_alpaca_dataset(iter_entries(), output_file, output_format)
+
+def convert_store_to_alpaca(store: QAStore, output_file: Path, output_format: str = "json") -> Dict:
+    """Q&Aストア（qa.sqlite）のQ&Aペアをアルパカ形式に変換（XMLのパースを行わない）"""
+    if not store.count():
+        console.print(f"[yellow]Q&Aストアにデータがありません: {store.db_path}[/yellow]")
+        return compute_dataset_stats([])
+
+    return write_alpaca_dataset(
+        (_to_alpaca_entry(pair) for pair in store.iter_pairs()), output_file, output_format
+    )
 
 def upload_to_huggingface(
-    dataset_data: List[Dict[str, str]],
+    dataset_data: Union[List[Dict[str, str]], Path],
     repo_name: str,
     hf_token: Optional[str] = None,
     private: bool = False,
     commit_message: str = "Upload alpaca dataset",
     readme_file: Optional[Path] = None
 ) -> bool:
-    """Hugging Face Hubにデータセットをアップロード"""
+    """Hugging Face Hubにデータセットをアップロード
+
+    dataset_dataにはエントリのリスト、またはアルパカ形式ファイル（json / jsonl / jsonl.gz / jsonl.zst）のパスを渡す。
+    """
     
     if not hf_token:
         hf_token = os.getenv("HUGGINGFACE_TOKEN")
@@ -110,7 +189,10 @@ def upload_to_huggingface(
             console.print(f"[yellow]リポジトリ作成時の警告: {e}[/yellow]")
         
         # データセットを作成
-        dataset = Dataset.from_list(dataset_data)
+        if isinstance(dataset_data, Path):
+            dataset = Dataset.from_json(str(dataset_data))
+        else:
+            dataset = Dataset.from_list(dataset_data)
         
         # Hugging Face Hubにプッシュ
         dataset.push_to_hub(
@@ -145,16 +227,20 @@ def upload_to_huggingface(
         return False
 
 def create_dataset_card(
-    dataset_data: List[Dict[str, str]], 
+    dataset_data: Union[List[Dict[str, str]], Dict], 
     output_file: Path,
     dataset_name: str = "Generated QA Dataset"
 ) -> None:
-    """データセットカード（README.md）を生成"""
+    """データセットカード（README.md）を生成
+
+    dataset_dataにはエントリのリスト、または変換時に計算した統計（compute_dataset_statsの形式）を渡す。
+    """
     
     # 統計情報を計算
-    total_entries = len(dataset_data)
-    genres = set(entry.get('genre', 'Unknown') for entry in dataset_data)
-    audiences = set(entry.get('audience', 'Unknown') for entry in dataset_data)
+    stats = dataset_data if isinstance(dataset_data, dict) else compute_dataset_stats(dataset_data)
+    total_entries = stats["total_entries"]
+    genres = stats["genres"]
+    audiences = stats["audiences"]
     
     # データセットカードの内容
     card_content = f"""---
@@ -3,6 +3,7 @@
 バッチ処理機能
 """
 
+import time
 from pathlib import Path
 from rich.console import Console
 from tqdm import tqdm
@@ -12,18 +13,42 @@ from .core import (
     split_text,
     get_chunk_with_surrounding_context,
     create_augmented_chunks,
-    convert_to_xml_by_genre,
     create_output_directories
 )
+from .text_splitter import ChunkCounter, iter_split_file
+from .alpaca_converter import convert_store_to_alpaca, get_alpaca_output_file
 from .ga_parser import parse_ga_definitions_from_xml_improved
+from .output_sinks import open_output_sinks
+from .qa_store import QA_STORE_FILENAME, QAStore
+from .run_stats import build_run_summary
 
 # generatorsパッケージからインポート
-from .generators import (
-    generate_qa_for_chunk_with_ga,
-    generate_qa_for_chunk_with_ga_and_fulltext,
-    generate_qa_for_chunk_with_ga_and_thinking,
-    generate_qa_for_chunk_with_surrounding_context,
-    generate_ga_definitions
+from .generators import generate_ga_definitions
+from .job_manifest import (
+    JobManifest,
+    MANIFEST_FILENAME,
+    create_resumable_runner,
+    create_resumable_batched_runner,
+    get_generation_mode,
+    hash_text
+)
+from .run_log import (
+    configure_log_level,
+    configure_run_log,
+    close_run_log,
+    get_task_logs_dir,
+    is_log_level_enabled,
+    write_run_summary
+)
+from .task_engine import (
+    build_qa_tasks,
+    build_batched_qa_tasks,
+    create_qa_task_runner,
+    create_batched_qa_task_runner,
+    run_qa_tasks,
+    count_task_cells,
+    expand_task_results,
+    build_qa_entries
 )
 
 console = Console()
@@ -172,9 +197,15 @@ def _batch_create_ga_files(text_files, output_dir, model, num_ga_pairs, max_cont
 def _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, chunk_size, chunk_overlap,
                         num_qa_pairs, use_fulltext, use_thinking, use_surrounding_context,
                         context_before, context_after, append_mode,
-                        export_alpaca, upload_hf, hf_repo_name, hf_token, hf_private):
+                        export_alpaca, upload_hf, hf_repo_name, hf_token, hf_private,
+                        concurrency=1, resume=False, ga_batch_size=1, log_format="files",
+                        log_level="debug", output_format="xml", use_qa_store=False,
+                        alpaca_format="json", streaming_split=False, splitter="native",
+                        chunk_unit="chars"):
     """複数のテキストファイルをバッチ処理する内部関数（各ファイルごとにフォルダを作成）"""
 
+    configure_log_level(log_level)
+
     # GAペアの解析は各ファイルごとに行う（ga_base_dirモードの場合）
     ga_pairs = None
     if ga_file:
@@ -195,6 +226,9 @@ def _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, ch
         warnings.append("🤔 思考フローモード")
     if use_surrounding_context:
         warnings.append(f"🔗 周辺チャンクモード ({context_before}前+{context_after}後)")
+    if streaming_split and (use_fulltext or use_surrounding_context):
+        console.print("[yellow]--streaming-split は全文・周辺コンテキストモードと併用できないため、ファイル全体を読み込んで分割します。[/yellow]")
+        streaming_split = False
 
     if warnings:
         from .commands import Panel
@@ -212,14 +246,23 @@ def _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, ch
     for text_file in (tqdm(text_files, desc="ファイル処理中")):
             console.print(f"\n[bold cyan]処理中: {text_file.name}[/bold cyan]")
 
+            qa_store = None
             try:
                 # 各ファイルごとに専用フォルダを作成
                 file_output_dir = output_dir / text_file.stem
                 dirs = create_output_directories(file_output_dir)
                 console.print(f"[dim]✓ ファイル用ディレクトリを作成: {file_output_dir}[/dim]")
-
-                text = text_file.read_text(encoding="utf-8")
-                console.print(f"[dim]✓ テキスト長: {len(text):,} 文字[/dim]")
+                # 実行ログはファイルごとのlogs/に追記する
+                if is_log_level_enabled("full"):
+                    configure_run_log(dirs["logs"], log_format)
+                task_logs_dir = get_task_logs_dir(dirs["logs"])
+
+                if streaming_split:
+                    text = None
+                    console.print(f"[dim]✓ ファイルサイズ: {text_file.stat().st_size:,} バイト（読み込みながら分割）[/dim]")
+                else:
+                    text = text_file.read_text(encoding="utf-8")
+                    console.print(f"[dim]✓ テキスト長: {len(text):,} 文字[/dim]")
 
                 # GAファイルのパスを決定するロジック
                 current_ga_path = None
@@ -250,9 +293,15 @@ def _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, ch
 
                 console.print(f"[green]✓[/green] {len(current_ga_pairs)}個のGAペアを発見")
 
-                with console.status(f"✂️ テキストをチャンクに分割中... ({text_file.name})"):
-                    chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-                console.print(f"[green]✓[/green] {len(chunks)}個のチャンクを作成")
+                if streaming_split:
+                    chunks = ChunkCounter(iter_split_file(
+                        text_file, chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_unit=chunk_unit
+                    ))
+                else:
+                    with console.status(f"✂️ テキストをチャンクに分割中... ({text_file.name})"):
+                        chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                            splitter=splitter, length_unit=chunk_unit)
+                    console.print(f"[green]✓[/green] {len(chunks)}個のチャンクを作成")
 
                 # 周辺コンテキストモードの場合、チャンクを拡張
                 if use_surrounding_context:
@@ -260,111 +309,118 @@ def _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, ch
                         augmented_chunks = create_augmented_chunks(chunks, context_before, context_after)
                     console.print(f"[green]✓[/green] {len(augmented_chunks)}個の拡張チャンクを作成")
 
-                all_qa_pairs_with_ga = []
-                total_tasks_for_file = len(chunks) * len(current_ga_pairs)
+                total_tasks_for_file = None if streaming_split else len(chunks) * len(current_ga_pairs)
                 # tqdmサブバー
                 from tqdm import tqdm as _tqdm
                 pbar_ctx = _tqdm(total=total_tasks_for_file, desc=text_file.name, leave=False)
-                # 進捗の更新は後続のループ内で行う
+                # 進捗の更新は各タスクの完了時に行う
 
                 if use_surrounding_context:
                     # 周辺コンテキストモードの処理
                     # ドキュメント冒頭（最大3000文字）を付与して文脈の安定性を高める
                     doc_head = text[:3000]
-                    for i, (target_chunk, augmented_content, _) in enumerate(augmented_chunks):
-                        for ga_pair in current_ga_pairs:
-                            content_with_head = (
-                                f"【ドキュメント冒頭（最大3000文字）】:\n{doc_head}\n\n" +
-                                augmented_content
-                            )
-                            qa_pairs = generate_qa_for_chunk_with_surrounding_context(
-                                content=content_with_head,
-                                model=model,
-                                ga_pair=ga_pair,
-                                logs_dir=dirs["logs"],
-                                num_qa_pairs=num_qa_pairs
-                            )
-
-                            for pair in qa_pairs:
-                                qa_entry = {
-                                    "genre": ga_pair['genre']['title'],
-                                    "audience": ga_pair['audience']['title'],
-                                    "question": pair['question'],
-                                    "answer": pair['answer']
-                                }
-                                all_qa_pairs_with_ga.append(qa_entry)
-
-                            pbar_ctx.update(1)
+                    task_chunks = (
+                        f"【ドキュメント冒頭（最大3000文字）】:\n{doc_head}\n\n" +
+                        augmented_content
+                        for _, augmented_content, _ in augmented_chunks
+                    )
                 else:
                     # 通常モードの処理
-                    for chunk in chunks:
-                        for ga_pair in current_ga_pairs:
-                            if use_thinking:
-                                qa_pairs = generate_qa_for_chunk_with_ga_and_thinking(
-                                    chunk=chunk,
-                                    full_text=text if use_fulltext else "",
-                                    model=model,
-                                    ga_pair=ga_pair,
-                                    logs_dir=dirs["logs"],
-                                    num_qa_pairs=num_qa_pairs
-                                )
-                            elif use_fulltext:
-                                qa_pairs = generate_qa_for_chunk_with_ga_and_fulltext(
-                                    chunk=chunk,
-                                    full_text=text,
-                                    model=model,
-                                    ga_pair=ga_pair,
-                                    logs_dir=dirs["logs"],
-                                    num_qa_pairs=num_qa_pairs
-                                )
-                            else:
-                                qa_pairs = generate_qa_for_chunk_with_ga(
-                                    chunk, model=model, ga_pair=ga_pair,
-                                    logs_dir=dirs["logs"],
-                                    num_qa_pairs=num_qa_pairs
-                                )
-
-                            for pair in qa_pairs:
-                                qa_entry = {
-                                    "genre": ga_pair['genre']['title'],
-                                    "audience": ga_pair['audience']['title'],
-                                    "question": pair['question'],
-                                    "answer": pair['answer']
-                                }
-                                all_qa_pairs_with_ga.append(qa_entry)
-
-                            pbar_ctx.update(1)
+                    task_chunks = chunks
+
+                if ga_batch_size > 1:
+                    tasks = build_batched_qa_tasks(task_chunks, current_ga_pairs, ga_batch_size, source=text_file.name)
+                    run_task = create_batched_qa_task_runner(
+                        model=model,
+                        logs_dir=task_logs_dir,
+                        num_qa_pairs=num_qa_pairs
+                    )
+                else:
+                    tasks = build_qa_tasks(task_chunks, current_ga_pairs, source=text_file.name)
+                    run_task = create_qa_task_runner(
+                        model=model,
+                        logs_dir=task_logs_dir,
+                        num_qa_pairs=num_qa_pairs,
+                        full_text=text or "",
+                        use_fulltext=use_fulltext,
+                        use_thinking=use_thinking,
+                        use_surrounding_context=use_surrounding_context
+                    )
+                manifest = JobManifest(dirs["base"] / MANIFEST_FILENAME)
+                create_runner = create_resumable_batched_runner if ga_batch_size > 1 else create_resumable_runner
+                run_task = create_runner(
+                    run_task, manifest,
+                    source=text_file.name,
+                    mode=get_generation_mode(use_fulltext, use_thinking, use_surrounding_context, ga_batch_size),
+                    resume=resume
+                )
+                file_started = time.perf_counter()
+                # Q&Aはタスクの完了ごとにGenre別ファイルへ書き出す
+                qa_pair_count = 0
+                if use_qa_store:
+                    qa_store = QAStore(dirs["base"] / QA_STORE_FILENAME)
+                with open_output_sinks(dirs["qa"], output_format, append_mode,
+                                       store=qa_store, source=text_file.name, model=model) as sinks:
+                    for task, result in run_qa_tasks(
+                        tasks, run_task,
+                        concurrency=concurrency,
+                        on_task_done=lambda task, result: pbar_ctx.update(count_task_cells(task))
+                    ):
+                        for ga_task, qa_pairs in expand_task_results(task, result):
+                            entries = build_qa_entries(ga_task["ga_pair"], qa_pairs)
+                            qa_pair_count += len(entries)
+                            sinks.write_all(entries, chunk_hash=hash_text(ga_task["chunk"]))
                 # close tqdm sub-bar if used
                 pbar_ctx.close()
-
-                # このファイルのQ&AペアをXMLに変換して保存
-                xml_outputs_by_genre = convert_to_xml_by_genre(all_qa_pairs_with_ga, dirs["qa"], append_mode)
-
-                saved_files = []
-                for genre, xml_content in xml_outputs_by_genre.items():
-                    from .core import sanitize_filename
-                    safe_genre_name = sanitize_filename(genre)
-                    output_file_path = dirs["qa"] / f"{safe_genre_name}.xml"
-                    output_file_path.write_text(xml_content, encoding="utf-8")
-                    saved_files.append(output_file_path.name)
+                chunk_count = chunks.count if streaming_split else len(chunks)
+                if streaming_split:
+                    total_tasks_for_file = chunk_count * len(current_ga_pairs)
+                    console.print(f"[green]✓[/green] {chunk_count}個のチャンクを処理")
+                manifest_stats = manifest.stats()
+                manifest.close()
+                if manifest_stats["skipped"]:
+                    console.print(f"[dim]✓ {manifest_stats['skipped']}件の完了済みタスクをマニフェストから復元[/dim]")
+
+                write_run_summary(dirs["logs"], build_run_summary(
+                    source=text_file.name,
+                    model=model,
+                    mode=get_generation_mode(use_fulltext, use_thinking, use_surrounding_context, ga_batch_size),
+                    tasks=total_tasks_for_file,
+                    qa_pairs=qa_pair_count,
+                    elapsed_seconds=time.perf_counter() - file_started,
+                    manifest_stats=manifest_stats,
+                    chunks=chunk_count,
+                    ga_pairs=len(current_ga_pairs),
+                    concurrency=concurrency,
+                    log_level=log_level
+                ))
+
+                saved_files = [output_file_path.name for output_file_path in sinks.paths]
 
                 # アルパカ形式でのエクスポート（ファイル個別）
                 if export_alpaca:
                     from .core import convert_all_xml_to_alpaca, create_dataset_card
-                    alpaca_file = dirs["base"] / "dataset_alpaca.json"
-                    alpaca_data = convert_all_xml_to_alpaca(dirs["qa"], alpaca_file)
+                    alpaca_file = get_alpaca_output_file(dirs["base"], alpaca_format)
+                    if qa_store:
+                        alpaca_stats = convert_store_to_alpaca(qa_store, alpaca_file, alpaca_format)
+                    else:
+                        alpaca_stats = convert_all_xml_to_alpaca(dirs["qa"], alpaca_file, output_format=alpaca_format)
 
                     # データセットカードを生成
                     readme_file = dirs["base"] / "README.md"
-                    create_dataset_card(alpaca_data, readme_file, f"Generated QA Dataset from {text_file.name}")
+                    create_dataset_card(alpaca_stats, readme_file, f"Generated QA Dataset from {text_file.name}")
 
-                successful_files.append((text_file.name, file_output_dir, len(all_qa_pairs_with_ga), saved_files))
-                total_qa_pairs_generated += len(all_qa_pairs_with_ga)
-                console.print(f"[green]✓[/green] {len(all_qa_pairs_with_ga)}個のQ&Aペアを生成")
+                successful_files.append((text_file.name, file_output_dir, qa_pair_count, saved_files))
+                total_qa_pairs_generated += qa_pair_count
+                console.print(f"[green]✓[/green] {qa_pair_count}個のQ&Aペアを生成")
 
             except Exception as e:
                 console.print(f"[red]エラー: {text_file.name} の処理に失敗しました: {e}[/red]")
                 continue
+            finally:
+                if qa_store:
+                    qa_store.close()
+                close_run_log()
 
     # tqdmで外側ループ済み
 
@@ -3,7 +3,9 @@
 コマンド関数群 - CLIコマンドの実装
 """
 
+import time
 from pathlib import Path
+from typing import List
 from typing_extensions import Annotated
 import typer
 from rich.console import Console
@@ -14,11 +16,14 @@ from rich.table import Table
 from dotenv import load_dotenv
 
 from .generators import (
-    generate_qa_for_chunk_with_ga,
-    generate_qa_for_chunk_with_ga_and_fulltext,
-    generate_qa_for_chunk_with_ga_and_thinking,
-    generate_qa_for_chunk_with_surrounding_context,
-    generate_ga_definitions
+    generate_ga_definitions,
+    ensure_pool_capacity,
+    configure_streaming,
+    configure_response_cache,
+    close_response_cache,
+    configure_rate_limit,
+    get_default_base_url,
+    configure_retry_policy
 )
 from .xml_utils import load_existing_xml_file
 from .core import (
@@ -26,7 +31,6 @@ from .core import (
     parse_ga_definitions_from_xml,
     save_ga_definitions_by_genre,
     create_output_directories,
-    sanitize_filename,
     convert_all_xml_to_alpaca,
     upload_to_huggingface,
     create_dataset_card,
@@ -35,7 +39,48 @@ from .core import (
     create_augmented_chunks,
     split_text
 )
+from .token_counter import LENGTH_UNITS
+from .text_splitter import (
+    SPLITTERS,
+    ChunkCounter,
+    iter_split_file
+)
 from .ga_parser import parse_ga_definitions_from_xml_improved
+from .job_manifest import (
+    JobManifest,
+    MANIFEST_FILENAME,
+    create_resumable_runner,
+    create_resumable_batched_runner,
+    get_generation_mode,
+    hash_text
+)
+from .alpaca_converter import ALPACA_FORMATS, convert_store_to_alpaca, get_alpaca_output_file
+from .output_sinks import OUTPUT_FORMATS, export_qa_store, open_output_sinks
+from .qa_store import QA_STORE_FILENAME, QAStore
+from .run_log import (
+    LOG_FORMATS,
+    LOG_LEVELS,
+    configure_log_level,
+    configure_run_log,
+    close_run_log,
+    export_run_log,
+    get_run_log_path,
+    get_task_logs_dir,
+    is_log_level_enabled,
+    read_run_log_index,
+    write_run_summary
+)
+from .run_stats import build_run_summary, collect_run_stats
+from .task_engine import (
+    build_qa_tasks,
+    build_batched_qa_tasks,
+    create_qa_task_runner,
+    create_batched_qa_task_runner,
+    run_qa_tasks,
+    count_task_cells,
+    expand_task_results,
+    build_qa_entries
+)
 from .batch_process import (
     _batch_create_ga_files,
     _batch_process_files
@@ -78,6 +123,35 @@ def print_error_panel(error_msg: str):
     console.print(panel)
 
 
+def print_run_stats():
+    """レスポンスキャッシュとレート制限の実行統計を表示"""
+    stats_table = Table(show_header=False, box=None)
+    stats_table.add_column("項目", style="bold cyan")
+    stats_table.add_column("値", style="white")
+
+    run_stats = collect_run_stats()
+    cache_stats = run_stats["cache"]
+    if cache_stats is not None:
+        total_lookups = cache_stats["hits"] + cache_stats["misses"]
+        hit_rate = cache_stats["hits"] / total_lookups * 100 if total_lookups else 0.0
+        stats_table.add_row("💾 キャッシュヒット", f"{cache_stats['hits']:,} / {total_lookups:,} ({hit_rate:.1f}%)")
+        stats_table.add_row("💾 キャッシュミス", f"{cache_stats['misses']:,}")
+        stats_table.add_row("🗑️ キャッシュ削除", f"{cache_stats['evictions']:,}")
+        stats_table.add_row("📦 キャッシュサイズ", f"{cache_stats['entries']:,}件 ({cache_stats['size_bytes'] / (1024 * 1024):.1f} MB)")
+
+    rate_stats = run_stats["rate_limit"]
+    if rate_stats["requests"]:
+        stats_table.add_row("⏳ レート制限待ち", f"{rate_stats['throttled_requests']:,} / {rate_stats['requests']:,}件 (合計 {rate_stats['total_wait_seconds']:.1f}秒)")
+
+    retry_stats = run_stats["retry"]
+    if retry_stats["retries"] or retry_stats["exhausted"] or retry_stats["fatal"]:
+        stats_table.add_row("🔁 リトライ", f"{retry_stats['retries']:,}回 (回復 {retry_stats['recovered']:,}件)")
+        stats_table.add_row("❌ 失敗した呼び出し", f"リトライ上限 {retry_stats['exhausted']:,}件 / 再試行不可 {retry_stats['fatal']:,}件")
+
+    if stats_table.row_count:
+        console.print(Panel(stats_table, title="[bold blue]📊 実行統計[/bold blue]", border_style="blue"))
+
+
 @app.command()
 def create_ga(
     file_path: Annotated[Path, typer.Argument(
@@ -235,11 +309,23 @@ def generate(
         help="Q&Aペアの生成に使用するLLMモデル名。"
     )] = "openai/gpt-oss-120b",
     chunk_size: Annotated[int, typer.Option(
-        help="テキストチャンクの最大サイズ。"
+        help="テキストチャンクの最大サイズ（単位は--chunk-unit）。"
     )] = 2000,
     chunk_overlap: Annotated[int, typer.Option(
-        help="チャンク間のオーバーラップサイズ。"
+        help="チャンク間のオーバーラップサイズ（単位は--chunk-unit）。"
     )] = 200,
+    chunk_unit: Annotated[str, typer.Option(
+        "--chunk-unit",
+        help="--chunk-size・--chunk-overlapの単位（chars / tokens）。tokensは文字種ごとの係数から推定したトークン数で測り、プロンプトをモデルのトークン上限に収めやすくします。"
+    )] = "chars",
+    streaming_split: Annotated[bool, typer.Option(
+        "--streaming-split",
+        help="入力ファイルを読み込みながらチャンクに分割し、先頭のチャンクからQ&A生成を始めます（ファイル全体をメモリに載せません）。--use-fulltext・--use-surrounding-contextとは併用できません。"
+    )] = False,
+    splitter: Annotated[str, typer.Option(
+        "--splitter",
+        help="チャンク分割の方式（native / langchain / ja / markdown）。nativeはLangChainのRecursiveCharacterTextSplitterと同じチャンクを返す組み込みの実装、jaは日本語の文（。！？・改行）の境界で分割、markdownは見出しのセクションと段落・表・コードブロックの単位で分割し、各チャンクの先頭に見出しの階層を付けます。"
+    )] = "native",
     num_qa_pairs: Annotated[int, typer.Option(
         "--num-qa-pairs", "-q",
         help="各チャンク・GAペアの組み合わせで生成するQ&Aペアの数。指定しない場合はLLMが適切な数を決定します。"
@@ -262,14 +348,70 @@ def generate(
     context_after: Annotated[int, typer.Option(
         help="周辺コンテキストとして含める後方チャンク数。"
     )] = 1,
+    ga_batch_size: Annotated[int, typer.Option(
+        "--ga-batch-size", min=1,
+        help="1回のリクエストでまとめて処理するGAペアの数。2以上を指定すると、チャンク本文を1度だけ送信して複数GAペア分のQ&Aを生成します（基本モードのみ）。"
+    )] = 1,
+    concurrency: Annotated[int, typer.Option(
+        "--concurrency", "-c", min=1,
+        help="同時に実行するQ&A生成リクエスト数。出力の順序は並列数に関わらず同じです。"
+    )] = 1,
+    stream: Annotated[bool, typer.Option(
+        "--stream",
+        help="レスポンスをストリーミングで受信し、</QAPairs>の受信または指定数のQ&Aが揃った時点で受信を打ち切ります。"
+    )] = False,
+    use_cache: Annotated[bool, typer.Option(
+        "--cache",
+        help="LLMレスポンスを出力ディレクトリ内のキャッシュに保存し、同じリクエストの再実行時はAPIを呼び出さずに再利用します。"
+    )] = False,
+    cache_max_mb: Annotated[int, typer.Option(
+        "--cache-max-mb", min=1,
+        help="レスポンスキャッシュの最大サイズ（MB）。超過した場合は古いエントリから削除します。"
+    )] = 1024,
+    max_retries: Annotated[int, typer.Option(
+        "--max-retries", min=0,
+        help="タイムアウト・429・5xxなど一時的なエラー時の最大再試行回数（指数バックオフ、Retry-Afterを優先）。"
+    )] = 5,
+    rpm: Annotated[int, typer.Option(
+        "--rpm", min=1,
+        help="1分あたりの最大リクエスト数。並列実行時にプロバイダのレート制限(429)を避けるために使用します。"
+    )] = None,
+    tpm: Annotated[int, typer.Option(
+        "--tpm", min=1,
+        help="1分あたりの最大トークン数。送信前にプロンプト長から推定し、レスポンスのusageで補正します。"
+    )] = None,
+    resume: Annotated[bool, typer.Option(
+        "--resume",
+        help="出力ディレクトリのマニフェストを参照し、前回の実行で完了したタスクをスキップして再開します。"
+    )] = False,
+    log_format: Annotated[str, typer.Option(
+        "--log-format",
+        help="タスクごとのログの保存形式（files / jsonl / jsonl.gz）。jsonlはlogs/run_log.jsonlに1タスク1行で追記し、`logs export`で個別ファイルを再生成できます。"
+    )] = "files",
+    log_level: Annotated[str, typer.Option(
+        "--log-level",
+        help="logs/に書き出すログの詳細度（none / summary / full / debug）。summaryは実行ごとの統計のみ、fullはタスクごとのログ、debugはXML解析のデバッグ情報も書き出します。"
+    )] = "debug",
     append_mode: Annotated[bool, typer.Option(
         "--append", "-A",
         help="既存のXMLファイルに新しいQ&Aを追加します。指定しない場合は上書きします。"
     )] = False,
+    output_format: Annotated[str, typer.Option(
+        "--output-format",
+        help="qa/に書き出すGenre別ファイルの形式（xml / jsonl / both）。Q&Aはタスクの完了ごとに逐次書き出されます。"
+    )] = "xml",
+    use_qa_store: Annotated[bool, typer.Option(
+        "--qa-store",
+        help="Q&Aを出力ディレクトリのqa.sqliteにも記録します（genre・audience・入力ファイルなどで索引付け）。--appendなしの場合は同じ入力ファイルの既存分を置き換えます。"
+    )] = False,
     export_alpaca: Annotated[bool, typer.Option(
         "--export-alpaca", "-a",
         help="生成されたQ&AペアをAlpaca形式のJSONファイルとして出力します。"
     )] = False,
+    alpaca_format: Annotated[str, typer.Option(
+        "--alpaca-format",
+        help="--export-alpaca で書き出すファイルの形式（json / jsonl / jsonl.gz / jsonl.zst）。jsonl系は1行1エントリで逐次書き出します。"
+    )] = "json",
     upload_hf: Annotated[bool, typer.Option(
         "--upload-hf", "-u",
         help="生成されたデータセットをHugging Face Hubにアップロードします。"
@@ -297,7 +439,58 @@ def generate(
     --context-beforeと--context-afterで前後のチャンク数を調整可能です。
     """
 
+    qa_store = None
     try:
+        # 並列リクエスト数に合わせて共有コネクションプールを確保
+        ensure_pool_capacity(concurrency)
+
+        # 複数GA一括生成は基本モードのプロンプトのみ対応
+        if ga_batch_size > 1 and (use_fulltext or use_thinking or use_surrounding_context):
+            console.print("[yellow]--ga-batch-size は --use-fulltext / --use-thinking / --use-surrounding-context と併用できません。GAペアごとに生成します。[/yellow]")
+            ga_batch_size = 1
+
+        if log_format not in LOG_FORMATS:
+            print_error_panel(f"--log-format には {', '.join(LOG_FORMATS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        if log_level not in LOG_LEVELS:
+            print_error_panel(f"--log-level には {', '.join(LOG_LEVELS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        configure_log_level(log_level)
+        if output_format not in OUTPUT_FORMATS:
+            print_error_panel(f"--output-format には {', '.join(OUTPUT_FORMATS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        if alpaca_format not in ALPACA_FORMATS:
+            print_error_panel(f"--alpaca-format には {', '.join(ALPACA_FORMATS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        if chunk_unit not in LENGTH_UNITS:
+            print_error_panel(f"--chunk-unit には {', '.join(LENGTH_UNITS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        if splitter not in SPLITTERS:
+            print_error_panel(f"--splitter には {', '.join(SPLITTERS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+        if streaming_split and splitter != "native":
+            console.print("[yellow]--streaming-split は --splitter native でのみ使用できます。ファイル全体を読み込んで分割します。[/yellow]")
+            streaming_split = False
+        if export_alpaca and output_format == "jsonl":
+            console.print("[yellow]--export-alpaca はGenre別XMLから変換するため、--output-format both で出力します。[/yellow]")
+            output_format = "both"
+
+        configure_retry_policy(max_retries=max_retries)
+        configure_streaming(stream)
+
+        # 接続先のbase_urlとこのモデルへのリクエストにRPM/TPM制限を適用
+        if rpm or tpm:
+            configure_rate_limit(rpm=rpm, tpm=tpm, base_url=get_default_base_url(), model=model)
+
+        # レスポンスキャッシュを有効化
+        if use_cache:
+            if output_dir:
+                cache_path = output_dir / "cache" / "llm_responses.sqlite"
+                configure_response_cache(cache_path, max_bytes=cache_max_mb * 1024 * 1024)
+                console.print(f"[dim]✓ レスポンスキャッシュを使用: {cache_path}[/dim]")
+            else:
+                console.print("[yellow]--cache を使用するには --output-dir の指定が必要です。キャッシュは無効です。[/yellow]")
+
         # フォルダかファイルかを判定
         if file_path.is_dir():
             # フォルダの場合：バッチ処理
@@ -328,13 +521,24 @@ def generate(
             batch_settings_table.add_row("📁 出力先", str(output_dir) if output_dir else "コンソール")
             batch_settings_table.add_row("🤖 モデル", model)
             batch_settings_table.add_row("🔢 Q&A数/チャンク", str(num_qa_pairs))
+            batch_settings_table.add_row("⚡ 並列数", str(concurrency))
 
             mode_options = []
             if use_fulltext: mode_options.append("📋 全文コンテキスト")
             if use_thinking: mode_options.append("🤔 思考フロー")
             if use_surrounding_context: mode_options.append(f"🔗 周辺コンテキスト ({context_before}前+{context_after}後)")
+            if ga_batch_size > 1: mode_options.append(f"📦 GA一括生成 ({ga_batch_size}ペア/リクエスト)")
+            if stream: mode_options.append("📡 ストリーミング")
+            if resume: mode_options.append("↩️ 再開モード")
+            if log_format != "files": mode_options.append(f"🗒️ 実行ログ ({log_format})")
+            if log_level != "debug": mode_options.append(f"🔇 ログレベル ({log_level})")
             if append_mode: mode_options.append("➕ 追加モード")
-            if export_alpaca: mode_options.append("🤙 Alpaca形式")
+            if output_format != "xml": mode_options.append(f"📝 出力形式 ({output_format})")
+            if use_qa_store: mode_options.append("🗄️ Q&Aストア")
+            if streaming_split: mode_options.append("🌊 逐次分割")
+            if splitter != "native": mode_options.append(f"✂️ 分割方式 ({splitter})")
+            if chunk_unit != "chars": mode_options.append(f"🔤 チャンク単位 ({chunk_unit})")
+            if export_alpaca: mode_options.append(f"🤙 Alpaca形式 ({alpaca_format})")
             if upload_hf: mode_options.append("🤗 HFアップロード")
 
             if mode_options:
@@ -365,7 +569,12 @@ def generate(
             return _batch_process_files(text_files, ga_file, ga_base_dir, output_dir, model, chunk_size, chunk_overlap,
                                       num_qa_pairs, use_fulltext, use_thinking, use_surrounding_context,
                                       context_before, context_after, append_mode,
-                                      export_alpaca, upload_hf, hf_repo_name, hf_token, hf_private)
+                                      export_alpaca, upload_hf, hf_repo_name, hf_token, hf_private,
+                                      concurrency=concurrency, resume=resume, ga_batch_size=ga_batch_size,
+                                      log_format=log_format, log_level=log_level, output_format=output_format,
+                                      use_qa_store=use_qa_store, alpaca_format=alpaca_format,
+                                      streaming_split=streaming_split, splitter=splitter,
+                                      chunk_unit=chunk_unit)
         else:
             # 単一ファイルの場合：既存の処理
             # 設定情報をテーブルで表示
@@ -377,13 +586,24 @@ def generate(
             settings_table.add_row("📁 出力先", str(output_dir) if output_dir else "コンソール")
             settings_table.add_row("🤖 モデル", model)
             settings_table.add_row("🔢 Q&A数/チャンク", str(num_qa_pairs))
+            settings_table.add_row("⚡ 並列数", str(concurrency))
 
             mode_options = []
             if use_fulltext: mode_options.append("📋 全文コンテキスト")
             if use_thinking: mode_options.append("🤔 思考フロー")
             if use_surrounding_context: mode_options.append(f"🔗 周辺コンテキスト ({context_before}前+{context_after}後)")
+            if ga_batch_size > 1: mode_options.append(f"📦 GA一括生成 ({ga_batch_size}ペア/リクエスト)")
+            if stream: mode_options.append("📡 ストリーミング")
+            if resume: mode_options.append("↩️ 再開モード")
+            if log_format != "files": mode_options.append(f"🗒️ 実行ログ ({log_format})")
+            if log_level != "debug": mode_options.append(f"🔇 ログレベル ({log_level})")
             if append_mode: mode_options.append("➕ 追加モード")
-            if export_alpaca: mode_options.append("🤙 Alpaca形式")
+            if output_format != "xml": mode_options.append(f"📝 出力形式 ({output_format})")
+            if use_qa_store: mode_options.append("🗄️ Q&Aストア")
+            if streaming_split: mode_options.append("🌊 逐次分割")
+            if splitter != "native": mode_options.append(f"✂️ 分割方式 ({splitter})")
+            if chunk_unit != "chars": mode_options.append(f"🔤 チャンク単位 ({chunk_unit})")
+            if export_alpaca: mode_options.append(f"🤙 Alpaca形式 ({alpaca_format})")
             if upload_hf: mode_options.append("🤗 HFアップロード")
 
             if mode_options:
@@ -396,8 +616,15 @@ def generate(
                 print_error_panel("単一ファイル処理には --ga-file の指定が必須です。")
                 raise typer.Exit(code=1)
 
-            text = file_path.read_text(encoding="utf-8")
-            console.print(f"\n[dim]✓ テキスト長: {len(text):,} 文字を読み込みました[/dim]")
+            if streaming_split and (use_fulltext or use_surrounding_context):
+                console.print("[yellow]--streaming-split は全文・周辺コンテキストモードと併用できないため、ファイル全体を読み込んで分割します。[/yellow]")
+                streaming_split = False
+            if streaming_split:
+                text = None
+                console.print(f"\n[dim]✓ ファイルサイズ: {file_path.stat().st_size:,} バイト（読み込みながら分割します）[/dim]")
+            else:
+                text = file_path.read_text(encoding="utf-8")
+                console.print(f"\n[dim]✓ テキスト長: {len(text):,} 文字を読み込みました[/dim]")
 
         with console.status("🔍 GAペアを解析中..."):
             ga_pairs = parse_ga_file(ga_file)
@@ -408,9 +635,16 @@ def generate(
 
         console.print(f"\n[green]✓[/green] {len(ga_pairs)}個のGAペアを発見しました")
 
-        with console.status("✂️ テキストをチャンクに分割中..."):
-            chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        console.print(f"[green]✓[/green] {len(chunks)}個のチャンクを作成しました")
+        if streaming_split:
+            # チャンクはタスクの投入に合わせて読み込み・分割するため、総数は実行後に分かる
+            chunks = ChunkCounter(iter_split_file(
+                file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_unit=chunk_unit
+            ))
+        else:
+            with console.status("✂️ テキストをチャンクに分割中..."):
+                chunks = split_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                    splitter=splitter, length_unit=chunk_unit)
+            console.print(f"[green]✓[/green] {len(chunks)}個のチャンクを作成しました")
 
         # 周辺コンテキストモードの場合、チャンクを拡張
         if use_surrounding_context:
@@ -419,13 +653,15 @@ def generate(
             console.print(f"[green]✓[/green] {len(augmented_chunks)}個の拡張チャンクを作成しました")
 
         all_qa_pairs_with_ga = []
-        total_tasks = len(chunks) * len(ga_pairs)
+        total_tasks = None if streaming_split else len(chunks) * len(ga_pairs)
 
         # 出力ディレクトリがある場合は構造を作成
         dirs = None
         if output_dir:
             dirs = create_output_directories(output_dir)
             console.print(f"[dim]✓ 出力ディレクトリを作成: ga/, logs/, qa/[/dim]")
+            if is_log_level_enabled("full") and configure_run_log(dirs["logs"], log_format):
+                console.print(f"[dim]✓ 実行ログに追記: {get_run_log_path(dirs['logs'], log_format)}[/dim]")
 
         # モード警告を表示
         warnings = []
@@ -447,92 +683,119 @@ def generate(
         # tqdmベースの進捗表示に統一
         from tqdm import tqdm
         desc = "Q&A生成中"
-        iterable_outer = augmented_chunks if use_surrounding_context else chunks
-        with tqdm(total=total_tasks, desc=desc) as pbar:
-            if use_surrounding_context:
-                doc_head = text[:3000]
-                for i, (target_chunk, augmented_content, _) in enumerate(iterable_outer):
-                    for ga_pair in ga_pairs:
-                        content_with_head = (
-                            f"### 【ドキュメント冒頭（最大3000文字）】-----------:\n```\n{doc_head}\n```\n" +
-                            augmented_content
-                        )
-                        qa_pairs = generate_qa_for_chunk_with_surrounding_context(
-                            content=content_with_head,
-                            model=model,
-                            ga_pair=ga_pair,
-                            logs_dir=dirs["logs"] if dirs else None,
-                            num_qa_pairs=num_qa_pairs
-                        )
+        if use_surrounding_context:
+            doc_head = text[:3000]
+            task_chunks = (
+                f"### 【ドキュメント冒頭（最大3000文字）】-----------:\n```\n{doc_head}\n```\n" +
+                augmented_content
+                for _, augmented_content, _ in augmented_chunks
+            )
+        else:
+            task_chunks = chunks
+
+        if ga_batch_size > 1:
+            tasks = build_batched_qa_tasks(task_chunks, ga_pairs, ga_batch_size, source=file_path.name)
+            run_task = create_batched_qa_task_runner(
+                model=model,
+                logs_dir=get_task_logs_dir(dirs["logs"]) if dirs else None,
+                num_qa_pairs=num_qa_pairs
+            )
+        else:
+            tasks = build_qa_tasks(task_chunks, ga_pairs, source=file_path.name)
+            run_task = create_qa_task_runner(
+                model=model,
+                logs_dir=get_task_logs_dir(dirs["logs"]) if dirs else None,
+                num_qa_pairs=num_qa_pairs,
+                full_text=text or "",
+                use_fulltext=use_fulltext,
+                use_thinking=use_thinking,
+                use_surrounding_context=use_surrounding_context
+            )
 
-                        for pair in qa_pairs:
-                            qa_entry = {
-                                "genre": ga_pair['genre']['title'],
-                                "audience": ga_pair['audience']['title'],
-                                "question": pair['question'],
-                                "answer": pair['answer']
-                            }
-                            all_qa_pairs_with_ga.append(qa_entry)
+        # タスクの結果をマニフェストに記録し、--resume時は完了済みタスクを再利用
+        manifest = None
+        if dirs:
+            manifest = JobManifest(dirs["base"] / MANIFEST_FILENAME)
+            create_runner = create_resumable_batched_runner if ga_batch_size > 1 else create_resumable_runner
+            run_task = create_runner(
+                run_task, manifest,
+                source=file_path.name,
+                mode=get_generation_mode(use_fulltext, use_thinking, use_surrounding_context, ga_batch_size),
+                resume=resume
+            )
+        elif resume:
+            console.print("[yellow]--resume を使用するには --output-dir の指定が必要です。最初から実行します。[/yellow]")
+
+        # 出力ディレクトリがある場合は、Q&Aをタスクの完了ごとにGenre別ファイルへ書き出す
+        if dirs and use_qa_store:
+            qa_store = QAStore(dirs["base"] / QA_STORE_FILENAME)
+        elif use_qa_store:
+            console.print("[yellow]--qa-store を使用するには --output-dir の指定が必要です。[/yellow]")
+        sinks = None
+        if dirs:
+            sinks = open_output_sinks(
+                dirs["qa"], output_format, append_mode,
+                store=qa_store, source=file_path.name, model=model
+            )
+        qa_pair_count = 0
 
-                        pbar.update(1)
-            else:
-                for chunk in iterable_outer:
-                    for ga_pair in ga_pairs:
-                        if use_thinking:
-                            qa_pairs = generate_qa_for_chunk_with_ga_and_thinking(
-                                chunk=chunk,
-                                full_text=text if use_fulltext else "",
-                                model=model,
-                                ga_pair=ga_pair,
-                                logs_dir=dirs["logs"] if dirs else None,
-                                num_qa_pairs=num_qa_pairs
-                            )
-                        elif use_fulltext:
-                            qa_pairs = generate_qa_for_chunk_with_ga_and_fulltext(
-                                chunk=chunk,
-                                full_text=text,
-                                model=model,
-                                ga_pair=ga_pair,
-                                logs_dir=dirs["logs"] if dirs else None,
-                                num_qa_pairs=num_qa_pairs
-                            )
+        run_started = time.perf_counter()
+        try:
+            with tqdm(total=total_tasks, desc=desc) as pbar:
+                for task, result in run_qa_tasks(
+                    tasks, run_task,
+                    concurrency=concurrency,
+                    on_task_done=lambda task, result: pbar.update(count_task_cells(task))
+                ):
+                    for ga_task, qa_pairs in expand_task_results(task, result):
+                        entries = build_qa_entries(ga_task["ga_pair"], qa_pairs)
+                        qa_pair_count += len(entries)
+                        if sinks:
+                            sinks.write_all(entries, chunk_hash=hash_text(ga_task["chunk"]))
                         else:
-                            qa_pairs = generate_qa_for_chunk_with_ga(
-                                chunk, model=model, ga_pair=ga_pair,
-                                logs_dir=dirs["logs"] if dirs else None,
-                                num_qa_pairs=num_qa_pairs
-                            )
-
-                        for pair in qa_pairs:
-                            qa_entry = {
-                                "genre": ga_pair['genre']['title'],
-                                "audience": ga_pair['audience']['title'],
-                                "question": pair['question'],
-                                "answer": pair['answer']  # <think>...</think>回答...形式がそのまま入る
-                            }
-                            all_qa_pairs_with_ga.append(qa_entry)
-
-                        pbar.update(1)
+                            all_qa_pairs_with_ga.extend(entries)
+        finally:
+            if sinks:
+                sinks.close()
+
+        chunk_count = chunks.count if streaming_split else len(chunks)
+        if streaming_split:
+            total_tasks = chunk_count * len(ga_pairs)
+            console.print(f"[green]✓[/green] {chunk_count}個のチャンクを処理しました")
+
+        manifest_stats = None
+        if manifest:
+            manifest_stats = manifest.stats()
+            manifest.close()
+            if manifest_stats["skipped"]:
+                console.print(f"[green]✓[/green] {manifest_stats['skipped']}件の完了済みタスクをマニフェストから復元しました")
+            if manifest_stats["failed"]:
+                console.print(f"[yellow]⚠️ {manifest_stats['failed']}件のタスクでQ&Aが得られませんでした（--resume で再実行できます）[/yellow]")
+
+        if dirs:
+            write_run_summary(dirs["logs"], build_run_summary(
+                source=file_path.name,
+                model=model,
+                mode=get_generation_mode(use_fulltext, use_thinking, use_surrounding_context, ga_batch_size),
+                tasks=total_tasks,
+                qa_pairs=qa_pair_count,
+                elapsed_seconds=time.perf_counter() - run_started,
+                manifest_stats=manifest_stats,
+                chunks=chunk_count,
+                ga_pairs=len(ga_pairs),
+                concurrency=concurrency,
+                log_level=log_level
+            ))
 
         generation_summary = Panel(
-            f"✨ [bold green]{len(all_qa_pairs_with_ga)}[/bold green] 個のQ&Aペアを生成完了！",
+            f"✨ [bold green]{qa_pair_count}[/bold green] 個のQ&Aペアを生成完了！",
             title="[bold green]✅ 生成結果[/bold green]",
             border_style="green"
         )
         console.print(generation_summary)
 
         if dirs:
-            from .xml_utils import convert_to_xml_by_genre
-
-            xml_outputs_by_genre = convert_to_xml_by_genre(all_qa_pairs_with_ga, dirs["qa"], append_mode)
-
-            with console.status(f"💾 XMLファイルを {dirs['qa']} に保存中..."):
-                saved_files = []
-                for genre, xml_content in xml_outputs_by_genre.items():
-                    safe_genre_name = sanitize_filename(genre)
-                    output_file_path = dirs["qa"] / f"{safe_genre_name}.xml"
-                    output_file_path.write_text(xml_content, encoding="utf-8")
-                    saved_files.append(output_file_path.name)
+            saved_files = [output_file_path.name for output_file_path in sinks.paths]
 
             files_table = Table(show_header=False, box=None)
             files_table.add_column("ファイル", style="cyan")
@@ -543,13 +806,16 @@ def generate(
 
             # アルパカ形式でのエクスポート
             if export_alpaca:
-                console.print("\n[bold blue]Alpaca形式のJSONファイルを生成中...[/bold blue]")
-                alpaca_file = dirs["base"] / "dataset_alpaca.json"
-                alpaca_data = convert_all_xml_to_alpaca(dirs["qa"], alpaca_file)
-
-                # データセットカードを生成
+                console.print(f"\n[bold blue]Alpaca形式のファイル（{alpaca_format}）を生成中...[/bold blue]")
+                alpaca_file = get_alpaca_output_file(dirs["base"], alpaca_format)
+                if qa_store:
+                    alpaca_stats = convert_store_to_alpaca(qa_store, alpaca_file, alpaca_format)
+                else:
+                    alpaca_stats = convert_all_xml_to_alpaca(dirs["qa"], alpaca_file, output_format=alpaca_format)
+
+                # データセットカードを生成（統計は変換時に計算済み）
                 readme_file = dirs["base"] / "README.md"
-                create_dataset_card(alpaca_data, readme_file, "Generated QA Dataset")
+                create_dataset_card(alpaca_stats, readme_file, "Generated QA Dataset")
 
                 # Hugging Face Hubにアップロード
                 if upload_hf:
@@ -559,11 +825,11 @@ def generate(
                     else:
                         console.print(f"\n[bold blue]Hugging Face Hubにアップロード中...[/bold blue]")
                         success = upload_to_huggingface(
-                            dataset_data=alpaca_data,
+                            dataset_data=alpaca_file,
                             repo_name=hf_repo_name,
                             hf_token=hf_token if hf_token else None,
                             private=hf_private,
-                            commit_message=f"Upload QA dataset with {len(alpaca_data)} entries",
+                            commit_message=f"Upload QA dataset with {alpaca_stats['total_entries']} entries",
                             readme_file=readme_file
                         )
                         if not success:
@@ -582,6 +848,12 @@ def generate(
         error_details = f"エラータイプ: {type(e).__name__}\nメッセージ: {str(e)}\n\nトレースバック:\n{traceback.format_exc()}"
         print_error_panel(error_details)
         raise typer.Exit(code=1)
+    finally:
+        if qa_store:
+            qa_store.close()
+        close_run_log()
+        print_run_stats()
+        close_response_cache()
 
 
 @app.command()
@@ -610,6 +882,14 @@ def convert_to_alpaca(
         "--hf-private",
         help="Hugging Faceリポジトリをプライベートにします。"
     )] = False,
+    use_qa_store: Annotated[bool, typer.Option(
+        "--qa-store",
+        help="qaディレクトリのXMLの代わりに、出力ディレクトリのqa.sqliteから変換します。"
+    )] = False,
+    alpaca_format: Annotated[str, typer.Option(
+        "--format",
+        help="出力ファイルの形式（json / jsonl / jsonl.gz / jsonl.zst）。jsonl系は1行1エントリで逐次書き出します。"
+    )] = "json",
 ):
     """既存のXMLファイルをAlpaca形式のJSONに変換し、オプションでHugging Face Hubにアップロードします。"""
 
@@ -617,27 +897,46 @@ def convert_to_alpaca(
     conversion_table.add_column("項目", style="bold cyan")
     conversion_table.add_column("値", style="white")
     conversion_table.add_row("📁 入力ディレクトリ", str(qa_dir))
+    if use_qa_store:
+        conversion_table.add_row("🗄️ Q&Aストア", str(qa_dir.parent / QA_STORE_FILENAME))
     conversion_table.add_row("💾 出力ファイル", str(output_file) if output_file else "自動")
+    conversion_table.add_row("📝 形式", alpaca_format)
     if upload_hf:
         conversion_table.add_row("🤗 HFリポジトリ", hf_repo_name or "未指定")
 
     console.print(Panel(conversion_table, title="[bold blue]🔄 Alpaca形式変換[/bold blue]", border_style="blue"))
 
     try:
+        if alpaca_format not in ALPACA_FORMATS:
+            print_error_panel(f"--format には {', '.join(ALPACA_FORMATS)} のいずれかを指定してください。")
+            raise typer.Exit(code=1)
+
         # デフォルトの出力ファイル名を設定
         if output_file is None:
-            output_file = qa_dir.parent / "dataset_alpaca.json"
+            output_file = get_alpaca_output_file(qa_dir.parent, alpaca_format)
 
-        with console.status(f"🔄 XMLファイルをAlpaca形式に変換中..."):
-            alpaca_data = convert_all_xml_to_alpaca(qa_dir, output_file)
+        if use_qa_store:
+            store_path = qa_dir.parent / QA_STORE_FILENAME
+            if not store_path.exists():
+                print_error_panel(f"Q&Aストアが見つかりません: {store_path}")
+                raise typer.Exit(code=1)
+            with console.status(f"🔄 Q&AストアをAlpaca形式に変換中..."):
+                qa_store = QAStore(store_path)
+                try:
+                    alpaca_stats = convert_store_to_alpaca(qa_store, output_file, alpaca_format)
+                finally:
+                    qa_store.close()
+        else:
+            with console.status(f"🔄 XMLファイルをAlpaca形式に変換中..."):
+                alpaca_stats = convert_all_xml_to_alpaca(qa_dir, output_file, output_format=alpaca_format)
 
-        if not alpaca_data:
+        if not alpaca_stats["total_entries"]:
             print_error_panel("変換できるデータが見つかりませんでした。")
             raise typer.Exit(code=1)
 
         with console.status("📋 データセットカードを生成中..."):
             readme_file = output_file.parent / "README.md"
-            create_dataset_card(alpaca_data, readme_file, "Converted QA Dataset")
+            create_dataset_card(alpaca_stats, readme_file, "Converted QA Dataset")
 
         # Hugging Face Hubにアップロード
         if upload_hf:
@@ -647,11 +946,11 @@ def convert_to_alpaca(
 
             with console.status(f"🤗 Hugging Face Hubにアップロード中..."):
                 success = upload_to_huggingface(
-                    dataset_data=alpaca_data,
+                    dataset_data=output_file,
                     repo_name=hf_repo_name,
                     hf_token=hf_token if hf_token else None,
                     private=hf_private,
-                    commit_message=f"Upload converted QA dataset with {len(alpaca_data)} entries",
+                    commit_message=f"Upload converted QA dataset with {alpaca_stats['total_entries']} entries",
                     readme_file=readme_file
                 )
 
@@ -660,7 +959,7 @@ def convert_to_alpaca(
                 raise typer.Exit(code=1)
 
         details = [
-            f"{len(alpaca_data)}個のエントリを変換",
+            f"{alpaca_stats['total_entries']}個のエントリを変換",
             f"出力先: {output_file}",
             f"データセットカード: {readme_file}"
         ]
@@ -679,7 +978,11 @@ def aggregate_logs(
     output_dir: Annotated[Path, typer.Argument(
         exists=True, dir_okay=True, readable=True,
         help="logsフォルダが含まれる出力ディレクトリへのパス。"
-    )]
+    )],
+    use_qa_store: Annotated[bool, typer.Option(
+        "--qa-store",
+        help="集約したQ&Aを出力ディレクトリのqa.sqliteにも記録し、重複チェックをストアの索引で行います。"
+    )] = False,
 ):
     """logsフォルダ内のタイムスタンプ付きXMLファイルを集約してqaフォルダのXMLを生成します."""
 
@@ -696,12 +999,22 @@ def aggregate_logs(
         aggregation_table.add_column("パス", style="white")
         aggregation_table.add_row("📁 logsフォルダ", str(logs_dir))
         aggregation_table.add_row("🎯 出力先", str(qa_dir))
+        if use_qa_store:
+            aggregation_table.add_row("🗄️ Q&Aストア", str(output_dir / QA_STORE_FILENAME))
 
         console.print(Panel(aggregation_table, title="[bold blue]📄 ログ集約[/bold blue]", border_style="blue"))
 
+        if not any(logs_dir.glob("*.xml")) and _find_run_logs(logs_dir):
+            console.print("[yellow]logsフォルダには実行ログのみがあります。先に `easy-dataset logs export` で個別ファイルを書き出してください。[/yellow]")
+
         with console.status("🔄 XMLファイルを集約中..."):
             from easy_dataset_cli.core import aggregate_logs_xml_to_qa
-            aggregate_logs_xml_to_qa(logs_dir, qa_dir)
+            qa_store = QAStore(output_dir / QA_STORE_FILENAME) if use_qa_store else None
+            try:
+                aggregate_logs_xml_to_qa(logs_dir, qa_dir, store=qa_store)
+            finally:
+                if qa_store:
+                    qa_store.close()
 
         print_success_summary("ログ集約が完了しました！", [f"出力先: {qa_dir}"])
 
@@ -712,6 +1025,218 @@ def aggregate_logs(
 
 
 
+logs_app = typer.Typer(help="タスクごとのログ（--log-format jsonl / jsonl.gz の実行ログ）を扱うコマンド群。")
+app.add_typer(logs_app, name="logs")
+
+
+def _find_run_logs(path: Path) -> list:
+    """出力ディレクトリ・logsフォルダ・実行ログファイルのいずれかから実行ログを探す"""
+    if path.is_file():
+        return [path]
+    logs_dir = path / "logs" if (path / "logs").is_dir() else path
+    return [
+        get_run_log_path(logs_dir, log_format)
+        for log_format in LOG_FORMATS
+        if log_format != "files" and get_run_log_path(logs_dir, log_format).exists()
+    ]
+
+
+@logs_app.command("export")
+def logs_export(
+    path: Annotated[Path, typer.Argument(
+        exists=True, readable=True,
+        help="出力ディレクトリ、logsフォルダ、または実行ログファイル（run_log.jsonl / run_log.jsonl.gz）へのパス。"
+    )],
+    export_dir: Annotated[Path, typer.Option(
+        "--export-dir", "-e", file_okay=False, dir_okay=True, writable=True,
+        help="個別のログファイルを書き出すディレクトリ。指定しない場合は実行ログと同じlogsフォルダに書き出します。"
+    )] = None,
+    task_ids: Annotated[List[str], typer.Option(
+        "--task",
+        help="書き出すタスクのID（複数指定可）。指定しない場合はすべてのタスクを書き出します。"
+    )] = None,
+):
+    """実行ログから request_*.json・prompt_*.md・qa_pairs_*.xml などの個別ログファイルを再生成します."""
+
+    try:
+        run_logs = _find_run_logs(path)
+        if not run_logs:
+            print_error_panel(f"実行ログが見つかりません: {path}")
+            raise typer.Exit(code=1)
+
+        details = []
+        for run_log_path in run_logs:
+            target_dir = export_dir or run_log_path.parent
+            with console.status(f"📤 {run_log_path.name} から書き出し中..."):
+                written = export_run_log(run_log_path, target_dir, task_ids or None)
+            details.append(f"{run_log_path.name}: {len(read_run_log_index(run_log_path))}タスク → {written}ファイル（{target_dir}）")
+
+        print_success_summary("実行ログの書き出しが完了しました！", details)
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        print_error_panel(f"エラーが発生しました: {e}")
+        raise typer.Exit(code=1)
+
+
+store_app = typer.Typer(help="Q&Aストア（--qa-store で記録した出力ディレクトリの qa.sqlite）を扱うコマンド群。")
+app.add_typer(store_app, name="store")
+
+
+def _open_qa_store(output_dir: Path) -> QAStore:
+    store_path = output_dir / QA_STORE_FILENAME
+    if not store_path.exists():
+        print_error_panel(f"Q&Aストアが見つかりません: {store_path}")
+        raise typer.Exit(code=1)
+    return QAStore(store_path)
+
+
+@store_app.command("export")
+def store_export(
+    output_dir: Annotated[Path, typer.Argument(
+        exists=True, dir_okay=True, readable=True,
+        help="qa.sqliteが含まれる出力ディレクトリへのパス。"
+    )],
+    qa_dir: Annotated[Path, typer.Option(
+        "--qa-dir", file_okay=False, dir_okay=True, writable=True,
+        help="Genre別ファイルを書き出すディレクトリ。指定しない場合は出力ディレクトリのqaフォルダに書き出します。"
+    )] = None,
+    output_format: Annotated[str, typer.Option(
+        "--format",
+        help="書き出すファイルの形式（xml / jsonl / both）。"
+    )] = "xml",
+):
+    """Q&AストアからGenre別のXML・JSONLファイルを書き出します（既存のファイルは置き換えられます）."""
+
+    if output_format not in OUTPUT_FORMATS:
+        print_error_panel(f"未対応の出力形式です: {output_format}（{', '.join(OUTPUT_FORMATS)}）")
+        raise typer.Exit(code=1)
+
+    qa_store = _open_qa_store(output_dir)
+    try:
+        target_dir = qa_dir or output_dir / "qa"
+        with console.status(f"📤 Q&Aストアから書き出し中... ({qa_store.count()}件)"):
+            saved_files = export_qa_store(qa_store, target_dir, output_format)
+
+        print_success_summary("Q&Aストアの書き出しが完了しました！", [
+            f"{qa_store.count()}個のQ&Aペアを{len(saved_files)}ファイルに書き出し",
+            f"出力先: {target_dir}"
+        ])
+
+    except Exception as e:
+        print_error_panel(f"エラーが発生しました: {e}")
+        raise typer.Exit(code=1)
+    finally:
+        qa_store.close()
+
+
+@store_app.command("stats")
+def store_stats(
+    output_dir: Annotated[Path, typer.Argument(
+        exists=True, dir_okay=True, readable=True,
+        help="qa.sqliteが含まれる出力ディレクトリへのパス。"
+    )],
+):
+    """Q&AストアのGenre・Audience別の件数を表示します."""
+
+    qa_store = _open_qa_store(output_dir)
+    try:
+        stats_table = Table(title=f"🗄️ {qa_store.db_path}")
+        stats_table.add_column("Genre", style="cyan")
+        stats_table.add_column("Audience", style="white")
+        stats_table.add_column("Q&Aペア数", style="green", justify="right")
+        for genre, audience, count in qa_store.stats():
+            stats_table.add_row(genre, audience, str(count))
+        console.print(stats_table)
+        console.print(f"[bold]合計: {qa_store.count()}件[/bold]")
+    finally:
+        qa_store.close()
+
+
+@app.command()
+def mock_server(
+    host: Annotated[str, typer.Option(
+        help="待ち受けるホスト名。"
+    )] = "127.0.0.1",
+    port: Annotated[int, typer.Option(
+        "--port", "-p",
+        help="待ち受けるポート番号。0を指定すると空いているポートを使用します。"
+    )] = 8765,
+    latency_ms: Annotated[float, typer.Option(
+        "--latency-ms", min=0,
+        help="1リクエストあたりの平均遅延（ミリ秒）。lognormalの場合は中央値になります。"
+    )] = 0.0,
+    latency_distribution: Annotated[str, typer.Option(
+        "--latency-distribution",
+        help="遅延の分布（fixed / uniform / exponential / lognormal）。"
+    )] = "fixed",
+    error_rate: Annotated[float, typer.Option(
+        "--error-rate", min=0, max=1,
+        help="500エラーを返す確率。"
+    )] = 0.0,
+    rate_limit_rate: Annotated[float, typer.Option(
+        "--rate-limit-rate", min=0, max=1,
+        help="429（Retry-After付き）を返す確率。"
+    )] = 0.0,
+    retry_after: Annotated[float, typer.Option(
+        "--retry-after", min=0,
+        help="429レスポンスのRetry-Afterヘッダーの秒数。"
+    )] = 1.0,
+    malformed_rate: Annotated[float, typer.Option(
+        "--malformed-rate", min=0, max=1,
+        help="壊れたXML（コードブロック付き・<Pair>のみ・ルート未閉じ・余分なテキスト）を返す確率。"
+    )] = 0.0,
+    pairs: Annotated[int, typer.Option(
+        "--pairs", min=1,
+        help="プロンプトからQ&A数を判定できない場合に返すQ&Aペアの数。"
+    )] = 3,
+    seed: Annotated[int, typer.Option(
+        help="遅延・エラー注入の乱数シード。"
+    )] = None,
+):
+    """オフラインでのベンチマーク用に、OpenAI互換のモックLLMサーバーを起動します。
+
+    OPENAI_BASE_URL をこのサーバーのURLに設定すると、ネットワークなしで generate を実行できます。
+    """
+    from .mock_server import MockLLMServer
+
+    try:
+        server = MockLLMServer(
+            host=host,
+            port=port,
+            latency_ms=latency_ms,
+            latency_distribution=latency_distribution,
+            error_rate=error_rate,
+            rate_limit_rate=rate_limit_rate,
+            retry_after=retry_after,
+            malformed_rate=malformed_rate,
+            pairs_per_response=pairs,
+            seed=seed
+        )
+    except (ValueError, OSError) as e:
+        print_error_panel(f"モックサーバーを起動できませんでした: {e}")
+        raise typer.Exit(code=1)
+
+    server_table = Table(show_header=False, box=None)
+    server_table.add_column("項目", style="bold cyan")
+    server_table.add_column("値", style="white")
+    server_table.add_row("🌐 URL", server.base_url)
+    server_table.add_row("⏱️ 遅延", f"{latency_ms}ms ({latency_distribution})")
+    server_table.add_row("🚦 429 / 500 / 壊れたXML", f"{rate_limit_rate:.0%} / {error_rate:.0%} / {malformed_rate:.0%}")
+    server_table.add_row("🔧 使い方", f"OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock easy-dataset generate ...")
+    console.print(Panel(server_table, title="[bold blue]🧪 モックLLMサーバー[/bold blue]", border_style="blue"))
+    console.print("[dim]Ctrl+Cで停止します[/dim]")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    console.print(f"[dim]リクエスト統計: {server.stats}[/dim]")
+
+
+
 def print_logo():
     """おしゃれなロゴを表示"""
     try:
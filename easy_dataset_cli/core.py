@@ -28,6 +28,7 @@ from .file_utils import (
 )
 from .alpaca_converter import (
     convert_all_xml_to_alpaca,
+    convert_store_to_alpaca,
     upload_to_huggingface,
     create_dataset_card
 )
@@ -64,6 +65,7 @@ __all__ = [
     
     # アルパカ変換・アップロード
     'convert_all_xml_to_alpaca',
+    'convert_store_to_alpaca',
     'upload_to_huggingface',
     'create_dataset_card'
 ]
@@ -9,12 +9,52 @@ from .qa_generator_thinking import (
     generate_qa_for_chunk_with_ga_and_thinking,
     generate_qa_for_chunk_with_surrounding_context
 )
+from .qa_generator_multi_ga import generate_qa_for_chunk_with_multiple_ga
 from .ga_generator import generate_ga_definitions
+from .llm_client import (
+    get_openai_client,
+    configure_client_pool,
+    ensure_pool_capacity,
+    configure_streaming,
+    get_default_base_url,
+    complete_chat
+)
+from .rate_limiter import (
+    configure_rate_limit,
+    get_rate_limit_stats
+)
+from .retry import (
+    RetryPolicy,
+    configure_retry_policy,
+    get_retry_stats
+)
+from .response_cache import (
+    ResponseCache,
+    configure_response_cache,
+    get_response_cache,
+    close_response_cache
+)
 
 __all__ = [
     'generate_qa_for_chunk_with_ga',
     'generate_qa_for_chunk_with_ga_and_fulltext',
     'generate_qa_for_chunk_with_ga_and_thinking',
     'generate_qa_for_chunk_with_surrounding_context',
-    'generate_ga_definitions'
+    'generate_qa_for_chunk_with_multiple_ga',
+    'generate_ga_definitions',
+    'get_openai_client',
+    'configure_client_pool',
+    'ensure_pool_capacity',
+    'configure_streaming',
+    'get_default_base_url',
+    'complete_chat',
+    'configure_rate_limit',
+    'get_rate_limit_stats',
+    'RetryPolicy',
+    'configure_retry_policy',
+    'get_retry_stats',
+    'ResponseCache',
+    'configure_response_cache',
+    'get_response_cache',
+    'close_response_cache'
 ]
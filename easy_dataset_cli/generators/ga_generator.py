@@ -5,12 +5,13 @@ GA定義生成機能
 
 import os
 from pathlib import Path
-from openai import OpenAI
 from rich.console import Console
 from dotenv import load_dotenv
 import traceback
 import json
 
+from .llm_client import complete_chat
+
 # .envファイルを読み込む
 load_dotenv()
 
@@ -41,18 +42,8 @@ def generate_ga_definitions(text_content: str, model: str, num_ga_pairs: int = N
         console.print("[bold red]OPENAI_API_KEYが設定されていません！[/bold red]")
         raise ValueError("OPENAI_API_KEYが必要です")
 
-    # OpenAIクライアントの初期化
-    client = OpenAI(
-        base_url=os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=api_key,
-    )
-
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages
-        )
-        xml_content = response.choices[0].message.content
+        xml_content = complete_chat(model=model, messages=messages, api_key=api_key)
         console.print(f"[dim]LLMレスポンス長: {len(xml_content)} 文字[/dim]")
         return xml_content
     except Exception as error:
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+OpenAIクライアントの共有プールとチャット補完の共通入口
+
+base_urlとAPIキーの組ごとにクライアントを1つだけ生成し、プロセス全体で使い回す。
+同じhttpxコネクションプールを共有するため、リクエストごとのTLSハンドシェイクが発生しない。
+各ジェネレーターはcomplete_chat()を通してLLMを呼び出す。
+"""
+
+import atexit
+import importlib.util
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+from rich.console import Console
+from dotenv import load_dotenv
+
+from .response_cache import ResponseCache, get_response_cache
+from .rate_limiter import (
+    DEFAULT_EXPECTED_COMPLETION_TOKENS,
+    estimate_prompt_tokens,
+    get_rate_limiter
+)
+from .retry import call_with_retry
+
+# .envファイルを読み込む
+load_dotenv()
+
+console = Console()
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# コネクションプールの既定値（環境変数で上書き可能）
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_pool_settings: Dict[str, object] = {}
+_default_credentials: Optional[Tuple[str, str]] = None
+_streaming_enabled = False
+_lock = threading.Lock()
+
+
+def _env_bool(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _load_pool_settings() -> Dict[str, object]:
+    """環境変数からコネクションプールの設定を読み込む"""
+    return {
+        "max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        "max_keepalive_connections": int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)),
+        "keepalive_expiry": float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)),
+        "http2": _env_bool("OPENAI_HTTP2"),
+    }
+
+
+def configure_client_pool(
+    max_connections: int = None,
+    max_keepalive_connections: int = None,
+    keepalive_expiry: float = None,
+    http2: bool = None
+) -> None:
+    """コネクションプールの上限を設定する
+
+    指定しなかった項目は環境変数（OPENAI_MAX_CONNECTIONS など）または既定値を使う。
+    設定は以降に生成されるクライアントに適用されるため、既存のクライアントは破棄する。
+    """
+    overrides = {
+        "max_connections": max_connections,
+        "max_keepalive_connections": max_keepalive_connections,
+        "keepalive_expiry": keepalive_expiry,
+        "http2": http2,
+    }
+    with _lock:
+        if not _pool_settings:
+            _pool_settings.update(_load_pool_settings())
+        _pool_settings.update({key: value for key, value in overrides.items() if value is not None})
+        _close_clients_locked()
+
+
+def ensure_pool_capacity(concurrency: int) -> None:
+    """並列数に対してキープアライブ接続数が不足しないようにプールを拡張する"""
+    settings = get_pool_settings()
+    if settings["max_keepalive_connections"] >= concurrency and settings["max_connections"] >= concurrency:
+        return
+    configure_client_pool(
+        max_connections=max(settings["max_connections"], concurrency),
+        max_keepalive_connections=max(settings["max_keepalive_connections"], concurrency)
+    )
+
+
+def get_pool_settings() -> Dict[str, object]:
+    """現在のコネクションプール設定を返す"""
+    with _lock:
+        if not _pool_settings:
+            _pool_settings.update(_load_pool_settings())
+        return dict(_pool_settings)
+
+
+def _resolve_credentials(base_url: str = None, api_key: str = None) -> Tuple[str, str]:
+    """base_urlとAPIキーを決定する（環境変数の参照はプロセスで一度だけ）"""
+    global _default_credentials
+    if _default_credentials is None:
+        _default_credentials = (
+            os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL),
+            os.getenv("OPENAI_API_KEY"),
+        )
+    default_base_url, default_api_key = _default_credentials
+    return base_url or default_base_url, api_key or default_api_key
+
+
+def get_default_base_url() -> str:
+    """base_urlを省略したリクエストの送信先（OPENAI_BASE_URLまたは既定の接続先）を返す"""
+    return _resolve_credentials()[0]
+
+
+def configure_default_endpoint(base_url: str = None, api_key: str = None) -> None:
+    """環境変数（OPENAI_BASE_URL / OPENAI_API_KEY）の代わりに既定の接続先を設定する"""
+    global _default_credentials
+    _default_credentials = (base_url or DEFAULT_BASE_URL, api_key)
+
+
+def _create_http_client(settings: Dict[str, object]) -> httpx.Client:
+    http2 = bool(settings["http2"])
+    if http2 and importlib.util.find_spec("h2") is None:
+        console.print("[yellow]HTTP/2を使用するには h2 パッケージが必要です（pip install 'httpx[http2]'）。HTTP/1.1で接続します。[/yellow]")
+        http2 = False
+
+    return DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        http2=http2,
+    )
+
+
+def get_openai_client(base_url: str = None, api_key: str = None) -> OpenAI:
+    """base_urlとAPIキーに対応する共有OpenAIクライアントを取得する"""
+    key = _resolve_credentials(base_url, api_key)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if not _pool_settings:
+                _pool_settings.update(_load_pool_settings())
+            client = OpenAI(
+                base_url=key[0],
+                api_key=key[1],
+                http_client=_create_http_client(_pool_settings),
+                # 再試行は retry.call_with_retry で一元管理する
+                max_retries=0,
+            )
+            _clients[key] = client
+    return client
+
+
+def configure_streaming(enabled: bool) -> None:
+    """チャット補完をストリーミングで受信するかどうかを設定する"""
+    global _streaming_enabled
+    _streaming_enabled = enabled
+
+
+def is_streaming_enabled() -> bool:
+    return _streaming_enabled
+
+
+def _consume_stream(stream, stream_monitor=None) -> Tuple[str, Optional[int]]:
+    """ストリームから本文を組み立てる。stream_monitorが打ち切りを指示した時点で接続を閉じる"""
+    parts = []
+    total_tokens = None
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                total_tokens = getattr(usage, "total_tokens", None)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if stream_monitor is not None and stream_monitor.feed(delta):
+                break
+    finally:
+        # 残りの出力を受信せずに接続を閉じる（以降の出力トークンを生成させない）
+        stream.close()
+    return "".join(parts), total_tokens
+
+
+def complete_chat(
+    model: str,
+    messages: List[Dict[str, str]],
+    base_url: str = None,
+    api_key: str = None,
+    stream_monitor=None,
+    **params
+) -> str:
+    """チャット補完を実行し、レスポンス本文を返す
+
+    レスポンスキャッシュが有効な場合は、同じ (モデル, メッセージ, パラメータ) の
+    レスポンスをキャッシュから返し、ネットワーク呼び出しを行わない。
+    base_url・モデルにレート制限が設定されている場合は、送信前にリミッターから枠を取得する。
+    タイムアウトや429・5xxなどの一時的なエラーはリトライポリシーに従って再試行する。
+    ストリーミングが有効な場合は差分ごとにstream_monitor.feed()を呼び、打ち切りが指示されたら受信を止める。
+    """
+    cache = get_response_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = ResponseCache.make_key(model, messages, params)
+        cached_content = cache.get(cache_key)
+        if cached_content is not None:
+            return cached_content
+
+    base_url, api_key = _resolve_credentials(base_url, api_key)
+    client = get_openai_client(base_url, api_key)
+
+    limiter = get_rate_limiter(base_url, model)
+    estimated_tokens = 0
+    if limiter is not None:
+        estimated_tokens = estimate_prompt_tokens(messages) + params.get("max_tokens", DEFAULT_EXPECTED_COMPLETION_TOKENS)
+
+    streaming = _streaming_enabled
+
+    def request() -> Tuple[str, Optional[int]]:
+        if streaming:
+            if stream_monitor is not None:
+                stream_monitor.reset()
+            # 最後のチャンクでusageを受け取り、TPMの予約量を実際のトークン数で補正する
+            stream_params = {"stream_options": {"include_usage": True}, **params}
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **stream_params
+            )
+            return _consume_stream(stream, stream_monitor)
+
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **params
+        )
+        usage = getattr(response, "usage", None)
+        return response.choices[0].message.content, getattr(usage, "total_tokens", None)
+
+    def send() -> Tuple[str, Optional[int]]:
+        # RPM/TPM制限がある場合は推定トークン数を予約してから送信する（再試行ごとに予約し直す）
+        if limiter is not None:
+            limiter.acquire(estimated_tokens)
+        try:
+            return request()
+        except BaseException:
+            # 失敗した試行はプロバイダのTPMを消費していないため、予約したトークンを返却する
+            if limiter is not None:
+                limiter.refund(estimated_tokens)
+            raise
+
+    content, total_tokens = call_with_retry(send, on_retry=_report_retry)
+
+    if streaming and stream_monitor is not None:
+        content = stream_monitor.finish(content)
+
+    if limiter is not None:
+        limiter.record_usage(estimated_tokens, total_tokens)
+
+    if cache is not None and content:
+        cache.put(cache_key, model, content)
+
+    return content
+
+
+def _report_retry(error: BaseException, retry_number: int, delay: float) -> None:
+    console.print(f"[yellow]LLM呼び出しに失敗しました（{type(error).__name__}）。{delay:.1f}秒後に再試行します（{retry_number}回目）[/yellow]")
+
+
+def _close_clients_locked() -> None:
+    for client in _clients.values():
+        try:
+            client.close()
+        except Exception:
+            pass
+    _clients.clear()
+
+
+def close_all_clients() -> None:
+    """プール内のすべてのクライアントを閉じる"""
+    with _lock:
+        _close_clients_locked()
+
+
+atexit.register(close_all_clients)
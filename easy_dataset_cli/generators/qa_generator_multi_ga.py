@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+複数GAペア一括Q&A生成機能
+
+1つのチャンクと複数のGAペアを1回のリクエストで送信し、
+<GAGroup id="N"> ごとに返されたQ&AペアをGAペア単位に振り分ける。
+"""
+
+import re
+from pathlib import Path
+from typing import List, Dict
+from rich.console import Console
+from dotenv import load_dotenv
+import traceback
+from datetime import datetime
+
+from ..prompts import get_qa_generation_multi_ga_prompt
+from .llm_client import complete_chat
+from .stream_parser import PairStreamMonitor
+from ..run_log import write_log_json, write_log_text
+from .qa_generator import _parse_qa_response, _clean_llm_response, _save_qa_pairs_to_xml
+
+# .envファイルを読み込む
+load_dotenv()
+
+console = Console()
+
+GA_GROUP_PATTERN = re.compile(r'<GAGroup\s+id\s*=\s*["\']?(\d+)["\']?\s*>(.*?)</GAGroup>', re.DOTALL)
+
+
+def _safe_name(title: str) -> str:
+    return "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+
+
+def format_ga_groups(ga_pairs: List[Dict[str, Dict[str, str]]]) -> str:
+    """GAペアのリストをプロンプト用のGAグループ定義に整形する（番号は1始まり）"""
+    sections = []
+    for group_id, ga_pair in enumerate(ga_pairs, start=1):
+        sections.append(
+            f"### GAグループ {group_id}\n"
+            f"- 目標とする体裁: {ga_pair['genre']['title']}\n"
+            f"  {ga_pair['genre']['description']}\n"
+            f"- 目標とする読者: {ga_pair['audience']['title']}\n"
+            f"  {ga_pair['audience']['description']}"
+        )
+    return "\n\n".join(sections)
+
+
+def parse_multi_ga_response(xml_content: str, group_count: int) -> List[List[Dict[str, str]]]:
+    """<GAGroup>ごとのQ&Aペアを解析し、GAペアの順に並べたリストを返す
+
+    レスポンスに含まれなかったグループは空のリストになる。
+    """
+    grouped = [[] for _ in range(group_count)]
+    cleaned_content = _clean_llm_response(xml_content)
+
+    for group_id, group_body in GA_GROUP_PATTERN.findall(cleaned_content):
+        position = int(group_id) - 1
+        if not 0 <= position < group_count:
+            console.print(f"[yellow]未知のGAグループ番号を無視します: {group_id}[/yellow]")
+            continue
+        grouped[position].extend(_parse_qa_response(f"<QAPairs>{group_body}</QAPairs>"))
+
+    return grouped
+
+
+def generate_qa_for_chunk_with_multiple_ga(
+    chunk: str,
+    model: str,
+    ga_pairs: List[Dict[str, Dict[str, str]]],
+    logs_dir: Path = None,
+    num_qa_pairs: int = None,
+    task_id: str = None
+) -> List[List[Dict[str, str]]]:
+    """1つのチャンクと複数のGAペアから、GAペアごとのQ&Aペアのリストを1回のリクエストで生成する"""
+    prompt_template = get_qa_generation_multi_ga_prompt()
+    prompt = prompt_template.format(
+        context=chunk,
+        ga_groups=format_ga_groups(ga_pairs),
+        num_qa_pairs=num_qa_pairs if num_qa_pairs is not None else "複数の"
+    )
+
+    messages = [
+        {"role": "system", "content": "あなたは、XML形式で厳密に出力する優秀なアシスタントです。通常のXMLの特殊文字（&, \", '）は適切にエスケープしてください。ただし、<GAGroup>、<Question>、<Answer>、<think>タグはそのまま使用してください。改行は含めずに出力してください。"},
+        {"role": "user", "content": prompt}
+    ]
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # ログ成果物の名前にはタスクIDを使い、並列実行時や同じ秒の実行でも上書きされないようにする
+    log_id = task_id or timestamp
+
+    try:
+        # リクエストログを保存
+        if logs_dir:
+            request_log = {
+                "timestamp": timestamp,
+                "task_id": log_id,
+                "model": model,
+                "ga_pairs": [
+                    {"genre": ga_pair['genre']['title'], "audience": ga_pair['audience']['title']}
+                    for ga_pair in ga_pairs
+                ],
+                "prompt_length": len(prompt),
+                "messages": messages
+            }
+            request_filename = f"request_multi_ga_{log_id}.json"
+            write_log_json(logs_dir, request_filename, request_log)
+            console.print(f"[dim]リクエストログを保存: {request_filename}[/dim]")
+
+        request_start = datetime.now()
+
+        # GAグループごとにnum_qa_pairs個、全グループ分のペアが揃えば受信を打ち切れる
+        max_pairs = num_qa_pairs * len(ga_pairs) if num_qa_pairs else None
+        xml_content = complete_chat(
+            model=model,
+            messages=messages,
+            stream_monitor=PairStreamMonitor(max_pairs=max_pairs)
+        )
+
+        processing_time = (datetime.now() - request_start).total_seconds()
+
+        # rawレスポンスを保存
+        if logs_dir:
+            raw_filename = f"qa_raw_multi_ga_{log_id}.md"
+            write_log_text(logs_dir, raw_filename, xml_content)
+            console.print(f"[dim]レスポンスを保存: {raw_filename} (処理時間: {processing_time:.2f}s)[/dim]")
+
+        grouped_qa_pairs = parse_multi_ga_response(xml_content, len(ga_pairs))
+
+        if not any(grouped_qa_pairs):
+            console.print("[bold red]LLMの出力から<GAGroup>ごとのQ&Aペアを取得できませんでした[/bold red]")
+
+        # GAペアごとにQAを保存（従来のログと同じファイル名形式）
+        if logs_dir:
+            for ga_pair, qa_pairs in zip(ga_pairs, grouped_qa_pairs):
+                if qa_pairs:
+                    genre_safe = _safe_name(ga_pair['genre']['title'])
+                    audience_safe = _safe_name(ga_pair['audience']['title'])
+                    _save_qa_pairs_to_xml(qa_pairs, logs_dir, f"qa_pairs_{genre_safe}_{audience_safe}_{log_id}.xml")
+
+        return grouped_qa_pairs
+
+    except Exception as general_error:
+        console.print(f"[bold red]チャンクと複数GAペアからのQ&A生成中にエラーが発生しました:[/bold red]")
+        console.print(f"[bold red]エラータイプ:[/bold red] {type(general_error).__name__}")
+        console.print(f"[bold red]エラーメッセージ:[/bold red] {str(general_error)}")
+        console.print(f"[bold red]トレースバック:[/bold red]")
+        console.print(traceback.format_exc())
+
+        # エラーログを保存
+        if logs_dir:
+            error_log = {
+                "timestamp": timestamp,
+                "task_id": log_id,
+                "model": model,
+                "ga_pairs": [
+                    {"genre": ga_pair['genre']['title'], "audience": ga_pair['audience']['title']}
+                    for ga_pair in ga_pairs
+                ],
+                "error_type": type(general_error).__name__,
+                "error_message": str(general_error),
+                "traceback": traceback.format_exc()
+            }
+            error_filename = f"error_multi_ga_{log_id}.json"
+            write_log_json(logs_dir, error_filename, error_log)
+            console.print(f"[dim]エラーログを保存: {error_filename}[/dim]")
+
+        return [[] for _ in ga_pairs]
@@ -3,16 +3,12 @@
 思考フロー対応Q&A生成機能
 """
 
-import os
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from pathlib import Path
 from typing import List, Dict
-from openai import OpenAI
 from rich.console import Console
 from dotenv import load_dotenv
 import traceback
-import json
 from datetime import datetime
 
 from ..prompts import (
@@ -20,6 +16,10 @@ from ..prompts import (
     get_qa_generation_with_surrounding_prompt
 )
 from ..xml_utils import parse_qa_from_text_fallback
+from .llm_client import complete_chat
+from .stream_parser import PairStreamMonitor
+from ..run_log import write_log_json, write_log_text
+from ..xml_writer import to_pretty_xml
 
 # .envファイルを読み込む
 load_dotenv()
@@ -33,7 +33,8 @@ def generate_qa_for_chunk_with_ga_and_thinking(
     model: str,
     ga_pair: Dict[str, Dict[str, str]],
     logs_dir: Path = None,
-    num_qa_pairs: int = None
+    num_qa_pairs: int = None,
+    task_id: str = None
 ) -> List[Dict[str, str]]:
     """OpenAIクライアントを使い、1つのチャンクと全文、1つのGAペアから思考フロー付きQ&Aペアのリストを生成する"""
     prompt_template = get_qa_generation_with_thinking_prompt()
@@ -52,14 +53,10 @@ def generate_qa_for_chunk_with_ga_and_thinking(
         {"role": "user", "content": prompt}
     ]
 
-    # OpenAIクライアントの初期化
-    client = OpenAI(
-        base_url=os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
-
     # タイムスタンプ付きログファイル名を生成
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # ログ成果物の名前にはタスクIDを使い、並列実行時や同じ秒の実行でも上書きされないようにする
+    log_id = task_id or timestamp
     genre_safe = "".join(c for c in ga_pair['genre']['title'] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
     audience_safe = "".join(c for c in ga_pair['audience']['title'] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
 
@@ -68,21 +65,19 @@ def generate_qa_for_chunk_with_ga_and_thinking(
         if logs_dir:
             request_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
                 "prompt_length": len(prompt),
                 "messages": messages
             }
-            request_filename = f"request_thinking_{genre_safe}_{audience_safe}_{timestamp}.json"
-            request_file_path = logs_dir / request_filename
-            with open(request_file_path, 'w', encoding='utf-8') as f:
-                json.dump(request_log, f, ensure_ascii=False, indent=2)
+            request_filename = f"request_thinking_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, request_filename, request_log)
             console.print(f"[dim]リクエストログを保存: {request_filename}[/dim]")
 
             # プロンプトをマークダウンファイルとして保存
-            prompt_filename = f"prompt_thinking_{genre_safe}_{audience_safe}_{timestamp}.md"
-            prompt_file_path = logs_dir / prompt_filename
+            prompt_filename = f"prompt_thinking_{genre_safe}_{audience_safe}_{log_id}.md"
             prompt_content = f"""# QA生成プロンプト (思考フロー付き)
 
 **タイムスタンプ:** {timestamp}  
@@ -103,42 +98,40 @@ def generate_qa_for_chunk_with_ga_and_thinking(
 
 {prompt}
 """
-            prompt_file_path.write_text(prompt_content, encoding='utf-8')
+            write_log_text(logs_dir, prompt_filename, prompt_content)
             console.print(f"[dim]プロンプトファイルを保存: {prompt_filename}[/dim]")
 
-        response = client.chat.completions.create(
+        xml_content = complete_chat(
             model=model,
-            messages=messages
+            messages=messages,
+            stream_monitor=PairStreamMonitor(max_pairs=num_qa_pairs)
         )
-        xml_content = response.choices[0].message.content
 
         # レスポンスログを保存
         if logs_dir:
             response_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
                 "response_length": len(xml_content),
                 "response_content": xml_content
             }
-            response_filename = f"response_thinking_{genre_safe}_{audience_safe}_{timestamp}.json"
-            response_file_path = logs_dir / response_filename
-            with open(response_file_path, 'w', encoding='utf-8') as f:
-                json.dump(response_log, f, ensure_ascii=False, indent=2)
+            response_filename = f"response_thinking_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, response_filename, response_log)
             console.print(f"[dim]レスポンスログを保存: {response_filename}[/dim]")
 
         # rawレスポンスを保存（オプション）
         if logs_dir:
-            raw_filename = f"qa_thinking_raw_{genre_safe}_{audience_safe}_{timestamp}.md"
-            raw_file_path = logs_dir / raw_filename
-            raw_file_path.write_text(xml_content, encoding="utf-8")
+            raw_filename = f"qa_thinking_raw_{genre_safe}_{audience_safe}_{log_id}.md"
+            write_log_text(logs_dir, raw_filename, xml_content)
 
-        qa_pairs = _parse_qa_response(xml_content, logs_dir, genre_safe, audience_safe, timestamp)
+        qa_pairs = _parse_qa_response(xml_content, logs_dir, genre_safe, audience_safe, log_id)
 
         # 生成したQAを保存
         if qa_pairs and logs_dir:
-            qa_filename = f"qa_pairs_thinking_{genre_safe}_{audience_safe}_{timestamp}.xml"
+            qa_filename = f"qa_pairs_thinking_{genre_safe}_{audience_safe}_{log_id}.xml"
             _save_qa_pairs_to_xml(qa_pairs, logs_dir, qa_filename)
 
         return qa_pairs
@@ -156,6 +149,7 @@ def generate_qa_for_chunk_with_ga_and_thinking(
         if logs_dir:
             error_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
@@ -163,10 +157,8 @@ def generate_qa_for_chunk_with_ga_and_thinking(
                 "error_message": str(general_error),
                 "traceback": traceback.format_exc()
             }
-            error_filename = f"error_thinking_{genre_safe}_{audience_safe}_{timestamp}.json"
-            error_file_path = logs_dir / error_filename
-            with open(error_file_path, 'w', encoding='utf-8') as f:
-                json.dump(error_log, f, ensure_ascii=False, indent=2)
+            error_filename = f"error_thinking_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, error_filename, error_log)
             console.print(f"[dim]エラーログを保存: {error_filename}[/dim]")
 
         return []
@@ -177,7 +169,8 @@ def generate_qa_for_chunk_with_surrounding_context(
     model: str,
     ga_pair: Dict[str, Dict[str, str]],
     logs_dir: Path = None,
-    num_qa_pairs: int = None
+    num_qa_pairs: int = None,
+    task_id: str = None
 ) -> List[Dict[str, str]]:
     """OpenAIクライアントを使い、周辺コンテキストを含むチャンクからQ&Aペアのリストを生成する"""
     prompt_template = get_qa_generation_with_surrounding_prompt()
@@ -195,14 +188,10 @@ def generate_qa_for_chunk_with_surrounding_context(
         {"role": "user", "content": prompt}
     ]
 
-    # OpenAIクライアントの初期化
-    client = OpenAI(
-        base_url=os.getenv("OPENAI_BASE_URL", "https://openrouter.ai/api/v1"),
-        api_key=os.getenv("OPENAI_API_KEY"),
-    )
-
     # タイムスタンプ付きログファイル名を生成
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # ログ成果物の名前にはタスクIDを使い、並列実行時や同じ秒の実行でも上書きされないようにする
+    log_id = task_id or timestamp
     genre_safe = "".join(c for c in ga_pair['genre']['title'] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
     audience_safe = "".join(c for c in ga_pair['audience']['title'] if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
 
@@ -211,21 +200,19 @@ def generate_qa_for_chunk_with_surrounding_context(
         if logs_dir:
             request_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
                 "prompt_length": len(prompt),
                 "messages": messages
             }
-            request_filename = f"request_surrounding_{genre_safe}_{audience_safe}_{timestamp}.json"
-            request_file_path = logs_dir / request_filename
-            with open(request_file_path, 'w', encoding='utf-8') as f:
-                json.dump(request_log, f, ensure_ascii=False, indent=2)
+            request_filename = f"request_surrounding_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, request_filename, request_log)
             console.print(f"[dim]リクエストログを保存: {request_filename}[/dim]")
 
             # プロンプトをマークダウンファイルとして保存
-            prompt_filename = f"prompt_surrounding_{genre_safe}_{audience_safe}_{timestamp}.md"
-            prompt_file_path = logs_dir / prompt_filename
+            prompt_filename = f"prompt_surrounding_{genre_safe}_{audience_safe}_{log_id}.md"
             prompt_content = f"""# QA生成プロンプト (周辺コンテキスト)
 
 **タイムスタンプ:** {timestamp}  
@@ -246,42 +233,40 @@ def generate_qa_for_chunk_with_surrounding_context(
 
 {prompt}
 """
-            prompt_file_path.write_text(prompt_content, encoding='utf-8')
+            write_log_text(logs_dir, prompt_filename, prompt_content)
             console.print(f"[dim]プロンプトファイルを保存: {prompt_filename}[/dim]")
 
-        response = client.chat.completions.create(
+        xml_content = complete_chat(
             model=model,
-            messages=messages
+            messages=messages,
+            stream_monitor=PairStreamMonitor(max_pairs=num_qa_pairs)
         )
-        xml_content = response.choices[0].message.content
 
         # レスポンスログを保存
         if logs_dir:
             response_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
                 "response_length": len(xml_content),
                 "response_content": xml_content
             }
-            response_filename = f"response_surrounding_{genre_safe}_{audience_safe}_{timestamp}.json"
-            response_file_path = logs_dir / response_filename
-            with open(response_file_path, 'w', encoding='utf-8') as f:
-                json.dump(response_log, f, ensure_ascii=False, indent=2)
+            response_filename = f"response_surrounding_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, response_filename, response_log)
             console.print(f"[dim]レスポンスログを保存: {response_filename}[/dim]")
 
         # rawレスポンスを保存（オプション）
         if logs_dir:
-            raw_filename = f"qa_surrounding_raw_{genre_safe}_{audience_safe}_{timestamp}.md"
-            raw_file_path = logs_dir / raw_filename
-            raw_file_path.write_text(xml_content, encoding="utf-8")
+            raw_filename = f"qa_surrounding_raw_{genre_safe}_{audience_safe}_{log_id}.md"
+            write_log_text(logs_dir, raw_filename, xml_content)
 
-        qa_pairs = _parse_qa_response(xml_content, logs_dir, genre_safe, audience_safe, timestamp)
+        qa_pairs = _parse_qa_response(xml_content, logs_dir, genre_safe, audience_safe, log_id)
 
         # 生成したQAを保存
         if qa_pairs and logs_dir:
-            qa_filename = f"qa_pairs_surrounding_{genre_safe}_{audience_safe}_{timestamp}.xml"
+            qa_filename = f"qa_pairs_surrounding_{genre_safe}_{audience_safe}_{log_id}.xml"
             _save_qa_pairs_to_xml(qa_pairs, logs_dir, qa_filename)
 
         return qa_pairs
@@ -299,6 +284,7 @@ def generate_qa_for_chunk_with_surrounding_context(
         if logs_dir:
             error_log = {
                 "timestamp": timestamp,
+                "task_id": log_id,
                 "model": model,
                 "genre": ga_pair['genre']['title'],
                 "audience": ga_pair['audience']['title'],
@@ -306,16 +292,14 @@ def generate_qa_for_chunk_with_surrounding_context(
                 "error_message": str(general_error),
                 "traceback": traceback.format_exc()
             }
-            error_filename = f"error_surrounding_{genre_safe}_{audience_safe}_{timestamp}.json"
-            error_file_path = logs_dir / error_filename
-            with open(error_file_path, 'w', encoding='utf-8') as f:
-                json.dump(error_log, f, ensure_ascii=False, indent=2)
+            error_filename = f"error_surrounding_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, error_filename, error_log)
             console.print(f"[dim]エラーログを保存: {error_filename}[/dim]")
 
         return []
 
 
-def _parse_qa_response(xml_content: str, logs_dir: Path = None, genre_safe: str = None, audience_safe: str = None, timestamp: str = None) -> List[Dict[str, str]]:
+def _parse_qa_response(xml_content: str, logs_dir: Path = None, genre_safe: str = None, audience_safe: str = None, log_id: str = None) -> List[Dict[str, str]]:
     """Q&A生成レスポンスのXMLを解析する（共通処理）"""
     qa_pairs = []
 
@@ -358,18 +342,16 @@ def _parse_qa_response(xml_content: str, logs_dir: Path = None, genre_safe: str
         clean_xml = cleaned_content[xml_start: xml_end + len("</QAPairs>")]
 
         # XML解析用のログを保存
-        if logs_dir and genre_safe and audience_safe and timestamp:
+        if logs_dir and genre_safe and audience_safe and log_id:
             xml_debug_log = {
-                "timestamp": timestamp,
+                "task_id": log_id,
                 "original_xml_content": xml_content[:500],
                 "cleaned_xml_content": cleaned_content[:500],
                 "final_xml_content": clean_xml,
                 "xml_length": len(clean_xml)
             }
-            xml_debug_filename = f"xml_debug_{genre_safe}_{audience_safe}_{timestamp}.json"
-            xml_debug_file_path = logs_dir / xml_debug_filename
-            with open(xml_debug_file_path, 'w', encoding='utf-8') as f:
-                json.dump(xml_debug_log, f, ensure_ascii=False, indent=2)
+            xml_debug_filename = f"xml_debug_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, xml_debug_filename, xml_debug_log, level="debug")
 
         try:
             root = ET.fromstring(clean_xml)
@@ -421,17 +403,15 @@ def _parse_qa_response(xml_content: str, logs_dir: Path = None, genre_safe: str
             console.print(f"[dim]パースエラー詳細: {str(parse_error)}[/dim]")
 
             # エラーログを保存
-            if logs_dir and genre_safe and audience_safe and timestamp:
+            if logs_dir and genre_safe and audience_safe and log_id:
                 parse_error_log = {
-                    "timestamp": timestamp,
+                    "task_id": log_id,
                     "error_type": "XML_ParseError",
                     "error_message": str(parse_error),
                     "xml_content": clean_xml
                 }
-                parse_error_filename = f"xml_parse_error_{genre_safe}_{audience_safe}_{timestamp}.json"
-                parse_error_file_path = logs_dir / parse_error_filename
-                with open(parse_error_file_path, 'w', encoding='utf-8') as f:
-                    json.dump(parse_error_log, f, ensure_ascii=False, indent=2)
+                parse_error_filename = f"xml_parse_error_{genre_safe}_{audience_safe}_{log_id}.json"
+                write_log_json(logs_dir, parse_error_filename, parse_error_log, level="debug")
 
             # 自動解析を試行
             qa_pairs = parse_qa_from_text_fallback(clean_xml)
@@ -446,17 +426,15 @@ def _parse_qa_response(xml_content: str, logs_dir: Path = None, genre_safe: str
         console.print(f"[dim]受信したテキスト: {cleaned_content[:500]}...[/dim]")
 
         # 解析失敗のログを保存
-        if logs_dir and genre_safe and audience_safe and timestamp:
+        if logs_dir and genre_safe and audience_safe and log_id:
             failure_log = {
-                "timestamp": timestamp,
+                "task_id": log_id,
                 "failure_reason": "XML解析失敗",
                 "original_content": xml_content[:1000],
                 "cleaned_content": cleaned_content[:1000]
             }
-            failure_filename = f"xml_parse_failure_{genre_safe}_{audience_safe}_{timestamp}.json"
-            failure_file_path = logs_dir / failure_filename
-            with open(failure_file_path, 'w', encoding='utf-8') as f:
-                json.dump(failure_log, f, ensure_ascii=False, indent=2)
+            failure_filename = f"xml_parse_failure_{genre_safe}_{audience_safe}_{log_id}.json"
+            write_log_json(logs_dir, failure_filename, failure_log, level="debug")
 
     return qa_pairs
 
@@ -525,8 +503,14 @@ def _save_qa_pairs_to_xml(qa_pairs: List[Dict[str, str]], logs_dir: Path, qa_fil
     if not qa_pairs or not logs_dir:
         return
 
-    qa_file_path = logs_dir / qa_filename
+    # XMLの組み立てと整形はバックグラウンドライターで行う
+    qa_pairs = list(qa_pairs)
+    write_log_text(logs_dir, qa_filename, lambda: _render_qa_pairs_xml(qa_pairs))
+    console.print(f"[green]✓[/green] QAペアを保存: {qa_filename} ({len(qa_pairs)}件)")
+
 
+def _render_qa_pairs_xml(qa_pairs: List[Dict[str, str]]) -> str:
+    """Q&Aペアをサブエレメント方式の整形済みXML文字列にする"""
     # ElementTreeで構造化生成
     root = ET.Element("QAPairs")
     for qa in qa_pairs:
@@ -548,13 +532,8 @@ def _save_qa_pairs_to_xml(qa_pairs: List[Dict[str, str]], logs_dir: Path, qa_fil
             # 通常の回答
             answer_elem.text = parsed_answer["answer_content"]
 
-    # 整形して保存
-    rough_string = ET.tostring(root, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    pretty_xml = reparsed.toprettyxml(indent="  ")
-
-    qa_file_path.write_text(pretty_xml, encoding='utf-8')
-    console.print(f"[green]✓[/green] QAペアを保存: {qa_filename} ({len(qa_pairs)}件)")
+    # 整形（minidomで再パースせずに書き出す）
+    return to_pretty_xml(root)
 
 
 def _parse_answer_with_think(answer_text: str) -> Dict[str, str]:
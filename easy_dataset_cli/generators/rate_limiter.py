@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+プロバイダのRPM/TPM制限に合わせたトークンバケット方式のレートリミッター
+
+リクエスト前にプロンプト長から推定したトークン数を予約し、
+レスポンスの usage を受け取った後に実際のトークン数との差分を補正する。
+送信に失敗した試行（429・5xx・タイムアウトなど）の予約トークンは返却する（RPMの枠は消費したまま）。
+制限は base_url とモデルの組ごとに設定でき、同じ組のリクエストは一つのリミッターを共有する。
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..token_counter import estimate_tokens
+
+# 出力トークン数の見込み（usageで補正されるまでの仮予約分）
+DEFAULT_EXPECTED_COMPLETION_TOKENS = 1024
+
+# メッセージごとのロール等のオーバーヘッド
+MESSAGE_OVERHEAD_TOKENS = 4
+
+ANY = "*"
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """チャットメッセージ全体のトークン数を概算する（チャンク分割の--chunk-unit tokensと同じ推定を使う）"""
+    return sum(estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+class TokenBucket:
+    """1分あたりの容量で補充されるトークンバケット（前借り方式）"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """amountを予約し、残高が0以上に戻るまでの待ち時間（秒）を返す"""
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """予約済みの量を補正する（正なら追加消費、負なら返却）"""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+    """リクエスト数(RPM)とトークン数(TPM)の2つのバケットを持つレートリミッター"""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._request_bucket = TokenBucket(rpm) if rpm else None
+        self._token_bucket = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled_requests = 0
+        self.total_wait_seconds = 0.0
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        """リクエスト1件分と推定トークン数を予約し、必要なら待機する。待機した秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._request_bucket:
+                wait = max(wait, self._request_bucket.reserve(1, now))
+            if self._token_bucket and estimated_tokens:
+                wait = max(wait, self._token_bucket.reserve(estimated_tokens, now))
+            self.requests += 1
+            if wait > 0:
+                self.throttled_requests += 1
+                self.total_wait_seconds += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """実際の使用トークン数で予約量を補正する"""
+        if not self._token_bucket or actual_tokens is None:
+            return
+        with self._lock:
+            self._token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def refund(self, estimated_tokens: int) -> None:
+        """失敗した試行で予約したトークン数を返却する（リクエスト数の枠は返さない）"""
+        if not self._token_bucket or not estimated_tokens:
+            return
+        with self._lock:
+            self._token_bucket.adjust(-estimated_tokens)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled_requests": self.throttled_requests,
+                "total_wait_seconds": self.total_wait_seconds
+            }
+
+
+_limit_settings: Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]] = {}
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else None
+
+
+def configure_rate_limit(rpm: float = None, tpm: float = None, base_url: str = None, model: str = None) -> None:
+    """base_url・モデルごとのRPM/TPM制限を設定する
+
+    base_urlやmodelを省略した場合は、すべてのbase_url・モデルに適用される既定値になる。
+    より具体的な設定（base_urlとモデルの両方を指定したもの）が優先される。
+    """
+    key = (base_url or ANY, model or ANY)
+    with _registry_lock:
+        _limit_settings[key] = (rpm, tpm)
+        # 設定が変わったリミッターは作り直す
+        _limiters.clear()
+
+
+def _lookup_limits(base_url: str, model: str) -> Tuple[Tuple[str, str], Optional[float], Optional[float]]:
+    for key in ((base_url, model), (base_url, ANY), (ANY, model), (ANY, ANY)):
+        if key in _limit_settings:
+            rpm, tpm = _limit_settings[key]
+            return key, rpm, tpm
+    # 明示的な設定がない場合は環境変数の既定値を使う
+    return (ANY, ANY), _env_float("OPENAI_RPM_LIMIT"), _env_float("OPENAI_TPM_LIMIT")
+
+
+def get_rate_limiter(base_url: str, model: str) -> Optional[RateLimiter]:
+    """base_urlとモデルに適用されるレートリミッターを返す（制限がなければNone）"""
+    with _registry_lock:
+        key, rpm, tpm = _lookup_limits(base_url, model)
+        if not rpm and not tpm:
+            return None
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(rpm=rpm, tpm=tpm)
+            _limiters[key] = limiter
+        return limiter
+
+
+def get_rate_limit_stats() -> Dict[str, float]:
+    """すべてのリミッターの待機統計を合算して返す"""
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    totals = {"requests": 0, "throttled_requests": 0, "total_wait_seconds": 0.0}
+    for limiter in limiters:
+        for name, value in limiter.stats().items():
+            totals[name] += value
+    return totals
+
+
+def reset_rate_limits() -> None:
+    """すべての制限設定を解除する"""
+    with _registry_lock:
+        _limit_settings.clear()
+        _limiters.clear()
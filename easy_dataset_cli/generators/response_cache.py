@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+LLMレスポンスのディスクキャッシュ
+
+(モデル, メッセージ, サンプリングパラメータ) のハッシュをキーにレスポンス本文をSQLiteに保存する。
+合計サイズが上限を超えた場合は、最後に参照された時刻が古いものから削除する（LRU）。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_MAX_CACHE_BYTES = 1024 * 1024 * 1024
+
+
+class ResponseCache:
+    """SQLiteに保存するサイズ上限付きLRUレスポンスキャッシュ"""
+
+    def __init__(self, db_path: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], params: Dict = None) -> str:
+        """モデル・メッセージ・サンプリングパラメータから決定的なキャッシュキーを作る"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params or {}},
+            ensure_ascii=False,
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """キャッシュされたレスポンスを取得する（見つからない場合はNone）"""
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """レスポンスを保存し、必要なら古いエントリを削除する"""
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数などの統計を返す"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": self._total_bytes
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_active_cache: Optional[ResponseCache] = None
+
+
+def configure_response_cache(db_path: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES) -> ResponseCache:
+    """プロセス全体で使うレスポンスキャッシュを有効にする"""
+    global _active_cache
+    close_response_cache()
+    _active_cache = ResponseCache(db_path, max_bytes)
+    return _active_cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """有効なレスポンスキャッシュを返す（無効な場合はNone）"""
+    return _active_cache
+
+
+def close_response_cache() -> None:
+    """レスポンスキャッシュを閉じて無効にする"""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+        _active_cache = None
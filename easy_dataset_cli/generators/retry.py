@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+一時的なLLM呼び出しエラーに対するリトライポリシー
+
+タイムアウト・接続エラー・429・5xx などの一時的なエラーは、指数バックオフ（ジッター付き）で再試行する。
+サーバーが Retry-After / retry-after-ms ヘッダーを返した場合はその待ち時間を優先する。
+認証エラーや不正なリクエストなど、再試行しても結果が変わらないエラーは即座に送出する。
+"""
+
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+import httpx
+import openai
+
+T = TypeVar("T")
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+# Retry-After がこれより長い場合は信用せず、通常のバックオフを使う
+MAX_RETRY_AFTER_SECONDS = 600.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class RetryPolicy:
+    """最大試行回数とバックオフ設定を持つリトライポリシー"""
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff_delay(self, retry_number: int) -> float:
+        """retry_number回目（1始まり）の再試行前の待ち時間（フルジッター）"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry_number - 1)))
+        return random.uniform(0, ceiling)
+
+    def delay_for(self, error: BaseException, retry_number: int) -> float:
+        """エラーと再試行回数から待ち時間を決める（Retry-Afterを優先）"""
+        retry_after = get_retry_after(error)
+        if retry_after is not None and 0 <= retry_after <= MAX_RETRY_AFTER_SECONDS:
+            return retry_after
+        return self.backoff_delay(retry_number)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """再試行で回復が見込めるエラーかどうかを判定する"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    return False
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """エラーレスポンスの Retry-After / retry-after-ms ヘッダーから待ち時間（秒）を取得する"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+
+    # HTTP-date形式（例: Wed, 21 Oct 2015 07:28:00 GMT）
+    parsed = email.utils.parsedate_tz(retry_after)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+
+_policy = RetryPolicy()
+_stats = {"retries": 0, "recovered": 0, "exhausted": 0, "fatal": 0}
+_stats_lock = threading.Lock()
+
+
+def configure_retry_policy(
+    max_retries: int = None,
+    base_delay: float = None,
+    max_delay: float = None
+) -> RetryPolicy:
+    """プロセス全体で使うリトライポリシーを設定する（省略した項目は現在の値を維持）"""
+    global _policy
+    _policy = RetryPolicy(
+        max_retries=_policy.max_retries if max_retries is None else max_retries,
+        base_delay=_policy.base_delay if base_delay is None else base_delay,
+        max_delay=_policy.max_delay if max_delay is None else max_delay
+    )
+    return _policy
+
+
+def get_retry_policy() -> RetryPolicy:
+    return _policy
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_retry_stats() -> Dict[str, int]:
+    """実行中のリトライ統計を返す"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_retry_stats() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    policy: RetryPolicy = None,
+    on_retry: Callable[[BaseException, int, float], None] = None,
+    sleep: Callable[[float], None] = time.sleep
+) -> T:
+    """funcを実行し、一時的なエラーの場合はポリシーに従って再試行する
+
+    on_retry には (エラー, 再試行回数, 待ち時間) が渡される。
+    再試行回数を使い切った場合や、再試行できないエラーの場合は最後のエラーを送出する。
+    """
+    policy = policy or _policy
+    retry_number = 0
+    while True:
+        try:
+            result = func()
+        except Exception as error:
+            if not is_retryable_error(error):
+                _count("fatal")
+                raise
+            if retry_number >= policy.max_retries:
+                _count("exhausted")
+                raise
+
+            retry_number += 1
+            delay = policy.delay_for(error, retry_number)
+            _count("retries")
+            if on_retry is not None:
+                on_retry(error, retry_number, delay)
+            sleep(delay)
+            continue
+
+        if retry_number:
+            _count("recovered")
+        return result
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ストリーミングレスポンスの逐次<Pair>解析
+
+LLMから届いた差分テキストを順に受け取り、閉じた<Pair>の数を数える。
+</QAPairs>が届いた場合や、必要な数のペアが揃った場合はストリームを打ち切れるよう通知する。
+Q&Aペアの取り出しと出力はレスポンス全体を受信した後に通常の解析処理で行う（ストリーミングの効果は受信の打ち切りのみ）。
+"""
+
+import html
+import re
+from typing import Dict, List, Optional
+
+PAIR_PATTERN = re.compile(r'<Pair>(.*?)</Pair>', re.DOTALL)
+QUESTION_PATTERN = re.compile(r'<Question>(.*?)</Question>', re.DOTALL)
+ANSWER_PATTERN = re.compile(r'<Answer>(.*?)</Answer>', re.DOTALL)
+
+ROOT_OPEN_TAG = "<QAPairs>"
+ROOT_CLOSE_TAG = "</QAPairs>"
+# 複数GAペア一括生成のレスポンスでGAペアごとにQ&Aを囲む要素
+GROUP_OPEN_TAG = "<GAGroup"
+GROUP_CLOSE_TAG = "</GAGroup>"
+
+
+def parse_pair_block(block: str) -> Optional[Dict[str, str]]:
+    """<Pair>の中身からQ&Aペアを取り出す（QuestionかAnswerが欠けている場合はNone）"""
+    question_match = QUESTION_PATTERN.search(block)
+    answer_match = ANSWER_PATTERN.search(block)
+    if not question_match or not answer_match:
+        return None
+    return {
+        "question": html.unescape(question_match.group(1).strip()),
+        "answer": html.unescape(answer_match.group(1).strip())
+    }
+
+
+class IncrementalPairParser:
+    """差分テキストを受け取り、閉じた<Pair>を順にQ&Aペアとして返すパーサー"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._buffer = ""
+        self.pairs: List[Dict[str, str]] = []
+        self.closed = False
+
+    def feed(self, delta: str) -> List[Dict[str, str]]:
+        """差分テキストを追加し、新たに閉じたQ&Aペアのリストを返す"""
+        if self.closed or not delta:
+            return []
+
+        self._buffer += delta
+        new_pairs = []
+        consumed = 0
+        for match in PAIR_PATTERN.finditer(self._buffer):
+            pair = parse_pair_block(match.group(1))
+            if pair is not None:
+                new_pairs.append(pair)
+            consumed = match.end()
+
+        # 解析済みの部分は捨て、閉じていない<Pair>だけを残す
+        remainder = self._buffer[consumed:]
+        if ROOT_CLOSE_TAG in remainder:
+            self.closed = True
+        self._buffer = remainder
+
+        self.pairs.extend(new_pairs)
+        return new_pairs
+
+
+class PairStreamMonitor:
+    """ストリーミング中のレスポンスを監視し、打ち切りを判断する
+
+    complete_chat(stream_monitor=...) に渡すと、差分ごとに feed() が呼ばれる。
+    </QAPairs>が届いた場合、またはmax_pairs個のペアが揃った場合に打ち切りを指示する。
+    """
+
+    def __init__(self, max_pairs: int = None):
+        self.max_pairs = max_pairs
+        self.parser = IncrementalPairParser()
+        self.stopped_early = False
+
+    def reset(self) -> None:
+        """再試行時に状態を初期化する"""
+        self.parser.reset()
+        self.stopped_early = False
+
+    def feed(self, delta: str) -> bool:
+        """差分テキストを処理し、ストリームを打ち切るべきならTrueを返す"""
+        self.parser.feed(delta)
+        if self.parser.closed:
+            return True
+        if self.max_pairs and len(self.parser.pairs) >= self.max_pairs:
+            self.stopped_early = True
+            return True
+        return False
+
+    def finish(self, content: str) -> str:
+        """途中で打ち切ったレスポンスのルート要素（と開いたままの<GAGroup>）を閉じ、通常の解析処理に渡せる形にする"""
+        if self.stopped_early and ROOT_OPEN_TAG in content and ROOT_CLOSE_TAG not in content:
+            end = content.rfind("</Pair>")
+            content = content[:end + len("</Pair>")]
+            if content.rfind(GROUP_OPEN_TAG) > content.rfind(GROUP_CLOSE_TAG):
+                content += GROUP_CLOSE_TAG
+            return content + ROOT_CLOSE_TAG
+        return content
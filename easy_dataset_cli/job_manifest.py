@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Q&A生成ジョブのマニフェスト（中断からの再開用）
+
+(ファイル, チャンクのハッシュ, GAペア, 生成モード) ごとのタスクの状態と解析済みのQ&Aペアを
+出力ディレクトリ内のSQLiteに記録する。--resume で再実行した場合、完了済みのタスクは
+LLMを呼び出さずに記録済みの結果を返すため、qa/ のXMLはマニフェストから再構築される。
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .task_engine import expand_task_results
+
+MANIFEST_FILENAME = "manifest.sqlite"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def get_generation_mode(
+    use_fulltext: bool = False,
+    use_thinking: bool = False,
+    use_surrounding_context: bool = False,
+    ga_batch_size: int = 1
+) -> str:
+    """生成モードを表す文字列を返す（create_qa_task_runnerと同じ優先順位）"""
+    if ga_batch_size > 1:
+        return "multi_ga"
+    if use_surrounding_context:
+        return "surrounding"
+    if use_thinking:
+        return "thinking_fulltext" if use_fulltext else "thinking"
+    if use_fulltext:
+        return "fulltext"
+    return "basic"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JobManifest:
+    """タスクごとの状態と結果をSQLiteに保存するマニフェスト"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                task_key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                genre TEXT NOT NULL,
+                audience TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                status TEXT NOT NULL,
+                qa_count INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_task_key(source: str, chunk_hash: str, ga_pair: Dict[str, Dict[str, str]], mode: str) -> str:
+        """タスクを一意に識別するキーを作る"""
+        payload = json.dumps(
+            [source, chunk_hash, ga_pair["genre"]["title"], ga_pair["audience"]["title"], mode],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_completed(self, task_key: str) -> Optional[List[Dict[str, str]]]:
+        """完了済みタスクのQ&Aペアを返す（未完了の場合はNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM tasks WHERE task_key = ? AND status = ?",
+                (task_key, STATUS_DONE)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_attempts(self, task_key: str) -> int:
+        """タスクをこれまでに実行した回数を返す（未実行の場合は0）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM tasks WHERE task_key = ?", (task_key,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def record(
+        self,
+        task_key: str,
+        source: str,
+        task: Dict,
+        chunk_hash: str,
+        mode: str,
+        qa_pairs: List[Dict[str, str]]
+    ) -> None:
+        """タスクの結果を記録する（Q&Aが得られなかった場合は失敗として記録し、再開時に再実行する）"""
+        status = STATUS_DONE if qa_pairs else STATUS_FAILED
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO tasks (task_key, source, chunk_index, chunk_hash, genre, audience, mode,
+                                      status, qa_count, results, attempts, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                   ON CONFLICT(task_key) DO UPDATE SET
+                       chunk_index = excluded.chunk_index,
+                       status = excluded.status,
+                       qa_count = excluded.qa_count,
+                       results = excluded.results,
+                       attempts = tasks.attempts + 1,
+                       updated_at = excluded.updated_at""",
+                (
+                    task_key, source, task["chunk_index"], chunk_hash,
+                    task["ga_pair"]["genre"]["title"], task["ga_pair"]["audience"]["title"], mode,
+                    status, len(qa_pairs), json.dumps(qa_pairs, ensure_ascii=False), time.time()
+                )
+            )
+            self._conn.commit()
+
+    def mark_skipped(self) -> None:
+        """再開時に記録から返したタスクを数える"""
+        with self._lock:
+            self.skipped += 1
+
+    def stats(self) -> Dict[str, int]:
+        """状態ごとのタスク数を返す"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = {STATUS_DONE: 0, STATUS_FAILED: 0}
+        counts.update(dict(rows))
+        counts["skipped"] = self.skipped
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_resumable_runner(
+    runner: Callable[[Dict], List[Dict[str, str]]],
+    manifest: JobManifest,
+    source: str,
+    mode: str,
+    resume: bool = False
+) -> Callable[[Dict], List[Dict[str, str]]]:
+    """タスクの結果をマニフェストに記録し、resume時は完了済みタスクを記録から返すランナーを作る"""
+
+    def run_task(task: Dict) -> List[Dict[str, str]]:
+        chunk_hash = hash_text(task["chunk"])
+        task_key = JobManifest.make_task_key(source, chunk_hash, task["ga_pair"], mode)
+
+        if resume:
+            completed = manifest.get_completed(task_key)
+            if completed is not None:
+                manifest.mark_skipped()
+                return completed
+
+        # 試行回数をログ成果物の名前に含め、再実行時に前回のログを上書きしない
+        qa_pairs = runner(dict(task, attempt=manifest.get_attempts(task_key) + 1))
+        manifest.record(task_key, source, task, chunk_hash, mode, qa_pairs)
+        return qa_pairs
+
+    return run_task
+
+
+def create_resumable_batched_runner(
+    runner: Callable[[Dict], List[List[Dict[str, str]]]],
+    manifest: JobManifest,
+    source: str,
+    mode: str,
+    resume: bool = False
+) -> Callable[[Dict], List[List[Dict[str, str]]]]:
+    """複数GAペアをまとめたタスク用のcreate_resumable_runner
+
+    結果はGAペア単位で記録し、resume時はまとめた全GAペアが完了済みの場合のみ記録から返す。
+    """
+    def run_task(task: Dict) -> List[List[Dict[str, str]]]:
+        chunk_hash = hash_text(task["chunk"])
+        task_keys = [
+            JobManifest.make_task_key(source, chunk_hash, ga_pair, mode)
+            for ga_pair in task["ga_pairs"]
+        ]
+
+        if resume:
+            completed = [manifest.get_completed(task_key) for task_key in task_keys]
+            if all(results is not None for results in completed):
+                for _ in task_keys:
+                    manifest.mark_skipped()
+                return completed
+
+        attempt = max(manifest.get_attempts(task_key) for task_key in task_keys) + 1
+        grouped_qa_pairs = runner(dict(task, attempt=attempt))
+        for task_key, (ga_task, qa_pairs) in zip(task_keys, expand_task_results(task, grouped_qa_pairs)):
+            manifest.record(task_key, source, ga_task, chunk_hash, mode, qa_pairs)
+        return grouped_qa_pairs
+
+    return run_task
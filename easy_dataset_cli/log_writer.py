@@ -0,0 +1,127 @@
+# easy_dataset_cli/log_writer.py
+"""ログ成果物の書き出しをリクエスト処理から切り離すバックグラウンドライター
+
+ログのシリアライズ（JSONの整形・Markdownの組み立て・XMLの整形）と
+ディスクへの書き込みを専用スレッドで行い、生成ループやワーカーがディスクを待たないようにする。
+キューは上限付きで、書き込みが追いつかない場合のみ投入側が待つ。
+"""
+
+import atexit
+import queue
+import threading
+from typing import Callable, Optional
+
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_QUEUE_SIZE = 1024
+# 1回のまとめ書きで処理するジョブの最大数
+MAX_BATCH_SIZE = 256
+
+
+class BackgroundLogWriter:
+    """上限付きキューからログ書き出しジョブを取り出し、まとめて実行するスレッド"""
+
+    def __init__(self, max_queue_size: int = DEFAULT_QUEUE_SIZE, max_batch_size: int = MAX_BATCH_SIZE):
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue(maxsize=max_queue_size)
+        self._batch_hooks = []
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        self.stats = {"jobs": 0, "batches": 0, "errors": 0}
+
+    def submit(self, job: Callable[[], None]) -> None:
+        """書き出しジョブを投入する（キューが満杯の場合は空くまで待つ）"""
+        self._queue.put(job)
+
+    def add_batch_hook(self, hook: Callable[[], None]) -> None:
+        """まとめ書きの終了ごとに呼ぶ関数（バッファのフラッシュなど）を登録する"""
+        self._batch_hooks.append(hook)
+
+    def remove_batch_hook(self, hook: Callable[[], None]) -> None:
+        if hook in self._batch_hooks:
+            self._batch_hooks.remove(hook)
+
+    def flush(self) -> None:
+        """投入済みのジョブがすべて書き出されるまで待つ"""
+        if threading.current_thread() is self._thread:
+            return
+        self._queue.join()
+
+    def close(self) -> None:
+        """残りのジョブを書き出してからスレッドを終了する"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for job in batch:
+                if job is None:
+                    stop = True
+                    continue
+                self._execute(job)
+            for hook in list(self._batch_hooks):
+                self._execute(hook)
+            self.stats["batches"] += 1
+
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _execute(self, job: Callable[[], None]) -> None:
+        try:
+            job()
+            self.stats["jobs"] += 1
+        except Exception as e:
+            # ログの書き出し失敗で生成処理を止めない
+            self.stats["errors"] += 1
+            console.print(f"[yellow]ログの書き出しに失敗しました: {type(e).__name__}: {e}[/yellow]")
+
+
+_writer: Optional[BackgroundLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> BackgroundLogWriter:
+    """共有のバックグラウンドライターを返す（初回呼び出し時に起動）"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundLogWriter()
+        return _writer
+
+
+def submit_log_job(job: Callable[[], None]) -> None:
+    """ログ書き出しジョブをバックグラウンドライターに投入する"""
+    get_log_writer().submit(job)
+
+
+def flush_log_writer() -> None:
+    """投入済みのログがすべてディスクに書き出されるまで待つ"""
+    if _writer is not None:
+        _writer.flush()
+
+
+def close_log_writer() -> None:
+    """残りのログを書き出してバックグラウンドライターを停止する"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+# 正常終了時やCtrl+C（KeyboardInterrupt）による終了時も、投入済みのログを失わないようにする
+atexit.register(close_log_writer)
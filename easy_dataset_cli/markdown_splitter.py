@@ -0,0 +1,169 @@
+# easy_dataset_cli/markdown_splitter.py
+"""Markdownの構造（見出し・段落・表・コードブロック）に沿ったテキスト分割
+
+Markdownをmistuneで1回だけ解析し、見出しで区切ったセクションをまとめてチャンクに詰める。
+表やコードブロックはブロック単位で扱うため途中で切れず、各チャンクの先頭には見出しの階層（見出しパス）を付ける。
+"""
+
+from typing import Callable, Iterator, List, NamedTuple, Tuple
+
+import mistune
+from mistune.core import BlockState
+from mistune.renderers.markdown import MarkdownRenderer
+
+from .text_splitter import DEFAULT_SEPARATORS, _ChunkMerger, _recursive_split
+
+# ブロック同士の区切り
+BLOCK_SEPARATOR = "\n\n"
+
+_parse_markdown = mistune.create_markdown(renderer=None, plugins=["table"])
+_renderer = MarkdownRenderer()
+
+
+class MarkdownChunk(NamedTuple):
+    """チャンクの本文と、その位置の見出しパス（上位の見出しから順）"""
+    text: str
+    heading_path: Tuple[str, ...]
+
+
+class _Section(NamedTuple):
+    heading_path: Tuple[str, ...]
+    heading_levels: Tuple[int, ...]
+    heading: str
+    blocks: List[str]
+
+
+def _render_block(token: dict) -> str:
+    return _renderer([token], BlockState()).strip("\n")
+
+
+def _inline_text(children: List[dict]) -> str:
+    return "".join(child.get("raw", "") or _inline_text(child.get("children", [])) for child in children)
+
+
+def _parse_sections(text: str) -> List[_Section]:
+    """見出しごとにセクションを作る（最初の見出しより前の部分は見出しパスが空のセクションになる）"""
+    tokens, _ = _parse_markdown.parse(text)
+    sections = [_Section((), (), "", [])]
+    path: List[Tuple[int, str]] = []
+    for token in tokens:
+        if token["type"] == "blank_line":
+            continue
+        if token["type"] == "heading":
+            level = token["attrs"]["level"]
+            path = [(lv, title) for lv, title in path if lv < level] + [(level, _inline_text(token["children"]))]
+            sections.append(_Section(
+                tuple(title for _, title in path), tuple(lv for lv, _ in path), _render_block(token), []
+            ))
+            continue
+        sections[-1].blocks.append(_render_block(token))
+    return [section for section in sections if section.heading or section.blocks]
+
+
+def _heading_lines(section: _Section, depth: int = None) -> str:
+    """見出しパスをMarkdownの見出し行にする（depthを指定した場合は上位depth個まで）"""
+    pairs = list(zip(section.heading_levels, section.heading_path))[:depth]
+    return "".join(f"{'#' * level} {title}{BLOCK_SEPARATOR}" for level, title in pairs)
+
+
+def _section_text(section: _Section) -> str:
+    return BLOCK_SEPARATOR.join(([section.heading] if section.heading else []) + section.blocks)
+
+
+def _split_table(block: str, chunk_size: int, length_function: Callable[[str], int]) -> Iterator[str]:
+    """chunk_sizeを超える表を、見出し行と区切り行を繰り返して行単位で分割する"""
+    lines = block.split("\n")
+    header = "\n".join(lines[:2])
+    rows: List[str] = []
+    for line in lines[2:]:
+        if rows and length_function("\n".join([header] + rows + [line])) > chunk_size:
+            yield "\n".join([header] + rows)
+            rows = []
+        rows.append(line)
+    yield "\n".join([header] + rows)
+
+
+def _split_section(
+    section: _Section,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int]
+) -> Iterator[str]:
+    """1つのチャンクに収まらないセクションを、見出しパスを先頭に付けたチャンクに分割する"""
+    context = _heading_lines(section)
+    if length_function(context) > chunk_size // 2:
+        # 見出しが長すぎる場合は本文の分量を優先する
+        context = ""
+    budget = chunk_size - length_function(context)
+    overlap = min(chunk_overlap, budget)
+
+    merger = _ChunkMerger(budget, overlap, length_function)
+    for block in section.blocks:
+        piece = block + BLOCK_SEPARATOR
+        if length_function(piece) <= budget:
+            for chunk in merger.add(piece):
+                yield context + chunk
+            continue
+        for chunk in merger.flush():
+            yield context + chunk
+        if block.startswith("|"):
+            pieces = _split_table(block, budget, length_function)
+        else:
+            pieces = _recursive_split(block, DEFAULT_SEPARATORS, budget, overlap, length_function)
+        for chunk in pieces:
+            yield context + chunk
+    for chunk in merger.flush():
+        yield context + chunk
+
+
+def iter_markdown_chunks(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len
+) -> Iterator[MarkdownChunk]:
+    """Markdownをセクション・ブロック単位でチャンクに詰める
+
+    続けて収まるセクションは1つのチャンクにまとめ（オーバーラップなし）、
+    chunk_sizeを超えるセクションだけを段落・表・コードブロック単位で分割する（オーバーラップはブロック単位）。
+    チャンクの見出しパスは、チャンクが始まる位置のセクションのもの。
+    本文のない見出しだけのセクションは単独のチャンクにせず、次の本文のあるセクションの前に付ける
+    （次のセクションがチャンクの先頭になる場合は見出しパスに含まれ、末尾に残った見出しは捨てる）。
+    """
+    current: List[str] = []
+    current_path: Tuple[str, ...] = ()
+    pending: List[str] = []
+    for section in _parse_sections(text):
+        if not section.blocks:
+            pending.append(section.heading)
+            continue
+        section_text = _section_text(section)
+        # まとめたチャンクの先頭には、最初のセクションの上位の見出しを付ける
+        candidate = current + pending + [section_text] if current else [_heading_lines(section, -1) + section_text]
+        pending = []
+        if length_function(BLOCK_SEPARATOR.join(candidate)) <= chunk_size:
+            if not current:
+                current_path = section.heading_path
+            current = candidate
+            continue
+        if current:
+            yield MarkdownChunk(BLOCK_SEPARATOR.join(current).strip(), current_path)
+            current = []
+            candidate = [_heading_lines(section, -1) + section_text]
+            if length_function(candidate[0]) <= chunk_size:
+                current, current_path = candidate, section.heading_path
+                continue
+        for chunk in _split_section(section, chunk_size, chunk_overlap, length_function):
+            yield MarkdownChunk(chunk.strip(), section.heading_path)
+    if current:
+        yield MarkdownChunk(BLOCK_SEPARATOR.join(current).strip(), current_path)
+
+
+def split_markdown(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len
+) -> List[MarkdownChunk]:
+    """Markdownを見出しパス付きのチャンクに分割する"""
+    return list(iter_markdown_chunks(text, chunk_size, chunk_overlap, length_function))
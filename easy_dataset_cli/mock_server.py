@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+オフラインベンチマーク用のOpenAI互換モックサーバー
+
+/v1/chat/completions を実装し、遅延の分布・エラーや429の注入・ストリーミング・
+定型の<QAPairs> XML（壊れたXMLのバリエーションを含む）を返す。
+OPENAI_BASE_URL をこのサーバーに向けることで、ネットワークなしで generate を端から端まで実行できる。
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# 壊れたXMLのバリエーション（tests/test_xml_parsing.py の各ケースに対応）
+MALFORMED_VARIANTS = ("code_block", "pair_only", "unclosed_root", "trailing_text")
+
+DEFAULT_PAIRS_PER_RESPONSE = 3
+
+NUM_PAIRS_PATTERN = re.compile(r"(\d+)個のユニーク")
+GA_GROUP_PATTERN = re.compile(r"### GAグループ (\d+)")
+GA_COUNT_PATTERN = re.compile(r"(\d+)個のGenre-Audience")
+
+
+def _qa_pair_xml(index: int, group_id: int = None, with_think: bool = False) -> str:
+    label = f"{group_id}-{index}" if group_id else str(index)
+    answer = f"モック回答{label}：チャンクの内容に基づく回答です。"
+    if with_think:
+        answer = f"<think>モック思考{label}：質問の意図を整理します。</think>{answer}"
+    return f"<Pair>\n<Question>モック質問{label}は何ですか？</Question>\n<Answer>{answer}</Answer>\n</Pair>"
+
+
+def build_qa_response(prompt: str, pairs_per_response: int = DEFAULT_PAIRS_PER_RESPONSE, variant: str = "valid") -> str:
+    """プロンプトに応じた定型の<QAPairs> XMLを組み立てる
+
+    プロンプトに「N個のユニーク」とあればN件、「### GAグループ k」があればグループごとに出力する。
+    variantに壊れたXMLの種類を指定すると、そのバリエーションを返す。
+    """
+    match = NUM_PAIRS_PATTERN.search(prompt)
+    num_pairs = int(match.group(1)) if match else pairs_per_response
+    with_think = "<Answer><think>" in prompt
+
+    group_ids = [int(group_id) for group_id in GA_GROUP_PATTERN.findall(prompt)]
+    if group_ids:
+        body = "\n".join(
+            f'<GAGroup id="{group_id}">\n' +
+            "\n".join(_qa_pair_xml(i, group_id, with_think) for i in range(1, num_pairs + 1)) +
+            "\n</GAGroup>"
+            for group_id in group_ids
+        )
+    else:
+        body = "\n".join(_qa_pair_xml(i, None, with_think) for i in range(1, num_pairs + 1))
+
+    if variant == "code_block":
+        return f"```xml\n<QAPairs>\n{body}\n</QAPairs>\n```"
+    if variant == "pair_only":
+        return body
+    if variant == "unclosed_root":
+        return f"<QAPairs>\n{body}\n<QAPairs>"
+    if variant == "trailing_text":
+        return f"<QAPairs>\n{body}\n</QAPairs>\n以上がQ&Aペアです。ほかにご要望があればお知らせください。"
+    return f"<QAPairs>\n{body}\n</QAPairs>"
+
+
+def build_ga_response(prompt: str) -> str:
+    """GA定義生成リクエストに対する定型の<GADefinitions> XMLを組み立てる"""
+    match = GA_COUNT_PATTERN.search(prompt)
+    num_pairs = int(match.group(1)) if match else 3
+    pairs = "\n".join(
+        f"<Pair>\n<Genre>\n<Title>モックジャンル{i}</Title>\n<Description>モックジャンル{i}の説明です。</Description>\n</Genre>\n"
+        f"<Audience>\n<Title>モック読者{i}</Title>\n<Description>モック読者{i}の説明です。</Description>\n</Audience>\n</Pair>"
+        for i in range(1, num_pairs + 1)
+    )
+    return f"<GADefinitions>\n{pairs}\n</GADefinitions>"
+
+
+class MockLLMServer:
+    """OpenAI互換のチャット補完APIを模倣するローカルサーバー"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        latency_distribution: str = "fixed",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        malformed_rate: float = 0.0,
+        pairs_per_response: int = DEFAULT_PAIRS_PER_RESPONSE,
+        stream_chunk_chars: int = 16,
+        stream_chunk_delay_ms: float = 0.0,
+        seed: int = None
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"未対応の遅延分布です: {latency_distribution}（{', '.join(LATENCY_DISTRIBUTIONS)}）")
+
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.malformed_rate = malformed_rate
+        self.pairs_per_response = pairs_per_response
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay_ms = stream_chunk_delay_ms
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "malformed": 0, "streamed": 0}
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def sample_latency(self) -> float:
+        """設定された分布から1リクエスト分の遅延（秒）を取り出す"""
+        if self.latency_ms <= 0:
+            return 0.0
+        mean = self.latency_ms / 1000.0
+        with self._random_lock:
+            if self.latency_distribution == "uniform":
+                return self._random.uniform(0, 2 * mean)
+            if self.latency_distribution == "exponential":
+                return self._random.expovariate(1 / mean)
+            if self.latency_distribution == "lognormal":
+                # 中央値がlatency_msになるように設定
+                return self._random.lognormvariate(math.log(mean), 0.5)
+        return mean
+
+    def _roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._random_lock:
+            return self._random.random() < probability
+
+    def _choose_variant(self) -> str:
+        if not self._roll(self.malformed_rate):
+            return "valid"
+        with self._random_lock:
+            return self._random.choice(MALFORMED_VARIANTS)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def build_content(self, messages: List[Dict[str, str]]) -> str:
+        # システムメッセージにもタグ名が含まれるため、ユーザーメッセージのみで判定する
+        prompt = "\n".join(message.get("content") or "" for message in messages if message.get("role") == "user")
+        if "<GADefinitions>" in prompt:
+            return build_ga_response(prompt)
+        variant = self._choose_variant()
+        if variant != "valid":
+            self._count("malformed")
+        return build_qa_response(prompt, self.pairs_per_response, variant)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict, headers: Dict[str, str] = None) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                server._count("requests")
+
+                time.sleep(server.sample_latency())
+
+                if server._roll(server.rate_limit_rate):
+                    server._count("rate_limited")
+                    self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+                        {"Retry-After": str(server.retry_after)}
+                    )
+                    return
+                if server._roll(server.error_rate):
+                    server._count("errors")
+                    self._send_json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+                    return
+
+                messages = request.get("messages", [])
+                model = request.get("model", "mock-model")
+                content = server.build_content(messages)
+                prompt_tokens = sum(len(message.get("content") or "") for message in messages) // 4
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_tokens + len(content) // 4
+                }
+
+                if request.get("stream"):
+                    server._count("streamed")
+                    include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+                    self._stream(model, content, usage if include_usage else None)
+                else:
+                    self._send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": usage
+                    })
+                server._count("ok")
+
+            def _stream(self, model: str, content: str, usage: Dict = None) -> None:
+                """Server-Sent Events形式で本文を少しずつ送信する（usageを渡すと最後にusageだけのチャンクを送る）"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+                def event(delta: Dict, finish_reason: str = None) -> bytes:
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+                    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+
+                try:
+                    self.wfile.write(event({"role": "assistant", "content": ""}))
+                    for start in range(0, len(content), server.stream_chunk_chars):
+                        self.wfile.write(event({"content": content[start:start + server.stream_chunk_chars]}))
+                        self.wfile.flush()
+                        if server.stream_chunk_delay_ms > 0:
+                            time.sleep(server.stream_chunk_delay_ms / 1000.0)
+                    self.wfile.write(event({}, "stop"))
+                    if usage is not None:
+                        # stream_options.include_usage指定時のOpenAIと同じく、choicesが空のチャンクでusageを返す
+                        usage_chunk = {
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [],
+                            "usage": usage
+                        }
+                        self.wfile.write(f"data: {json.dumps(usage_chunk)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # クライアントが途中で受信を打ち切った場合
+                    pass
+
+        return Handler
+
+    def start(self) -> "MockLLMServer":
+        """バックグラウンドスレッドでサーバーを起動する"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """現在のスレッドでサーバーを実行する（Ctrl+Cで停止）"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
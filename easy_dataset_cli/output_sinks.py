@@ -0,0 +1,218 @@
+# easy_dataset_cli/output_sinks.py
+"""生成されたQ&AペアをGenre別ファイルへ逐次書き出す出力シンク
+
+従来は全タスクの完了後にQ&Aペアをまとめて変換していたため、
+メモリ使用量が生成数に比例し、実行が終わるまで qa/ に何も残らなかった。
+シンクはタスクが完了するたびにQ&Aペアを受け取り、バッファ付きのファイルハンドルで
+Genreごとのファイル（XML・JSONL）やQ&Aストア（qa.sqlite）に書き出して、一定間隔でフラッシュする。
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, TextIO
+
+from .file_utils import sanitize_filename
+from .qa_store import QAStore
+from .xml_utils import _build_pair_element, salvage_qa_pairs_from_xml
+from .xml_writer import XMLStreamWriter, resume_pretty_xml
+
+OUTPUT_FORMATS = ("xml", "jsonl", "both")
+WRITE_BUFFER_SIZE = 1024 * 1024
+# この秒数が経過するごとにバッファをディスクへフラッシュする
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+class GenreXMLSink:
+    """Q&AペアをGenre別の qa/<genre>.xml に逐次書き出すシンク
+
+    追加モードでは既存ファイルの閉じタグを外して続きに書き出し、既存部分は読み直さない。
+    """
+
+    suffix = ".xml"
+
+    def __init__(self, qa_dir: Path, append_mode: bool = False):
+        self.qa_dir = Path(qa_dir)
+        self.append_mode = append_mode
+        self._files: Dict[str, TextIO] = {}
+        self._writers: Dict[str, XMLStreamWriter] = {}
+        self.paths: List[Path] = []
+
+    def _open(self, genre: str) -> XMLStreamWriter:
+        file_path = self.qa_dir / f"{sanitize_filename(genre)}{self.suffix}"
+        existing_pairs = []
+        resume = False
+        if self.append_mode and file_path.exists():
+            resume = resume_pretty_xml(file_path, "QAPairs")
+            if not resume:
+                # 閉じタグで終わっていない場合（中断した実行で途中まで書かれたファイルなど）は、
+                # 読み取れたペアを書き直す（読み取れなかった部分は .bak に残る）
+                existing_pairs = salvage_qa_pairs_from_xml(file_path)
+
+        f = open(file_path, "a" if resume else "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        writer = XMLStreamWriter(f, "QAPairs", {"genre": genre}, resume=resume)
+        writer.write_all(_build_pair_element(item) for item in existing_pairs)
+        self._files[genre] = f
+        self.paths.append(file_path)
+        return writer
+
+    def write(self, entry: Dict[str, str], chunk_hash: str = "") -> None:
+        writer = self._writers.get(entry["genre"])
+        if writer is None:
+            writer = self._writers[entry["genre"]] = self._open(entry["genre"])
+        writer.write(_build_pair_element(entry))
+
+    def flush(self) -> None:
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        """各Genreのルート要素を閉じてファイルを閉じる"""
+        for genre, writer in self._writers.items():
+            writer.close()
+            self._files[genre].close()
+        self._writers.clear()
+        self._files.clear()
+
+
+class GenreJSONLSink:
+    """Q&AペアをGenre別の qa/<genre>.jsonl に1行1ペアで逐次書き出すシンク"""
+
+    suffix = ".jsonl"
+
+    def __init__(self, qa_dir: Path, append_mode: bool = False):
+        self.qa_dir = Path(qa_dir)
+        self.append_mode = append_mode
+        self._files: Dict[str, TextIO] = {}
+        self.paths: List[Path] = []
+
+    def write(self, entry: Dict[str, str], chunk_hash: str = "") -> None:
+        f = self._files.get(entry["genre"])
+        if f is None:
+            file_path = self.qa_dir / f"{sanitize_filename(entry['genre'])}{self.suffix}"
+            mode = "a" if self.append_mode else "w"
+            f = self._files[entry["genre"]] = open(file_path, mode, encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+            self.paths.append(file_path)
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class QAStoreSink:
+    """Q&AペアをQ&Aストアに記録するシンク（フラッシュ時にまとめて挿入する）
+
+    追加モードでない場合は、同じ入力ファイルから以前に生成したQ&Aペアを置き換える。
+    """
+
+    def __init__(self, store: QAStore, source: str = "", model: str = "", append_mode: bool = False):
+        self.store = store
+        self.source = source
+        self.model = model
+        self._pending: List[Dict[str, str]] = []
+        self.paths: List[Path] = [store.db_path]
+        if not append_mode:
+            store.delete_source(source)
+
+    def write(self, entry: Dict[str, str], chunk_hash: str = "") -> None:
+        self._pending.append(dict(entry, chunk_hash=chunk_hash))
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        self.store.add_pairs(pending, source=self.source, model=self.model)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class OutputSinks:
+    """複数の出力シンクをまとめ、一定間隔でフラッシュする
+
+    使用例:
+        with open_output_sinks(dirs["qa"], "both") as sinks:
+            for task, qa_pairs in run_qa_tasks(...):
+                sinks.write_all(build_qa_entries(task["ga_pair"], qa_pairs))
+    """
+
+    def __init__(self, sinks: List, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._last_flush = time.monotonic()
+
+    def write_all(self, entries: Iterable[Dict[str, str]], chunk_hash: str = "") -> None:
+        """1タスク分のQ&Aペアを書き出す（前回のフラッシュから一定時間経っていればフラッシュする）"""
+        for entry in entries:
+            for sink in self.sinks:
+                sink.write(entry, chunk_hash)
+            self.count += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+    @property
+    def paths(self) -> List[Path]:
+        """書き出したファイルのパス"""
+        return [path for sink in self.sinks for path in sink.paths]
+
+    def __enter__(self) -> "OutputSinks":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # 中断された場合も、それまでに得られたQ&Aペアを読めるファイルとして残す
+        self.close()
+
+
+def open_output_sinks(
+    qa_dir: Path,
+    output_format: str = "xml",
+    append_mode: bool = False,
+    flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    store: QAStore = None,
+    source: str = "",
+    model: str = ""
+) -> OutputSinks:
+    """出力形式（xml / jsonl / both）に応じたシンクを作る
+
+    storeを指定した場合は、Q&Aストアにも入力ファイル名（source）とモデル名とともに記録する。
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"未対応の出力形式です: {output_format}（{', '.join(OUTPUT_FORMATS)}）")
+    sinks = []
+    if output_format in ("xml", "both"):
+        sinks.append(GenreXMLSink(qa_dir, append_mode))
+    if output_format in ("jsonl", "both"):
+        sinks.append(GenreJSONLSink(qa_dir, append_mode))
+    if store is not None:
+        sinks.append(QAStoreSink(store, source, model, append_mode))
+    return OutputSinks(sinks, flush_interval)
+
+
+def export_qa_store(store: QAStore, qa_dir: Path, output_format: str = "xml") -> List[Path]:
+    """Q&AストアのQ&AペアをGenre別ファイル（XML・JSONL）として書き出す
+
+    Returns:
+        書き出したファイルのパス
+    """
+    qa_dir = Path(qa_dir)
+    qa_dir.mkdir(parents=True, exist_ok=True)
+    with open_output_sinks(qa_dir, output_format) as sinks:
+        for pair in store.iter_pairs():
+            sinks.write_all([{key: pair[key] for key in ("genre", "audience", "question", "answer")}])
+    return sinks.paths
@@ -46,3 +46,8 @@ def get_qa_generation_with_thinking_prompt() -> str:
 def get_qa_generation_with_surrounding_prompt() -> str:
     """周辺チャンク付Q&A生成プロンプトを取得"""
     return load_prompt_template("qa_generation_with_surrounding")
+
+
+def get_qa_generation_multi_ga_prompt() -> str:
+    """複数GAペア一括Q&A生成プロンプトを取得"""
+    return load_prompt_template("qa_generation_multi_ga")
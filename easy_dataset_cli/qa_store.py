@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Q&AペアのSQLiteストア（データセットの正本）
+
+Genre別XMLの代わりに、Q&Aペアを出力ディレクトリの qa.sqlite に
+genre・audience・入力ファイル・チャンクのハッシュ・質問のハッシュ・モデル・時刻とともに記録する。
+重複チェックや件数の集計はインデックスの検索で済み、XMLファイルを全件パースする必要がない。
+qa/ のXML（・JSONL）はストアから書き出すエクスポートとして扱える。
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+QA_STORE_FILENAME = "qa.sqlite"
+# executemanyでまとめて挿入する行数・iter_pairsで1回に読み出す行数
+INSERT_BATCH_SIZE = 1000
+READ_BATCH_SIZE = 1000
+
+
+def hash_question(question: str) -> str:
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
+
+class QAStore:
+    """Q&AペアをインデックスつきでSQLiteに保存するストア"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS qa_pairs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                genre TEXT NOT NULL,
+                audience TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                question_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        # (genre, rowid) の順に並ぶため、Genre別の書き出しをソートなしで行える
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_genre ON qa_pairs(genre)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_genre_audience ON qa_pairs(genre, audience)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_genre_question ON qa_pairs(genre, question_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_source_chunk ON qa_pairs(source, chunk_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_model ON qa_pairs(model)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_qa_created_at ON qa_pairs(created_at)")
+        self._conn.commit()
+
+    def add_pairs(
+        self,
+        entries: Iterable[Dict[str, str]],
+        source: str = "",
+        chunk_hash: str = "",
+        model: str = ""
+    ) -> int:
+        """Q&Aペア（genre・audience・question・answer）を追加し、追加した件数を返す
+
+        エントリに"source"・"chunk_hash"・"model"があれば引数より優先する。
+        """
+        now = time.time()
+        rows = [
+            (
+                entry["genre"], entry["audience"], entry["question"], entry["answer"],
+                hash_question(entry["question"]),
+                entry.get("source", source), entry.get("chunk_hash", chunk_hash), entry.get("model", model),
+                now
+            )
+            for entry in entries
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                self._conn.executemany(
+                    """INSERT INTO qa_pairs (genre, audience, question, answer, question_hash,
+                                             source, chunk_hash, model, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    rows[start:start + INSERT_BATCH_SIZE]
+                )
+            self._conn.commit()
+        return len(rows)
+
+    def has_question(self, genre: str, question: str) -> bool:
+        """同じGenreに同じ質問が記録済みかどうかを返す（重複チェック用）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM qa_pairs WHERE genre = ? AND question_hash = ? LIMIT 1",
+                (genre, hash_question(question))
+            ).fetchone()
+        return row is not None
+
+    def delete_source(self, source: str) -> int:
+        """入力ファイルのQ&Aペアを削除する（上書きモードで同じファイルを再生成する場合）"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM qa_pairs WHERE source = ?", (source,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def iter_pairs(self, genre: str = None, audience: str = None) -> Iterator[Dict[str, str]]:
+        """Q&AペアをGenre順・追加順に返す（genre・audienceで絞り込み可能）
+
+        READ_BATCH_SIZE件ずつ読み出すため、ストア全体をメモリに載せない。
+        """
+        conditions = []
+        params: List[str] = []
+        if genre is not None:
+            conditions.append("genre = ?")
+            params.append(genre)
+        if audience is not None:
+            conditions.append("audience = ?")
+            params.append(audience)
+
+        last_key: Tuple[str, int] = ("", 0)
+        while True:
+            where = " AND ".join(conditions + ["(genre, id) > (?, ?)"])
+            with self._lock:
+                rows = self._conn.execute(
+                    f"""SELECT id, genre, audience, question, answer, source, model
+                        FROM qa_pairs WHERE {where} ORDER BY genre, id LIMIT ?""",
+                    params + list(last_key) + [READ_BATCH_SIZE]
+                ).fetchall()
+            for _, genre_, audience_, question, answer, source, model in rows:
+                yield {
+                    "genre": genre_,
+                    "audience": audience_,
+                    "question": question,
+                    "answer": answer,
+                    "source": source,
+                    "model": model
+                }
+            if len(rows) < READ_BATCH_SIZE:
+                return
+            last_key = (rows[-1][1], rows[-1][0])
+
+    def genres(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT genre FROM qa_pairs ORDER BY genre").fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM qa_pairs").fetchone()[0]
+
+    def stats(self) -> List[Tuple[str, str, int]]:
+        """(genre, audience, 件数) の一覧を返す"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT genre, audience, COUNT(*) FROM qa_pairs GROUP BY genre, audience ORDER BY genre, audience"
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
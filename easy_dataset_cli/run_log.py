@@ -0,0 +1,276 @@
+# easy_dataset_cli/run_log.py
+"""タスクごとのログ成果物を1本の追記型JSONLにまとめる実行ログ
+
+既定ではログ成果物（request_*.json, prompt_*.md, qa_pairs_*.xml など）を
+従来どおり logs/ に個別ファイルとして書き出す。実行ログを有効にすると、
+1タスク分の成果物を1行のコンパクトなレコードとして logs/run_log.jsonl に追記し、
+レコードの位置を .idx に記録する。`logs export` で個別ファイルを再生成できる。
+いずれの形式でも、シリアライズと書き込みはバックグラウンドライターで行う。
+"""
+
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .log_writer import flush_log_writer, get_log_writer, submit_log_job
+
+LOG_FORMATS = ("files", "jsonl", "jsonl.gz")
+# none: 何も書かない / summary: 実行ごとの統計のみ / full: タスクごとの成果物 / debug: XML解析のデバッグ情報も含める
+LOG_LEVELS = ("none", "summary", "full", "debug")
+RUN_SUMMARY_FILENAME = "run_summary.jsonl"
+RUN_LOG_BASENAME = "run_log"
+INDEX_SUFFIX = ".idx"
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def get_run_log_path(logs_dir: Path, log_format: str) -> Path:
+    """ログ形式に対応する実行ログのパスを返す"""
+    return Path(logs_dir) / f"{RUN_LOG_BASENAME}.{log_format}"
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+class RunLog:
+    """追記型JSONLの実行ログ（スレッドセーフ、バッファ付き）
+
+    圧縮時はレコードごとに独立したgzipメンバーとして書き込む。
+    連結したgzipメンバーはそのままgzipとして読めるうえ、
+    インデックスのオフセットから1レコードだけを取り出して展開できる。
+    """
+
+    def __init__(self, path: Path, compress: bool = None):
+        self.path = Path(path)
+        self.compress = self.path.suffix == ".gz" if compress is None else compress
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab", buffering=WRITE_BUFFER_SIZE)
+        self._index = open(_index_path(self.path), "a", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        self._offset = os.path.getsize(self.path)
+        self.records = 0
+
+    def append(self, record: Dict) -> None:
+        """1レコードを追記し、インデックスにオフセットと長さを記録する"""
+        for artifact in record.get("artifacts", []):
+            _render_artifact(artifact)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        data = gzip.compress(line, compresslevel=6) if self.compress else line
+        with self._lock:
+            offset = self._offset
+            self._file.write(data)
+            self._offset += len(data)
+            self._index.write(f"{offset}\t{len(data)}\t{record.get('id', '')}\n")
+            self.records += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            # インデックスが本体より先に進まないよう、本体から書き出す
+            self._file.flush()
+            self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            self._index.close()
+
+
+def read_run_log_index(path: Path) -> List[Tuple[int, int, str]]:
+    """インデックスを (オフセット, 長さ, レコードID) のリストとして読み込む"""
+    entries = []
+    index_path = _index_path(Path(path))
+    if not index_path.exists():
+        return entries
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t", 2)
+            if len(parts) == 3:
+                entries.append((int(parts[0]), int(parts[1]), parts[2]))
+    return entries
+
+
+def read_run_log(path: Path, record_ids: Iterable[str] = None) -> Iterator[Dict]:
+    """インデックスを使って実行ログのレコードを順に読み出す
+
+    record_idsを指定した場合は該当するレコードだけを読み出す。
+    インデックスに記録されていない末尾（書き込み途中で中断したレコード）は読み飛ばす。
+    """
+    path = Path(path)
+    wanted = set(record_ids) if record_ids is not None else None
+    compressed = path.suffix == ".gz"
+    with open(path, "rb") as f:
+        for offset, length, record_id in read_run_log_index(path):
+            if wanted is not None and record_id not in wanted:
+                continue
+            f.seek(offset)
+            data = f.read(length)
+            if len(data) < length:
+                break
+            if compressed:
+                data = gzip.decompress(data)
+            yield json.loads(data)
+
+
+def export_run_log(path: Path, output_dir: Path, record_ids: Iterable[str] = None) -> int:
+    """実行ログのレコードから、従来と同じ個別のログファイルを再生成する
+
+    Returns:
+        書き出したファイル数
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for record in read_run_log(path, record_ids):
+        for artifact in record.get("artifacts", []):
+            _write_artifact_file(output_dir, artifact)
+            written += 1
+    return written
+
+
+# 実行中の実行ログ（Noneの場合は従来どおり個別ファイルに書き出す）
+_run_log: Optional[RunLog] = None
+_task_scope = threading.local()
+_log_level = "debug"
+
+
+def configure_log_level(level: str) -> None:
+    """書き出すログの詳細度を設定する"""
+    global _log_level
+    if level not in LOG_LEVELS:
+        raise ValueError(f"未対応のログレベルです: {level}（{', '.join(LOG_LEVELS)}）")
+    _log_level = level
+
+
+def get_log_level() -> str:
+    return _log_level
+
+
+def is_log_level_enabled(level: str) -> bool:
+    """指定した詳細度のログを書き出す設定かどうかを返す"""
+    return LOG_LEVELS.index(_log_level) >= LOG_LEVELS.index(level)
+
+
+def get_task_logs_dir(logs_dir: Optional[Path]) -> Optional[Path]:
+    """タスクごとの成果物を書き出すlogsディレクトリを返す（fullより低い詳細度ではNone）"""
+    return logs_dir if logs_dir is not None and is_log_level_enabled("full") else None
+
+
+def write_run_summary(logs_dir: Path, summary: Dict) -> None:
+    """実行ごとの統計を logs/run_summary.jsonl に1行追記する（summary以上）"""
+    if logs_dir is None or not is_log_level_enabled("summary"):
+        return
+    line = json.dumps(summary, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def append() -> None:
+        with open(Path(logs_dir) / RUN_SUMMARY_FILENAME, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    submit_log_job(append)
+
+
+def configure_run_log(logs_dir: Path = None, log_format: str = "files") -> Optional[RunLog]:
+    """ログの書き出し先を設定する（既存の実行ログは閉じる）"""
+    global _run_log
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"未対応のログ形式です: {log_format}（{', '.join(LOG_FORMATS)}）")
+    close_run_log()
+    if logs_dir is not None and log_format != "files":
+        _run_log = RunLog(get_run_log_path(logs_dir, log_format))
+        # まとめ書きごとにバッファをフラッシュし、異常終了時に失うログを抑える
+        get_log_writer().add_batch_hook(_run_log.flush)
+    return _run_log
+
+
+def get_run_log() -> Optional[RunLog]:
+    return _run_log
+
+
+def close_run_log() -> None:
+    """投入済みのログを書き出してから実行ログを閉じる"""
+    global _run_log
+    flush_log_writer()
+    if _run_log is not None:
+        get_log_writer().remove_batch_hook(_run_log.flush)
+        _run_log.close()
+        _run_log = None
+
+
+@contextmanager
+def task_log_scope(record_id: str):
+    """スコープ内で書き出されたログ成果物を1レコードにまとめて実行ログへ追記する"""
+    if _run_log is None:
+        yield
+        return
+
+    run_log = _run_log
+    _task_scope.record = {"id": record_id, "time": datetime.now().isoformat(), "artifacts": []}
+    try:
+        yield
+    finally:
+        record = _task_scope.record
+        _task_scope.record = None
+        if record["artifacts"]:
+            submit_log_job(lambda: run_log.append(record))
+
+
+def _write_artifact(artifact: Dict) -> bool:
+    """実行ログが有効なら成果物をレコードに加え、Trueを返す"""
+    if _run_log is None:
+        return False
+    record = getattr(_task_scope, "record", None)
+    if record is not None:
+        record["artifacts"].append(artifact)
+    else:
+        # タスクのスコープ外で書かれた成果物は単独のレコードにする
+        run_log = _run_log
+        record = {"id": artifact["name"], "time": datetime.now().isoformat(), "artifacts": [artifact]}
+        submit_log_job(lambda: run_log.append(record))
+    return True
+
+
+def _render_artifact(artifact: Dict) -> Dict:
+    """遅延生成のテキスト（関数として渡されたもの）を文字列に置き換える"""
+    if callable(artifact.get("text")):
+        artifact["text"] = artifact["text"]()
+    return artifact
+
+
+def _write_artifact_file(logs_dir: Path, artifact: Dict) -> None:
+    file_path = Path(logs_dir) / artifact["name"]
+    if "json" in artifact:
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(artifact["json"], f, ensure_ascii=False, indent=2)
+    else:
+        file_path.write_text(_render_artifact(artifact)["text"], encoding="utf-8")
+
+
+def write_log_json(logs_dir: Path, filename: str, data: Dict, level: str = "full") -> None:
+    """JSONのログ成果物を書き出す（整形と書き込みはバックグラウンドで行う）
+
+    levelより低い詳細度が設定されている場合は何もしない。
+    """
+    if not is_log_level_enabled(level):
+        return
+    artifact = {"name": filename, "json": data}
+    if not _write_artifact(artifact):
+        submit_log_job(lambda: _write_artifact_file(logs_dir, artifact))
+
+
+def write_log_text(logs_dir: Path, filename: str, text: Union[str, Callable[[], str]], level: str = "full") -> None:
+    """テキスト（Markdown・XMLなど）のログ成果物を書き出す
+
+    textに引数なしの関数を渡すと、本文の組み立てもバックグラウンドで行う。
+    levelより低い詳細度が設定されている場合は何もしない。
+    """
+    if not is_log_level_enabled(level):
+        return
+    artifact = {"name": filename, "text": text}
+    if not _write_artifact(artifact):
+        submit_log_job(lambda: _write_artifact_file(logs_dir, artifact))
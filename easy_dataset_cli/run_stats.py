@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+実行ごとの統計（logs/run_summary.jsonl に記録する内容）の組み立て
+
+単一ファイルの生成とバッチ処理の両方から使う。
+"""
+
+from datetime import datetime
+from typing import Dict
+
+from .generators import get_rate_limit_stats, get_response_cache, get_retry_stats
+
+
+def collect_run_stats() -> Dict[str, Dict]:
+    """レスポンスキャッシュ・レート制限・リトライの実行統計を集める"""
+    cache = get_response_cache()
+    return {
+        "cache": cache.stats() if cache is not None else None,
+        "rate_limit": get_rate_limit_stats(),
+        "retry": get_retry_stats()
+    }
+
+
+def build_run_summary(
+    source: str,
+    model: str,
+    mode: str,
+    tasks: int,
+    qa_pairs: int,
+    elapsed_seconds: float,
+    manifest_stats: Dict = None,
+    **settings
+) -> Dict:
+    """logs/run_summary.jsonl に記録する実行ごとの統計を組み立てる"""
+    return {
+        "finished_at": datetime.now().isoformat(),
+        "source": source,
+        "model": model,
+        "mode": mode,
+        "tasks": tasks,
+        "qa_pairs": qa_pairs,
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "manifest": manifest_stats,
+        "settings": settings,
+        **collect_run_stats()
+    }
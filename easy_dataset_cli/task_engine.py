@@ -0,0 +1,286 @@
+# easy_dataset_cli/task_engine.py
+"""チャンク×GAペアのQ&A生成タスクを並列実行するエンジン"""
+
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .generators import (
+    generate_qa_for_chunk_with_ga,
+    generate_qa_for_chunk_with_ga_and_fulltext,
+    generate_qa_for_chunk_with_ga_and_thinking,
+    generate_qa_for_chunk_with_surrounding_context,
+    generate_qa_for_chunk_with_multiple_ga
+)
+from .run_log import task_log_scope
+
+# 先頭タスクの完了待ちで他のワーカーが遊ばないよう、並列数より多めに投入しておく
+PENDING_TASKS_PER_WORKER = 4
+# タスクIDに含めるハッシュの桁数
+TASK_ID_DIGEST_LENGTH = 10
+
+
+def make_task_id(
+    source: str,
+    chunk_index: int,
+    chunk_hash: str,
+    ga_index: int,
+    ga_pairs: List[Dict[str, Dict[str, str]]]
+) -> str:
+    """ファイル・チャンク・GAペアから、実行をまたいで変わらない一意のタスクIDを作る
+
+    例: c00012-3f9a0b1c2d（cの後ろはチャンク番号、ハイフンの後ろは入力のハッシュ）
+    """
+    payload = json.dumps(
+        [
+            source, chunk_index, chunk_hash, ga_index,
+            [[ga_pair["genre"]["title"], ga_pair["audience"]["title"]] for ga_pair in ga_pairs]
+        ],
+        ensure_ascii=False
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:TASK_ID_DIGEST_LENGTH]
+    return f"c{chunk_index:05d}-{digest}"
+
+
+def _hash_chunk(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def build_qa_tasks(
+    chunks: Iterable[str],
+    ga_pairs: List[Dict[str, Dict[str, str]]],
+    source: str = ""
+) -> Iterator[Dict]:
+    """チャンク×GAペアのグリッドを独立したタスクに展開する
+
+    タスクはチャンク優先（chunk0×GA0, chunk0×GA1, ...）の順で生成され、
+    従来の二重ループと同じ順序になる。chunksはイテレータでもよい。
+    各タスクの"task_id"には、source（入力ファイル名）を含めたタスクIDが入る。
+    """
+    index = 0
+    for chunk_index, chunk in enumerate(chunks):
+        chunk_hash = _hash_chunk(chunk)
+        for ga_index, ga_pair in enumerate(ga_pairs):
+            yield {
+                "index": index,
+                "task_id": make_task_id(source, chunk_index, chunk_hash, ga_index, [ga_pair]),
+                "chunk_index": chunk_index,
+                "ga_index": ga_index,
+                "chunk": chunk,
+                "ga_pair": ga_pair
+            }
+            index += 1
+
+
+def build_batched_qa_tasks(
+    chunks: Iterable[str],
+    ga_pairs: List[Dict[str, Dict[str, str]]],
+    ga_batch_size: int,
+    source: str = ""
+) -> Iterator[Dict]:
+    """チャンクごとにGAペアをga_batch_size個ずつまとめたタスクを生成する
+
+    各タスクの"ga_pairs"にまとめたGAペア、"ga_index"に先頭GAペアの番号が入る。
+    """
+    index = 0
+    for chunk_index, chunk in enumerate(chunks):
+        chunk_hash = _hash_chunk(chunk)
+        for start in range(0, len(ga_pairs), ga_batch_size):
+            batch = ga_pairs[start:start + ga_batch_size]
+            yield {
+                "index": index,
+                "task_id": make_task_id(source, chunk_index, chunk_hash, start, batch),
+                "chunk_index": chunk_index,
+                "ga_index": start,
+                "chunk": chunk,
+                "ga_pairs": batch
+            }
+            index += 1
+
+
+def count_task_cells(task: Dict) -> int:
+    """タスクが担当するチャンク×GAペアのセル数を返す（進捗表示用）"""
+    return len(task["ga_pairs"]) if "ga_pairs" in task else 1
+
+
+def expand_task_results(task: Dict, result: List) -> Iterator[Tuple[Dict, List[Dict[str, str]]]]:
+    """タスクの結果をGAペアごとの (タスク, Q&Aペアのリスト) に展開する
+
+    GAペアをまとめたタスクの場合は、GAペアの順に1件ずつのタスクとして返す。
+    """
+    if "ga_pairs" not in task:
+        yield task, result
+        return
+
+    for offset, (ga_pair, qa_pairs) in enumerate(zip(task["ga_pairs"], result)):
+        yield {
+            "index": task["index"],
+            "task_id": task.get("task_id"),
+            "chunk_index": task["chunk_index"],
+            "ga_index": task["ga_index"] + offset,
+            "chunk": task["chunk"],
+            "ga_pair": ga_pair
+        }, qa_pairs
+
+
+def get_task_log_id(task: Dict) -> str:
+    """ログ成果物のファイル名と実行ログのレコードIDに使う識別子を返す
+
+    タスクIDに試行回数を付けたもの（例: c00012-3f9a0b1c2d-a1）で、
+    並列実行時や再実行時にも他のタスク・試行のログを上書きしない。
+    """
+    if not task.get("task_id"):
+        return f"c{task['chunk_index']:05d}-g{task['ga_index']:03d}"
+    return f"{task['task_id']}-a{task.get('attempt', 1)}"
+
+
+def _with_task_log(run_task: Callable[[Dict], List]) -> Callable[[Dict], List]:
+    """1タスク分のログ成果物を実行ログの1レコードにまとめるようにする"""
+
+    def run(task: Dict) -> List:
+        with task_log_scope(get_task_log_id(task)):
+            return run_task(task)
+
+    return run
+
+
+def create_batched_qa_task_runner(
+    model: str,
+    logs_dir: Path = None,
+    num_qa_pairs: int = None
+) -> Callable[[Dict], List[List[Dict[str, str]]]]:
+    """まとめたタスクを1回のリクエストで処理し、GAペアごとのQ&Aペアを返す関数を返す"""
+
+    def run_task(task: Dict) -> List[List[Dict[str, str]]]:
+        return generate_qa_for_chunk_with_multiple_ga(
+            task["chunk"],
+            model=model,
+            ga_pairs=task["ga_pairs"],
+            logs_dir=logs_dir,
+            num_qa_pairs=num_qa_pairs,
+            task_id=get_task_log_id(task)
+        )
+
+    return _with_task_log(run_task)
+
+
+def create_qa_task_runner(
+    model: str,
+    logs_dir: Path = None,
+    num_qa_pairs: int = None,
+    full_text: str = "",
+    use_fulltext: bool = False,
+    use_thinking: bool = False,
+    use_surrounding_context: bool = False
+) -> Callable[[Dict], List[Dict[str, str]]]:
+    """生成モードに応じて1タスクを処理する関数を返す"""
+
+    def run_task(task: Dict) -> List[Dict[str, str]]:
+        task_id = get_task_log_id(task)
+        if use_surrounding_context:
+            return generate_qa_for_chunk_with_surrounding_context(
+                content=task["chunk"],
+                model=model,
+                ga_pair=task["ga_pair"],
+                logs_dir=logs_dir,
+                num_qa_pairs=num_qa_pairs,
+                task_id=task_id
+            )
+        if use_thinking:
+            return generate_qa_for_chunk_with_ga_and_thinking(
+                chunk=task["chunk"],
+                full_text=full_text if use_fulltext else "",
+                model=model,
+                ga_pair=task["ga_pair"],
+                logs_dir=logs_dir,
+                num_qa_pairs=num_qa_pairs,
+                task_id=task_id
+            )
+        if use_fulltext:
+            return generate_qa_for_chunk_with_ga_and_fulltext(
+                chunk=task["chunk"],
+                full_text=full_text,
+                model=model,
+                ga_pair=task["ga_pair"],
+                logs_dir=logs_dir,
+                num_qa_pairs=num_qa_pairs,
+                task_id=task_id
+            )
+        return generate_qa_for_chunk_with_ga(
+            task["chunk"], model=model, ga_pair=task["ga_pair"],
+            logs_dir=logs_dir,
+            num_qa_pairs=num_qa_pairs,
+            task_id=task_id
+        )
+
+    return _with_task_log(run_task)
+
+
+def run_qa_tasks(
+    tasks: Iterable[Dict],
+    runner: Callable[[Dict], List[Dict[str, str]]],
+    concurrency: int = 1,
+    on_task_done: Callable[[Dict, List[Dict[str, str]]], None] = None
+) -> Iterator[Tuple[Dict, List[Dict[str, str]]]]:
+    """タスクを最大concurrency並列で実行し、(タスク, Q&Aペアのリスト)をタスク順に返す
+
+    完了順に関わらず結果は投入順に返されるため、出力の順序は逐次実行時と同じになる。
+    on_task_doneは各タスクの完了直後（ワーカースレッド上）に呼ばれる。
+    """
+    if concurrency <= 1:
+        for task in tasks:
+            qa_pairs = runner(task)
+            if on_task_done:
+                on_task_done(task, qa_pairs)
+            yield task, qa_pairs
+        return
+
+    max_pending = concurrency * PENDING_TASKS_PER_WORKER
+    task_iter = iter(tasks)
+    pending = deque()
+    exhausted = False
+
+    def notify(future, task):
+        if future.cancelled() or future.exception() is not None:
+            return
+        on_task_done(task, future.result())
+
+    def submit(executor, task):
+        future = executor.submit(runner, task)
+        if on_task_done:
+            future.add_done_callback(lambda f, t=task: notify(f, t))
+        pending.append((task, future))
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qa-task")
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    submit(executor, next(task_iter))
+                except StopIteration:
+                    exhausted = True
+
+            if not pending:
+                break
+
+            task, future = pending.popleft()
+            yield task, future.result()
+    finally:
+        # 途中で例外や中断が起きた場合は未着手のタスクを破棄する
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_qa_entries(ga_pair: Dict[str, Dict[str, str]], qa_pairs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """生成されたQ&AペアにGenre/Audience情報を付与する"""
+    return [
+        {
+            "genre": ga_pair['genre']['title'],
+            "audience": ga_pair['audience']['title'],
+            "question": pair['question'],
+            "answer": pair['answer']  # <think>...</think>回答...形式がそのまま入る
+        }
+        for pair in qa_pairs
+    ]
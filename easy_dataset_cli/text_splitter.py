@@ -1,20 +1,271 @@
 # easy_dataset_cli/text_splitter.py
 """テキスト分割関連機能"""
 
-from typing import List, Tuple
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import re
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, TextIO, Tuple
 
+from .token_counter import get_length_function
 
-def split_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
-    """LangChainのTextSplitterを使ってテキストをチャンクに分割する"""
+# RecursiveCharacterTextSplitterの既定の区切り文字（段落・改行・空白・1文字）
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+# ファイルを分割しながら読み込むときに1回に読む文字数
+READ_BLOCK_SIZE = 1024 * 1024
+# split_textの分割方式（native: 組み込みの実装 / langchain: LangChainのRecursiveCharacterTextSplitter /
+# ja: 日本語の文境界で分割 / markdown: Markdownの見出し・ブロック単位で分割）
+SPLITTERS = ("native", "langchain", "ja", "markdown")
+# 日本語の文末（句点・感嘆符・疑問符と、それに続く閉じかっこ）と改行の連続
+JA_SENTENCE_END = re.compile(r"[。！？!?]+[」』）)]*|\n+")
+
+
+def split_text(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    splitter: str = "native",
+    length_unit: str = "chars"
+) -> List[str]:
+    """テキストをチャンクに分割する
+
+    既定の組み込み実装はLangChainのRecursiveCharacterTextSplitterと同じチャンクを返し、
+    LangChainのインポートやDocumentの生成を行わない。
+    length_unitに"tokens"を指定すると、chunk_size・chunk_overlapを推定トークン数として扱う。
+    """
+    if splitter not in SPLITTERS:
+        raise ValueError(f"未対応の分割方式です: {splitter}（{', '.join(SPLITTERS)}）")
+    _check_chunk_params(chunk_size, chunk_overlap)
+    length_function = get_length_function(length_unit)
+    if splitter == "langchain":
+        return _split_text_langchain(text, chunk_size, chunk_overlap, length_function)
+    if splitter == "ja":
+        return list(_split_japanese(text, chunk_size, chunk_overlap, length_function))
+    if splitter == "markdown":
+        from .markdown_splitter import iter_markdown_chunks
+        return [chunk.text for chunk in iter_markdown_chunks(text, chunk_size, chunk_overlap, length_function)]
+    return list(_recursive_split(text, DEFAULT_SEPARATORS, chunk_size, chunk_overlap, length_function))
+
+
+def _split_text_langchain(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len
+) -> List[str]:
+    """LangChainのTextSplitterを使ってテキストをチャンクに分割する（比較・互換用）"""
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError as e:
+        raise RuntimeError(
+            "--splitter langchain を使用するには langchain-text-splitters が必要です（pip install easy-dataset-cli[langchain]）"
+        ) from e
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        length_function=len,
+        length_function=length_function,
         is_separator_regex=False,
     )
-    docs = text_splitter.create_documents([text])
-    return [doc.page_content for doc in docs]
+    return text_splitter.split_text(text)
+
+
+def _check_chunk_params(chunk_size: int, chunk_overlap: int) -> None:
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"チャンク間のオーバーラップ（{chunk_overlap}）がチャンクサイズ（{chunk_size}）より大きくなっています。")
+
+
+class _ChunkMerger:
+    """区切り済みの断片をchunk_sizeまで詰めてチャンクにする（RecursiveCharacterTextSplitterの_merge_splitsと同じ規則）
+
+    断片を1つずつ受け取り、確定したチャンクから順に返すため、断片の列全体を保持しない。
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, length_function: Callable[[str], int] = len):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
+        self._current = deque()
+        self._total = 0
+
+    def _join(self) -> str:
+        # 区切り文字は断片の先頭に残しているため、そのまま連結して前後の空白を除く
+        return "".join(text for text, _ in self._current).strip()
+
+    def add(self, split: str, length: int = None) -> Iterator[str]:
+        if length is None:
+            length = self.length_function(split)
+        if self._total + length > self.chunk_size and self._current:
+            chunk = self._join()
+            if chunk:
+                yield chunk
+            # オーバーラップ分だけを残し、次の断片が収まるまで先頭から捨てる
+            while self._total > self.chunk_overlap or (
+                self._total + length > self.chunk_size and self._total > 0
+            ):
+                _, dropped = self._current.popleft()
+                self._total -= dropped
+        self._current.append((split, length))
+        self._total += length
+
+    def flush(self) -> Iterator[str]:
+        if self._current:
+            chunk = self._join()
+            if chunk:
+                yield chunk
+        self._current.clear()
+        self._total = 0
+
+
+def _split_keeping_separator(text: str, separator: str) -> List[str]:
+    """区切り文字を後ろの断片の先頭に残して分割する（空の断片は除く）"""
+    if not separator:
+        return list(text)
+    parts = text.split(separator)
+    splits = [parts[0]] + [separator + part for part in parts[1:]]
+    return [split for split in splits if split]
+
+
+def _split_pieces(
+    pieces: Iterable[str],
+    separators: List[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int]
+) -> Iterator[str]:
+    """断片をチャンクに詰め、chunk_size以上の断片は次の区切り文字で分割し直す"""
+    merger = _ChunkMerger(chunk_size, chunk_overlap, length_function)
+    for piece in pieces:
+        length = length_function(piece)
+        if length < chunk_size:
+            yield from merger.add(piece, length)
+            continue
+        yield from merger.flush()
+        if not separators:
+            yield piece
+        else:
+            yield from _recursive_split(piece, separators, chunk_size, chunk_overlap, length_function)
+    yield from merger.flush()
+
+
+def _recursive_split(
+    text: str,
+    separators: List[str],
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len
+) -> Iterator[str]:
+    """テキストに含まれる最初の区切り文字で分割し、RecursiveCharacterTextSplitterと同じチャンクを返す"""
+    separator = separators[-1]
+    remaining = []
+    for i, candidate in enumerate(separators):
+        if not candidate:
+            separator = candidate
+            break
+        if candidate in text:
+            separator = candidate
+            remaining = separators[i + 1:]
+            break
+    pieces = _split_keeping_separator(text, separator)
+    yield from _split_pieces(pieces, remaining, chunk_size, chunk_overlap, length_function)
+
+
+def build_sentence_boundaries(text: str) -> List[int]:
+    """文の終わりの位置（文末記号・改行の直後）を1回の走査で求める（末尾が文末でなければテキスト長を加える）"""
+    boundaries = [match.end() for match in JA_SENTENCE_END.finditer(text)]
+    if text and (not boundaries or boundaries[-1] != len(text)):
+        boundaries.append(len(text))
+    return boundaries
+
+
+def _split_japanese(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    length_function: Callable[[str], int] = len
+) -> Iterator[str]:
+    """日本語の文を単位にchunk_sizeまで詰めてチャンクにする
+
+    オーバーラップも文単位になり、文の途中で切れない。chunk_size以上の文だけは改行・空白・1文字で分割する。
+    """
+    boundaries = build_sentence_boundaries(text)
+    sentences = (text[start:end] for start, end in zip([0] + boundaries, boundaries))
+    yield from _split_pieces(sentences, DEFAULT_SEPARATORS[1:], chunk_size, chunk_overlap, length_function)
+
+
+def _iter_stream_pieces(f: TextIO, separator: str, buffer: str, block_size: int) -> Iterator[str]:
+    """ストリームを読み進めながら、区切り文字を先頭に残した断片を1つずつ返す
+
+    bufferには読み込み済みの先頭部分を渡す。未確定の最後の断片だけをメモリに持つ。
+    """
+    start = 0
+    search_from = 0
+    while True:
+        index = buffer.find(separator, search_from)
+        if index == -1:
+            block = f.read(block_size)
+            if not block:
+                break
+            # 区切り文字がブロックの境目をまたぐ場合に備え、末尾の数文字は探し直す
+            search_from = max(search_from, len(buffer) - len(separator) + 1) - start
+            buffer = buffer[start:] + block
+            start = 0
+            continue
+        if index > start:
+            yield buffer[start:index]
+        start = index
+        search_from = index + len(separator)
+    if start < len(buffer):
+        yield buffer[start:]
+
+
+def iter_split_file(
+    file_path: Path,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding: str = "utf-8",
+    block_size: int = READ_BLOCK_SIZE,
+    length_unit: str = "chars"
+) -> Iterator[str]:
+    """ファイルを読み込みながらチャンクに分割し、確定したチャンクから順に返す
+
+    read_text() → split_text() と同じチャンクになる。ファイル全体・全チャンクをメモリに持たないため、
+    数GBの入力でも先頭のチャンクからすぐにQ&A生成を始められる。
+    段落区切り（空行）が1つもないファイルは、全体を読み込んでから分割する。
+    """
+    _check_chunk_params(chunk_size, chunk_overlap)
+    length_function = get_length_function(length_unit)
+    separator = DEFAULT_SEPARATORS[0]
+    with open(file_path, "r", encoding=encoding) as f:
+        # 最初の段落区切りが見つかれば、最上位の区切り文字は段落区切りに決まる
+        blocks = []
+        tail = ""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                yield from _recursive_split("".join(blocks), DEFAULT_SEPARATORS, chunk_size, chunk_overlap, length_function)
+                return
+            blocks.append(block)
+            if separator in tail + block:
+                break
+            tail = block[-(len(separator) - 1):]
+
+        pieces = _iter_stream_pieces(f, separator, "".join(blocks), block_size)
+        yield from _split_pieces(pieces, DEFAULT_SEPARATORS[1:], chunk_size, chunk_overlap, length_function)
+
+
+class ChunkCounter:
+    """チャンクのイテレータを包み、取り出したチャンク数を数える（逐次分割では総数が最後まで分からないため）"""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self.count = 0
+
+    def __iter__(self) -> "ChunkCounter":
+        return self
+
+    def __next__(self) -> str:
+        chunk = next(self._chunks)
+        self.count += 1
+        return chunk
 
 
 def get_chunk_with_surrounding_context(
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+高速なトークン数推定（チャンクサイズの--chunk-unit tokensとレート制限のTPM予約で共通）
+
+トークナイザーを読み込まずに、文字の種類ごとの平均トークン数から推定する。
+係数はOpenAIのcl100k_base / o200k_baseでの日本語・英語の実測値の間に合わせ、やや多めに見積もる。
+分割では同じ断片の長さを何度も測るため、断片ごとの推定値をキャッシュする（cached_estimate_tokens）。
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Callable, Dict
+
+# チャンクサイズの単位（chars: 文字数 / tokens: 推定トークン数）
+LENGTH_UNITS = ("chars", "tokens")
+
+# 英数字の連続は約4文字で1トークン
+ASCII_WORD = re.compile(r"[A-Za-z0-9]+")
+ASCII_CHARS_PER_TOKEN = 4
+# 記号は1文字1トークン、改行の連続は1トークン（空白は後続の単語に含まれる）
+ASCII_SYMBOL = re.compile(r"[!-/:-@\[-`{-~]")
+NEWLINES = re.compile(r"\n+")
+# ひらがな・カタカナは複数文字で1トークンになることが多い
+KANA = re.compile(r"[぀-ヿ]")
+KANA_TOKENS_PER_CHAR = 0.75
+# 漢字・全角記号などその他の非ASCII文字は1文字1トークン
+OTHER_CHAR = re.compile(r"[^\x00-\x7f぀-ヿ]")
+
+# 推定値をキャッシュする断片の数
+TOKEN_CACHE_SIZE = 8192
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数を推定する（空文字列は0）"""
+    if not text:
+        return 0
+    tokens = sum(-(-len(word) // ASCII_CHARS_PER_TOKEN) for word in ASCII_WORD.findall(text))
+    tokens += len(ASCII_SYMBOL.findall(text)) + len(NEWLINES.findall(text))
+    tokens += len(KANA.findall(text)) * KANA_TOKENS_PER_CHAR
+    tokens += len(OTHER_CHAR.findall(text))
+    return math.ceil(tokens)
+
+
+# 分割用（プロンプト全体のような一度しか測らない長い文字列はキャッシュしない）
+cached_estimate_tokens = lru_cache(maxsize=TOKEN_CACHE_SIZE)(estimate_tokens)
+
+LENGTH_FUNCTIONS: Dict[str, Callable[[str], int]] = {
+    "chars": len,
+    "tokens": cached_estimate_tokens,
+}
+
+
+def get_length_function(length_unit: str) -> Callable[[str], int]:
+    """チャンクサイズの単位に対応する長さの関数を返す"""
+    if length_unit not in LENGTH_FUNCTIONS:
+        raise ValueError(f"未対応のチャンクサイズの単位です: {length_unit}（{', '.join(LENGTH_UNITS)}）")
+    return LENGTH_FUNCTIONS[length_unit]
@@ -2,10 +2,10 @@
 """ユーティリティ関数"""
 
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 from pathlib import Path
 from typing import List, Dict
 from .core import parse_ga_markdown_fallback
+from .xml_writer import to_pretty_xml
 
 
 def convert_markdown_ga_to_xml(markdown_file: Path, xml_file: Path) -> None:
@@ -35,8 +35,6 @@ def convert_markdown_ga_to_xml(markdown_file: Path, xml_file: Path) -> None:
         audience_desc_elem.text = pair['audience']['description']
     
     # 整形されたXMLとして保存
-    rough_string = ET.tostring(root, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    xml_content = reparsed.toprettyxml(indent="  ")
+    xml_content = to_pretty_xml(root)
     
     xml_file.write_text(xml_content, encoding="utf-8")
\ No newline at end of file
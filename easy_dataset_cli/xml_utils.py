@@ -1,15 +1,29 @@
 # easy_dataset_cli/xml_utils.py
 """XML処理関連のユーティリティ"""
 
+import io
+import itertools
+import os
+import re
+import shutil
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from collections import defaultdict
-from typing import List, Dict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Set, Tuple
 from pathlib import Path
 from rich.console import Console
 
+from .file_utils import sanitize_filename
+from .qa_store import QAStore
+from .xml_writer import XMLStreamWriter, append_pretty_elements
+
 console = Console()
 
+# ログファイル名末尾のタスクID（例: c00012-3f9a0b1c2d-a1）
+TASK_ID_PATTERN = re.compile(r"^c\d+-[0-9a-z]+(?:-[0-9a-z]+)*$")
+# 並列に読み込むXMLファイルの合計サイズの下限（これ未満ではプロセスの起動コストの方が大きい）
+PARALLEL_PARSE_MIN_BYTES = 8 * 1024 * 1024
+
 
 def parse_ga_from_text_fallback(content: str) -> List[Dict[str, Dict[str, str]]]:
     """XMLパースに失敗した場合のフォールバック：テキストから直接解析"""
@@ -180,6 +194,140 @@ def load_existing_xml_file(xml_file_path: Path) -> List[Dict[str, str]]:
     return qa_pairs
 
 
+def load_existing_questions(xml_file_path: Path) -> Set[str]:
+    """既存のXMLファイルから質問文だけを読み込む（重複チェック用、要素は読み捨てる）"""
+    questions = set()
+    try:
+        for _, elem in ET.iterparse(str(xml_file_path)):
+            if elem.tag == "Question":
+                questions.add(elem.text or "")
+            elif elem.tag == "Pair":
+                elem.clear()
+    except Exception as e:
+        console.print(f"[yellow]既存XMLファイルの読み込みに失敗: {e}[/yellow]")
+    return questions
+
+
+def _answer_inner_text(answer_elem: ET.Element) -> str:
+    """Answer要素の内容を「<think>思考</think>回答」の形式の文字列に戻す
+
+    <think>は子要素として書き出されるため、answer_elem.textだけでは思考部分と回答が失われる。
+    """
+    children = list(answer_elem)
+    if not children:
+        return answer_elem.text or ""
+    # 整形時に入ったインデントを取り除く
+    parts = [(answer_elem.text or "").strip()]
+    for child in children:
+        parts.append(f"<{child.tag}>{child.text or ''}</{child.tag}>")
+        parts.append((child.tail or "").strip())
+    return "".join(parts)
+
+
+def iter_qa_pairs_from_xml(xml_file_path: Path) -> Iterator[Dict[str, str]]:
+    """Genre別XMLのQ&Aペアを1件ずつ返す（iterparseで読み、処理済みの要素は破棄する）"""
+    root = None
+    genre = "Unknown"
+    for event, elem in ET.iterparse(str(xml_file_path), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                genre = elem.get("genre", "Unknown")
+            continue
+        if elem.tag != "Pair":
+            continue
+
+        audience_elem = elem.find("Audience")
+        question_elem = elem.find("Question")
+        answer_elem = elem.find("Answer")
+        if all([audience_elem is not None, question_elem is not None, answer_elem is not None]):
+            yield {
+                "genre": genre,
+                "audience": audience_elem.text or "",
+                "question": question_elem.text or "",
+                "answer": _answer_inner_text(answer_elem)
+            }
+        # 読み終えたPairをルートから外し、メモリ使用量をファイルサイズに依存させない
+        root.clear()
+
+
+def load_qa_pairs_from_xml(xml_file_path: Path) -> List[Dict[str, str]]:
+    """Genre別XMLのQ&Aペアを読み込む（解析エラーの場合は表示して、読めた分までを返す）"""
+    qa_pairs = []
+    try:
+        for qa_pair in iter_qa_pairs_from_xml(xml_file_path):
+            qa_pairs.append(qa_pair)
+    except ET.ParseError as e:
+        console.print(f"[bold red]XMLファイルの解析エラー:[/bold red] {xml_file_path.name}: {e}")
+    except Exception as e:
+        console.print(f"[bold red]予期しないエラー:[/bold red] {xml_file_path.name}: {e}")
+    return qa_pairs
+
+
+def _backup_file(file_path: Path) -> Path:
+    """ファイルを <名前>.bak（既にあれば .bak1, .bak2, ...）にコピーする"""
+    backup_path = file_path.with_name(file_path.name + ".bak")
+    index = 1
+    while backup_path.exists():
+        backup_path = file_path.with_name(f"{file_path.name}.bak{index}")
+        index += 1
+    shutil.copy2(file_path, backup_path)
+    return backup_path
+
+
+def salvage_qa_pairs_from_xml(xml_file_path: Path) -> List[Dict[str, str]]:
+    """閉じタグで終わっていないGenre別XMLから、読み取れたQ&Aペアを取り出す（書き直す前に使う）
+
+    中断された実行で<Pair>の途中までしか書かれていないファイルでも、解析エラーの手前までの完全なペアを返す。
+    解析エラーがあった場合は、読み取れなかった部分を失わないように元のファイルを .bak にコピーしておく。
+    回答の<think>は「<think>思考</think>回答」の形式で返す。
+    """
+    qa_pairs = []
+    try:
+        for qa_pair in iter_qa_pairs_from_xml(xml_file_path):
+            qa_pairs.append(qa_pair)
+    except Exception as e:
+        backup_path = _backup_file(xml_file_path)
+        console.print(
+            f"[yellow]{xml_file_path.name} は途中までしか読み取れませんでした（{e}）。"
+            f"読み取れた{len(qa_pairs)}件を残して書き直し、元のファイルを {backup_path.name} に保存しました。[/yellow]"
+        )
+    return qa_pairs
+
+
+def iter_qa_pairs_from_xml_files(
+    xml_files: List[Path],
+    max_workers: int = None
+) -> Iterator[Tuple[Path, List[Dict[str, str]]]]:
+    """複数のGenre別XMLをプロセスプールで並列に読み込み、ファイルの順に (パス, Q&Aペア) を返す
+
+    処理中のファイルはワーカー数の2倍までに抑え、読み終えた結果を溜め込まない。
+    max_workersを指定しない場合は、合計サイズがPARALLEL_PARSE_MIN_BYTES以上のときだけCPU数まで並列化する。
+    """
+    if max_workers is None:
+        total_bytes = sum(xml_file.stat().st_size for xml_file in xml_files)
+        max_workers = (os.cpu_count() or 1) if total_bytes >= PARALLEL_PARSE_MIN_BYTES else 1
+    max_workers = min(max_workers, len(xml_files))
+    if max_workers <= 1:
+        for xml_file in xml_files:
+            yield xml_file, load_qa_pairs_from_xml(xml_file)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        remaining = iter(xml_files)
+        pending = deque(
+            (xml_file, executor.submit(load_qa_pairs_from_xml, xml_file))
+            for xml_file in itertools.islice(remaining, max_workers * 2)
+        )
+        while pending:
+            xml_file, future = pending.popleft()
+            qa_pairs = future.result()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                pending.append((next_file, executor.submit(load_qa_pairs_from_xml, next_file)))
+            yield xml_file, qa_pairs
+
+
 def load_existing_xml_file_with_fallback(xml_file_path: Path, genre_from_filename: str = None) -> List[Dict[str, str]]:
     """既存のXMLファイルからQ&Aペアを読み込み、ファイル名からジャンル情報を取得するフォールバック関数"""
     qa_pairs = []
@@ -220,8 +368,11 @@ def load_existing_xml_file_with_fallback(xml_file_path: Path, genre_from_filenam
     return qa_pairs
 
 
-def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path) -> None:
-    """logsフォルダ内のXMLファイルを集約してqaフォルダの既存XMLファイルを更新・追加する"""
+def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path, store: QAStore = None) -> None:
+    """logsフォルダ内のXMLファイルを集約してqaフォルダの既存XMLファイルを更新・追加する
+
+    storeを指定した場合は、重複チェックをQ&Aストアのインデックスで行い、新しいペアをストアにも記録する。
+    """
     from rich.console import Console
     
     console = Console()
@@ -247,16 +398,19 @@ def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path) -> None:
         try:
             console.print(f"[dim]処理中: {xml_file.name}[/dim]")
             
-            # ファイル名からGenre情報を抽出（例: qa_pairs_FAQ_初心者ゲーマー_20250815_171008.xml）
+            # ファイル名からGenre情報を抽出
+            # （例: qa_pairs_FAQ_初心者ゲーマー_c00012-3f9a0b1c2d-a1.xml、
+            #   旧形式: qa_pairs_FAQ_初心者ゲーマー_20250815_171008.xml）
             filename = xml_file.stem
             if filename.startswith("qa_pairs_"):
                 # GenreとAudience情報を抽出
                 parts = filename.replace("qa_pairs_", "").split("_")
-                if len(parts) >= 3:  # genre + audience + timestamp + timestamp
+                if len(parts) >= 3:  # genre + audience + タスクID（旧形式はtimestamp + timestamp）
                     genre = parts[0]
                     # 残りの部分はAudience（_で区切られている可能性がある）
-                    # 最後の2要素はタイムスタンプなので除外
-                    audience = "_".join(parts[1:-2])
+                    # 末尾のタスクID（旧形式では最後の2要素のタイムスタンプ）は除外
+                    id_parts = 1 if TASK_ID_PATTERN.match(parts[-1]) else 2
+                    audience = "_".join(parts[1:-id_parts])
                     
                     console.print(f"[dim]ファイル名解析: genre={genre}, audience={audience}[/dim]")
                     
@@ -269,6 +423,7 @@ def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path) -> None:
                     for qa_pair in qa_pairs:
                         qa_pair["genre"] = genre
                         qa_pair["audience"] = audience
+                        qa_pair["source"] = xml_file.name
                         genre_qa_pairs[genre].append(qa_pair)
                 else:
                     console.print(f"[yellow]ファイル名の解析に失敗: {filename}[/yellow]")
@@ -288,50 +443,38 @@ def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path) -> None:
         safe_genre_name = "".join(c for c in genre if c.isalnum() or c in (' ', '_', '-')).strip().replace(' ', '_')
         existing_file = qa_dir / f"{safe_genre_name}.xml"
         
-        # 既存のQ&Aペアを読み込む（ファイルが存在する場合）
-        existing_pairs = []
-        if existing_file.exists():
-            existing_pairs = load_existing_xml_file(existing_file)
-            console.print(f"    [dim]既存の{len(existing_pairs)}件のQ&Aを読み込み[/dim]")
+        # 既存の質問を読み込む（ファイルが存在する場合、重複チェックに必要な質問文だけ）
+        # （Q&Aストアを使う場合はインデックスで確認するため読み込まない）
+        existing_questions = set()
+        if store is None and existing_file.exists():
+            existing_questions = load_existing_questions(existing_file)
+            console.print(f"    [dim]既存の{len(existing_questions)}件のQ&Aを読み込み[/dim]")
         
         # 新しいQ&Aを追加（重複を避ける）
-        existing_questions = {pair["question"] for pair in existing_pairs}
         new_pairs = []
         for pair in qa_pairs:
-            if pair["question"] not in existing_questions:
+            if store is not None:
+                is_duplicate = store.has_question(genre, pair["question"])
+            else:
+                is_duplicate = pair["question"] in existing_questions
+            if not is_duplicate:
                 new_pairs.append(pair)
             else:
                 console.print(f"    [yellow]重複するQ&Aをスキップ: {pair['question'][:50]}...[/yellow]")
         
         console.print(f"    [green]追加する新しいQ&A: {len(new_pairs)}件[/green]")
         
-        # 既存のペアに新しいペアを追加
-        updated_pairs = existing_pairs + new_pairs
-        
-        if updated_pairs:
-            # XMLに変換
-            root = ET.Element("QAPairs")
-            root.set("genre", genre)
-
-            for item in updated_pairs:
-                pair_elem = ET.SubElement(root, "Pair")
-
-                audience_elem = ET.SubElement(pair_elem, "Audience")
-                audience_elem.text = item["audience"]
-
-                question_elem = ET.SubElement(pair_elem, "Question")
-                question_elem.text = item["question"]
-
-                answer_elem = ET.SubElement(pair_elem, "Answer")
-                answer_elem.text = item["answer"]
-
-            # 整形して保存
-            rough_string = ET.tostring(root, 'utf-8')
-            reparsed = minidom.parseString(rough_string)
-            xml_content = reparsed.toprettyxml(indent="  ")
-            
-            existing_file.write_text(xml_content, encoding='utf-8')
-            console.print(f"    [green]✓[/green] {existing_file.name} を更新 ({len(updated_pairs)}件)")
+        if new_pairs:
+            if store is not None:
+                store.add_pairs(new_pairs)
+            # 既存ファイルには新しいペアだけを末尾に追記する
+            _append_or_write_qa_pairs_file(
+                existing_file, genre,
+                [_build_pair_element(item, parse_think=False) for item in new_pairs]
+            )
+            console.print(
+                f"    [green]✓[/green] {existing_file.name} を更新 ({len(existing_questions) + len(new_pairs)}件)"
+            )
             total_updated += 1
         else:
             console.print(f"    [yellow]更新するQ&Aがありません[/yellow]")
@@ -339,6 +482,86 @@ def aggregate_logs_xml_to_qa(logs_dir: Path, qa_dir: Path) -> None:
     console.print(f"\n[bold green]✓[/bold green] 合計{total_updated}個のジャンルのXMLファイルを更新しました")
 
 
+def _build_pair_element(item: Dict[str, str], parse_think: bool = True) -> ET.Element:
+    """1件のQ&AペアをPair要素にする（parse_thinkがTrueなら<think>をサブエレメントにする）"""
+    pair_elem = ET.Element("Pair")
+
+    audience_elem = ET.SubElement(pair_elem, "Audience")
+    audience_elem.text = item["audience"]
+
+    question_elem = ET.SubElement(pair_elem, "Question")
+    question_elem.text = item["question"]
+
+    answer_elem = ET.SubElement(pair_elem, "Answer")
+    if not parse_think:
+        answer_elem.text = item["answer"]
+        return pair_elem
+
+    # 回答内容を解析
+    parsed_answer = _parse_answer_with_think(item["answer"])
+
+    if parsed_answer["has_think"]:
+        # <think>をサブエレメントとして追加
+        think_elem = ET.SubElement(answer_elem, "think")
+        think_elem.text = parsed_answer["think_content"]
+        think_elem.tail = parsed_answer["answer_content"]
+    else:
+        # 通常の回答
+        answer_elem.text = parsed_answer["answer_content"]
+
+    return pair_elem
+
+
+def _write_qa_pairs_file(file_path: Path, genre: str, pair_elems: Iterable[ET.Element]) -> None:
+    """Genre別XMLを一時ファイルに書き出してから置き換える（書き込み途中で既存ファイルを壊さない）"""
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        with XMLStreamWriter(f, "QAPairs", {"genre": genre}) as writer:
+            writer.write_all(pair_elems)
+    temp_path.replace(file_path)
+
+
+def _append_or_write_qa_pairs_file(file_path: Path, genre: str, pair_elems: List[ET.Element]) -> None:
+    """既存のGenre別XMLの末尾にPairを追記する
+
+    ファイルがない場合や閉じタグで終わっていない場合は、既存のペアを読み込んで全体を書き直す
+    （途中で切れたファイルは読み取れたペアを残し、元のファイルを .bak に保存する）。
+    """
+    if file_path.exists():
+        if append_pretty_elements(file_path, "QAPairs", pair_elems):
+            return
+        existing_elems = [_build_pair_element(item) for item in salvage_qa_pairs_from_xml(file_path)]
+        pair_elems = existing_elems + pair_elems
+    _write_qa_pairs_file(file_path, genre, pair_elems)
+
+
+def _group_pairs_by_genre(
+    all_qa_pairs: List[Dict[str, str]],
+    qa_dir: Path = None,
+    append_mode: bool = False
+) -> Dict[str, List[Dict[str, str]]]:
+    """Q&AペアをGenreごとにまとめる（追加モードでは既存ファイルのペアを先頭に加える）"""
+    grouped_by_genre = defaultdict(list)
+
+    for item in all_qa_pairs:
+        grouped_by_genre[item["genre"]].append(item)
+
+    if not (append_mode and qa_dir):
+        return grouped_by_genre
+
+    for genre, pairs in grouped_by_genre.items():
+        safe_genre_name = "".join(c for c in genre if c.isalnum() or c in (' ', '_', '-')).strip().replace(' ', '_')
+        existing_file = qa_dir / f"{safe_genre_name}.xml"
+
+        if existing_file.exists():
+            existing_pairs = load_qa_pairs_from_xml(existing_file)
+            console.print(f"[dim]Genre '{genre}': 既存の{len(existing_pairs)}件のQ&Aを読み込みました[/dim]")
+            # 既存のペアを先頭に追加
+            grouped_by_genre[genre] = existing_pairs + pairs
+
+    return grouped_by_genre
+
+
 def convert_to_xml_by_genre(all_qa_pairs: List[Dict[str, str]], qa_dir: Path = None, append_mode: bool = False) -> Dict[str, str]:
     """Q&AペアのリストをGenreごとにグループ化し、整形されたXML文字列の辞書に変換する
     
@@ -347,55 +570,33 @@ def convert_to_xml_by_genre(all_qa_pairs: List[Dict[str, str]], qa_dir: Path = N
         qa_dir: QAファイルが保存されているディレクトリ（追加モードの場合に必要）
         append_mode: 既存ファイルに追加するかどうか
     """
-    grouped_by_genre = defaultdict(list)
-
-    for item in all_qa_pairs:
-        grouped_by_genre[item["genre"]].append(item)
-
     xml_outputs = {}
-    
-    for genre, pairs in grouped_by_genre.items():
-        # 追加モードの場合は既存のXMLファイルを読み込む
-        if append_mode and qa_dir:
-            safe_genre_name = "".join(c for c in genre if c.isalnum() or c in (' ', '_', '-')).strip().replace(' ', '_')
-            existing_file = qa_dir / f"{safe_genre_name}.xml"
-            
-            if existing_file.exists():
-                existing_pairs = load_existing_xml_file(existing_file)
-                console.print(f"[dim]Genre '{genre}': 既存の{len(existing_pairs)}件のQ&Aを読み込みました[/dim]")
-                # 既存のペアを先頭に追加
-                pairs = existing_pairs + pairs
-        
-        root = ET.Element("QAPairs")
-        root.set("genre", genre)
 
-        for item in pairs:
-            pair_elem = ET.SubElement(root, "Pair")
+    for genre, pairs in _group_pairs_by_genre(all_qa_pairs, qa_dir, append_mode).items():
+        buffer = io.StringIO()
+        with XMLStreamWriter(buffer, "QAPairs", {"genre": genre}) as writer:
+            writer.write_all(_build_pair_element(item) for item in pairs)
+        xml_outputs[genre] = buffer.getvalue()
 
-            audience_elem = ET.SubElement(pair_elem, "Audience")
-            audience_elem.text = item["audience"]
+    return xml_outputs
 
-            question_elem = ET.SubElement(pair_elem, "Question")
-            question_elem.text = item["question"]
 
-            answer_elem = ET.SubElement(pair_elem, "Answer")
-            
-            # 回答内容を解析
-            parsed_answer = _parse_answer_with_think(item["answer"])
-            
-            if parsed_answer["has_think"]:
-                # <think>をサブエレメントとして追加
-                think_elem = ET.SubElement(answer_elem, "think")
-                think_elem.text = parsed_answer["think_content"]
-                think_elem.tail = parsed_answer["answer_content"]
-            else:
-                # 通常の回答
-                answer_elem.text = parsed_answer["answer_content"]
+def write_xml_by_genre(all_qa_pairs: List[Dict[str, str]], qa_dir: Path, append_mode: bool = False) -> List[Path]:
+    """Q&AペアをGenre別XMLとしてqa_dirに直接書き出す
 
-        rough_string = ET.tostring(root, 'utf-8')
-        reparsed = minidom.parseString(rough_string)
-        xml_output = reparsed.toprettyxml(indent="  ")
-        
-        xml_outputs[genre] = xml_output
+    convert_to_xml_by_genreと同じ内容を、文字列を経由せず1件ずつファイルに書き出す。
+    追加モードでは既存ファイルを読み直さず、閉じタグの直前に新しいペアだけを追記する。
 
-    return xml_outputs
+    Returns:
+        書き出したXMLファイルのパス
+    """
+    saved_files = []
+    for genre, pairs in _group_pairs_by_genre(all_qa_pairs).items():
+        output_file_path = qa_dir / f"{sanitize_filename(genre)}.xml"
+        if append_mode and output_file_path.exists():
+            _append_or_write_qa_pairs_file(output_file_path, genre, [_build_pair_element(item) for item in pairs])
+            console.print(f"[dim]Genre '{genre}': 既存ファイルに{len(pairs)}件のQ&Aを追記しました[/dim]")
+        else:
+            _write_qa_pairs_file(output_file_path, genre, (_build_pair_element(item) for item in pairs))
+        saved_files.append(output_file_path)
+    return saved_files
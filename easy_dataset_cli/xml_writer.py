@@ -0,0 +1,169 @@
+# easy_dataset_cli/xml_writer.py
+"""minidomの往復を使わずに整形済みXMLを書き出すストリーミングライター
+
+従来は ET.tostring → minidom.parseString → toprettyxml(indent="  ") で整形していたため、
+文書全体のコピーがメモリ上に3つでき、大きなGenre別XMLでは後処理の大半を占めていた。
+このモジュールは要素を1つずつ受け取り、toprettyxmlと同じバイト列を1回の走査で書き出す。
+"""
+
+import io
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, TextIO
+
+XML_DECLARATION = '<?xml version="1.0" ?>\n'
+INDENT = "  "
+# 閉じタグを探すために読む末尾のバイト数
+TAIL_READ_SIZE = 4096
+
+
+def _escape(data: str) -> str:
+    """minidomと同じ規則で文字をエスケープする"""
+    return (
+        data.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def _escape_text(text: str) -> str:
+    # 再パースしていた頃と同じく、XMLパーサーが行う改行の正規化を適用する
+    return _escape(text.replace("\r\n", "\n").replace("\r", "\n"))
+
+
+def _start_tag(tag: str, attrib: Dict[str, str]) -> str:
+    attrs = "".join(f' {name}="{_escape(value)}"' for name, value in attrib.items())
+    return f"<{tag}{attrs}"
+
+
+def write_pretty_element(stream: TextIO, elem: ET.Element, level: int = 0, indent: str = INDENT) -> None:
+    """1つの要素（子要素を含む）をtoprettyxmlと同じ形式で書き出す"""
+    pad = indent * level
+    stream.write(pad + _start_tag(elem.tag, elem.attrib))
+
+    children = list(elem)
+    if not children:
+        if elem.text:
+            stream.write(f">{_escape_text(elem.text)}</{elem.tag}>\n")
+        else:
+            stream.write("/>\n")
+        return
+
+    # 子要素を含む場合は、テキストも1行ずつインデントして書き出す
+    stream.write(">\n")
+    if elem.text:
+        stream.write(f"{pad}{indent}{_escape_text(elem.text)}\n")
+    for child in children:
+        write_pretty_element(stream, child, level + 1, indent)
+        if child.tail:
+            stream.write(f"{pad}{indent}{_escape_text(child.tail)}\n")
+    stream.write(f"{pad}</{elem.tag}>\n")
+
+
+class XMLStreamWriter:
+    """ルート要素の子要素を1つずつ書き出し、文書全体をメモリに持たないライター
+
+    使用例:
+        with XMLStreamWriter(f, "QAPairs", {"genre": genre}) as writer:
+            for item in pairs:
+                writer.write(build_pair_element(item))
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        root_tag: str,
+        attrib: Dict[str, str] = None,
+        indent: str = INDENT,
+        resume: bool = False
+    ):
+        """resume=Trueの場合は、resume_pretty_xmlで閉じタグを外した既存ファイルの続きに書き出す"""
+        self.stream = stream
+        self.root_tag = root_tag
+        self.indent = indent
+        self.count = 0
+        if resume:
+            self.count = 1
+            return
+        stream.write(XML_DECLARATION)
+        stream.write(_start_tag(root_tag, attrib or {}))
+
+    def write(self, elem: ET.Element) -> None:
+        """ルート直下に子要素を1つ書き出す"""
+        if self.count == 0:
+            self.stream.write(">\n")
+        write_pretty_element(self.stream, elem, level=1, indent=self.indent)
+        self.count += 1
+
+    def write_all(self, elems: Iterable[ET.Element]) -> None:
+        for elem in elems:
+            self.write(elem)
+
+    def close(self) -> None:
+        """ルート要素を閉じる（子要素がない場合は空要素にする）"""
+        if self.count == 0:
+            self.stream.write("/>\n")
+        else:
+            self.stream.write(f"</{self.root_tag}>\n")
+
+    def __enter__(self) -> "XMLStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def to_pretty_xml(root: ET.Element, indent: str = INDENT) -> str:
+    """構築済みの要素ツリーを、minidomのtoprettyxmlと同じ整形済みXML文字列にする"""
+    buffer = io.StringIO()
+    buffer.write(XML_DECLARATION)
+    write_pretty_element(buffer, root, indent=indent)
+    return buffer.getvalue()
+
+
+def resume_pretty_xml(file_path: Path, root_tag: str, indent: str = INDENT) -> bool:
+    """整形済みXMLファイルからルートの閉じタグを取り除き、子要素を追記できる状態にする
+
+    既存部分は読み直さず末尾だけを確認する。書き込み途中で中断し閉じタグがないファイル
+    （最後の子要素は閉じているもの）もそのまま続きを書ける。
+    それ以外（空のルート要素など）の場合は何もせずFalseを返す。
+    """
+    closing = f"</{root_tag}>".encode("utf-8")
+    with open(file_path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(0, size - TAIL_READ_SIZE)
+        f.seek(tail_start)
+        tail = f.read().rstrip()
+        last_line = tail.rsplit(b"\n", 1)[-1]
+        if tail.endswith(closing):
+            f.truncate(tail_start + len(tail) - len(closing))
+        elif last_line.startswith(f"{indent}</".encode("utf-8")) and last_line.endswith(b">"):
+            f.truncate(tail_start + len(tail))
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n")
+        else:
+            return False
+    return True
+
+
+def append_pretty_elements(file_path: Path, root_tag: str, elems: Iterable[ET.Element], indent: str = INDENT) -> bool:
+    """整形済みXMLファイルのルートの閉じタグの直前に子要素を追記する
+
+    既存部分は読み直さず末尾だけを書き換えるため、追記のコストは追加する要素の量に比例する。
+    結果は全要素をまとめて書き出した場合と同じバイト列になる。
+    ルートが閉じタグで終わっていない場合（空要素など）は何もせずFalseを返す。
+    """
+    # 追加分を先に組み立て、閉じタグを外してから書き込むまでの間を短くする
+    buffer = io.StringIO()
+    for elem in elems:
+        write_pretty_element(buffer, elem, level=1, indent=indent)
+    buffer.write(f"</{root_tag}>\n")
+
+    if not resume_pretty_xml(file_path, root_tag, indent):
+        return False
+    with open(file_path, "a", encoding="utf-8") as f:
+        f.write(buffer.getvalue())
+    return True
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Genre別XMLからアルパカ形式への変換のテスト"""
+
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli.alpaca_converter import (
+    convert_all_xml_to_alpaca,
+    create_dataset_card,
+    get_alpaca_output_file
+)
+from easy_dataset_cli.xml_utils import iter_qa_pairs_from_xml, write_xml_by_genre
+
+
+QA_PAIRS = [
+    {"genre": "FAQ", "audience": "初心者", "question": "Q1 & \"引用\"", "answer": "<think>考え\n中</think>回答1"},
+    {"genre": "教科書", "audience": "学生", "question": "Q2", "answer": "回答2\n2行目"},
+    {"genre": "FAQ", "audience": "上級者", "question": "Q3", "answer": "回答3 <b>"},
+]
+
+
+def test_iterparse_keeps_think_content():
+    """<think>を子要素として書き出したAnswerが、思考部分を含めて元の文字列に戻ること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        write_xml_by_genre(QA_PAIRS, qa_dir)
+        assert list(iter_qa_pairs_from_xml(qa_dir / "FAQ.xml")) == [QA_PAIRS[0], QA_PAIRS[2]]
+
+
+def test_parallel_conversion_matches_serial():
+    """プロセスプールでの変換結果がファイル順・内容ともに逐次変換と同じで、json.dumpと同じ出力になること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        qa_dir = base_dir / "qa"
+        qa_dir.mkdir()
+        write_xml_by_genre(QA_PAIRS + [dict(QA_PAIRS[1], genre=f"G{i}") for i in range(6)], qa_dir)
+
+        convert_all_xml_to_alpaca(qa_dir, base_dir / "serial.json", max_workers=1)
+        convert_all_xml_to_alpaca(qa_dir, base_dir / "parallel.json", max_workers=3)
+
+        serial = json.loads((base_dir / "serial.json").read_text(encoding="utf-8"))
+        assert len(serial) == 9
+        assert (base_dir / "parallel.json").read_text(encoding="utf-8") == json.dumps(serial, ensure_ascii=False, indent=2)
+        faq_outputs = [entry["output"] for entry in serial if entry["genre"] == "FAQ"]
+        assert faq_outputs == ["<think>考え\n中</think>回答1", "回答3 <b>"]
+
+
+def test_jsonl_formats_and_single_pass_stats():
+    """jsonl・jsonl.gz・jsonl.zstで1行1エントリを書き出し、変換時の統計からデータセットカードを作れること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        qa_dir = base_dir / "qa"
+        qa_dir.mkdir()
+        write_xml_by_genre(QA_PAIRS, qa_dir)
+        convert_all_xml_to_alpaca(qa_dir, base_dir / "dataset_alpaca.json")
+        expected = json.loads((base_dir / "dataset_alpaca.json").read_text(encoding="utf-8"))
+
+        for output_format in ("jsonl", "jsonl.gz", "jsonl.zst"):
+            output_file = get_alpaca_output_file(base_dir, output_format)
+            stats = convert_all_xml_to_alpaca(qa_dir, output_file, output_format=output_format)
+            assert output_file.name == f"dataset_alpaca.{output_format}"
+            assert [json.loads(line) for line in _read_lines(output_file)] == expected
+            assert stats == {"total_entries": 3, "genres": {"FAQ", "教科書"}, "audiences": {"初心者", "上級者", "学生"}}
+
+        create_dataset_card(stats, base_dir / "README.md")
+        card = (base_dir / "README.md").read_text(encoding="utf-8")
+        assert "**総エントリ数**: 3" in card and "- 教科書" in card
+
+
+def _read_lines(output_file):
+    if output_file.suffix == ".gz":
+        with gzip.open(output_file, "rt", encoding="utf-8") as f:
+            return f.read().splitlines()
+    if output_file.suffix == ".zst":
+        import zstandard
+        with zstandard.open(output_file, "rt", encoding="utf-8") as f:
+            return f.read().splitlines()
+    return output_file.read_text(encoding="utf-8").splitlines()
+
+
+if __name__ == "__main__":
+    test_iterparse_keeps_think_content()
+    test_parallel_conversion_matches_serial()
+    test_jsonl_formats_and_single_pass_stats()
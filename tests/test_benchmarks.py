@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""ベンチマークスイートの補助機能のテスト"""
+
+from benchmarks.bench_stages import bench_output_stages, bench_split_text
+from benchmarks.corpus import generate_corpus, parse_size
+from benchmarks.metrics import percentile, latency_summary
+
+
+def test_parse_size_units():
+    """サイズ表記がバイト数に変換されること"""
+    assert parse_size("512") == 512
+    assert parse_size("1KB") == 1024
+    assert parse_size("1.5MB") == int(1.5 * 1024 * 1024)
+
+
+def test_corpus_is_deterministic_and_sized():
+    """合成コーパスが決定的で、指定サイズ以下のUTF-8テキストになること"""
+    for language in ("ja", "en"):
+        text = generate_corpus(4096, language=language, seed=1)
+        assert text == generate_corpus(4096, language=language, seed=1)
+        assert 4000 <= len(text.encode("utf-8")) <= 4096
+    assert "。" in generate_corpus(1024, language="ja")
+
+
+def test_percentile_interpolates():
+    """パーセンタイルが線形補間で求められること"""
+    values = [0.001 * i for i in range(1, 101)]
+    assert abs(percentile(values, 50) - 0.0505) < 1e-9
+    assert percentile([], 99) == 0.0
+    summary = latency_summary(values)
+    assert summary["count"] == 100
+    assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+
+def test_stage_benchmarks_report_throughput():
+    """各段階のベンチマークがスループットを含む結果を返すこと"""
+    text = generate_corpus(8 * 1024, language="ja")
+    split_result, chunks = bench_split_text(text, {"size": "8KB"}, chunk_size=500, chunk_overlap=50)
+    assert split_result["counts"]["chunks"] == len(chunks) > 1
+
+    results = bench_output_stages(chunks, {"size": "8KB"})
+    names = [result["name"] for result in results]
+    assert names == ["convert_to_xml_by_genre", "convert_all_xml_to_alpaca", "aggregate_logs_xml_to_qa"]
+    assert results[1]["counts"]["pairs"] == len(chunks) * 2 * 3
+
+
+if __name__ == "__main__":
+    test_parse_size_units()
+    test_corpus_is_deterministic_and_sized()
+    test_percentile_interpolates()
+    test_stage_benchmarks_report_throughput()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""中断再開用ジョブマニフェストのテスト"""
+
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli.job_manifest import (
+    JobManifest,
+    create_resumable_runner,
+    get_generation_mode
+)
+from easy_dataset_cli.task_engine import build_qa_tasks, run_qa_tasks
+
+
+GA_PAIRS = [
+    {"genre": {"title": "Genre0", "description": ""}, "audience": {"title": "Audience0", "description": ""}},
+    {"genre": {"title": "Genre1", "description": ""}, "audience": {"title": "Audience1", "description": ""}}
+]
+CHUNKS = ["チャンク0", "チャンク1", "チャンク2"]
+
+
+def _run(manifest, runner, resume, mode="basic"):
+    resumable = create_resumable_runner(runner, manifest, source="doc.txt", mode=mode, resume=resume)
+    return [qa_pairs for _, qa_pairs in run_qa_tasks(build_qa_tasks(CHUNKS, GA_PAIRS), resumable)]
+
+
+def test_generation_mode_follows_runner_priority():
+    """生成モードの判定がタスクランナーの優先順位と一致すること"""
+    assert get_generation_mode() == "basic"
+    assert get_generation_mode(use_fulltext=True) == "fulltext"
+    assert get_generation_mode(use_fulltext=True, use_thinking=True) == "thinking_fulltext"
+    assert get_generation_mode(use_thinking=True, use_surrounding_context=True) == "surrounding"
+
+
+def test_resume_skips_completed_tasks_and_retries_failed_ones():
+    """再開時に完了済みタスクは記録から返され、失敗したタスクだけが再実行されること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = Path(temp_dir) / "manifest.sqlite"
+
+        def first_runner(task):
+            # 2番目のチャンクは失敗（空の結果）とする
+            if task["chunk_index"] == 1:
+                return []
+            return [{"question": f"Q{task['index']}", "answer": "A"}]
+
+        manifest = JobManifest(db_path)
+        first_results = _run(manifest, first_runner, resume=False)
+        assert manifest.stats()["done"] == 4
+        assert manifest.stats()["failed"] == 2
+        manifest.close()
+
+        called = []
+
+        def second_runner(task):
+            called.append(task["index"])
+            return [{"question": f"Q{task['index']}", "answer": "retried"}]
+
+        manifest = JobManifest(db_path)
+        second_results = _run(manifest, second_runner, resume=True)
+        stats = manifest.stats()
+        manifest.close()
+
+        assert called == [2, 3]
+        assert stats["skipped"] == 4
+        assert stats["done"] == 6
+        assert second_results[0] == first_results[0]
+        assert second_results[2] == [{"question": "Q2", "answer": "retried"}]
+
+
+def test_mode_change_is_not_resumed():
+    """生成モードが異なるタスクは完了済みとして扱われないこと"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest = JobManifest(Path(temp_dir) / "manifest.sqlite")
+        _run(manifest, lambda task: [{"question": "Q", "answer": "A"}], resume=False)
+
+        called = []
+        _run(manifest, lambda task: called.append(task) or [{"question": "Q", "answer": "A"}], resume=True, mode="thinking")
+        assert len(called) == len(CHUNKS) * len(GA_PAIRS)
+        manifest.close()
+
+
+if __name__ == "__main__":
+    test_generation_mode_follows_runner_priority()
+    test_resume_skips_completed_tasks_and_retries_failed_ones()
+    test_mode_change_is_not_resumed()
+    print("✅ すべてのテストが成功しました！")
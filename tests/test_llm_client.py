@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""共有OpenAIクライアントプールのテスト"""
+
+from easy_dataset_cli.generators.llm_client import (
+    get_openai_client,
+    configure_client_pool,
+    ensure_pool_capacity,
+    get_pool_settings,
+    get_default_base_url,
+    configure_default_endpoint,
+    close_all_clients
+)
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.generators.rate_limiter import configure_rate_limit, get_rate_limiter, reset_rate_limits
+
+
+def test_client_is_shared_per_base_url_and_key():
+    """同じbase_urlとAPIキーでは同一のクライアントが返ること"""
+    close_all_clients()
+    first = get_openai_client(base_url="http://localhost:1/v1", api_key="key-a")
+    second = get_openai_client(base_url="http://localhost:1/v1", api_key="key-a")
+    other_key = get_openai_client(base_url="http://localhost:1/v1", api_key="key-b")
+    other_url = get_openai_client(base_url="http://localhost:2/v1", api_key="key-a")
+
+    assert first is second
+    assert first is not other_key
+    assert first is not other_url
+    close_all_clients()
+
+
+def test_pool_capacity_follows_concurrency():
+    """並列数がキープアライブ数を超える場合にプールが拡張されること"""
+    configure_client_pool(max_connections=10, max_keepalive_connections=5)
+    ensure_pool_capacity(32)
+    settings = get_pool_settings()
+
+    assert settings["max_connections"] == 32
+    assert settings["max_keepalive_connections"] == 32
+    close_all_clients()
+
+
+def test_rate_limit_for_default_endpoint():
+    """既定の接続先のbase_urlで設定した制限が、その接続先にだけ適用されること"""
+    previous_credentials = llm_client._default_credentials
+    try:
+        configure_default_endpoint("http://localhost:1/v1", "key-a")
+        assert get_default_base_url() == "http://localhost:1/v1"
+        configure_rate_limit(rpm=60, base_url=get_default_base_url(), model="model-x")
+        assert get_rate_limiter("http://localhost:1/v1", "model-x") is not None
+        assert get_rate_limiter("http://localhost:2/v1", "model-x") is None
+    finally:
+        llm_client._default_credentials = previous_credentials
+        reset_rate_limits()
+
+
+if __name__ == "__main__":
+    test_client_is_shared_per_base_url_and_key()
+    test_pool_capacity_follows_concurrency()
+    test_rate_limit_for_default_endpoint()
+    print("✅ すべてのテストが成功しました！")
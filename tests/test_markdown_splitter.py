@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Markdownの構造に沿ったテキスト分割のテスト"""
+
+from easy_dataset_cli.markdown_splitter import split_markdown
+from easy_dataset_cli.text_splitter import split_text
+
+
+MARKDOWN = """前書きの段落です。
+
+# 第1章 概要
+
+概要の段落です。**強調**もあります。
+
+## 1.1 表
+
+| 名前 | 値 |
+|---|---|
+""" + "".join(f"| 項目{i} | {i * 10} |\n" for i in range(20)) + """
+## 1.2 コード
+
+```python
+def f():
+
+    return 1
+```
+
+### 1.2.1 詳細
+
+短い。
+
+# 第2章
+
+""" + "長い段落の文です。" * 30 + "\n"
+
+
+def test_sections_blocks_and_heading_paths():
+    """セクションをまとめて詰め、表・コードブロックを途中で切らず、各チャンクに見出しパスを付けること"""
+    chunks = split_markdown(MARKDOWN, chunk_size=150, chunk_overlap=30)
+    assert all(len(chunk.text) <= 150 for chunk in chunks)
+
+    # 収まるセクションは1つのチャンクにまとめる
+    assert chunks[0].heading_path == ()
+    assert chunks[0].text == "前書きの段落です。\n\n# 第1章 概要\n\n概要の段落です。**強調**もあります。"
+
+    # 大きな表は見出し行を繰り返して行単位で分割し、上位の見出しを先頭に付ける
+    table_chunks = [chunk for chunk in chunks if chunk.heading_path == ("第1章 概要", "1.1 表")]
+    assert len(table_chunks) > 1
+    rows = []
+    for chunk in table_chunks:
+        assert chunk.text.startswith("# 第1章 概要\n\n## 1.1 表\n\n| 名前 | 値 |\n| --- | --- |\n")
+        rows.extend(chunk.text.split("\n")[6:])
+    assert rows == [f"| 項目{i} | {i * 10} |" for i in range(20)]
+
+    # コードブロックは空行を含んでいても1つのブロックとして残る
+    code_chunk = next(chunk for chunk in chunks if chunk.heading_path == ("第1章 概要", "1.2 コード"))
+    assert "```python\ndef f():\n\n    return 1\n```" in code_chunk.text
+    assert "### 1.2.1 詳細" in code_chunk.text
+
+    # 収まらない段落は分割され、各チャンクが章の見出しから始まる
+    chapter2 = [chunk for chunk in chunks if chunk.heading_path == ("第2章",)]
+    assert len(chapter2) > 1 and all(chunk.text.startswith("# 第2章\n\n") for chunk in chapter2)
+
+
+def test_heading_only_sections_are_not_chunks():
+    """本文のない見出しは単独のチャンクにならず、次のセクションの前か見出しパスに入り、末尾の見出しは捨てること"""
+    text = "# A\n\n本文です。\n\n## 空の節\n\n### 子\n\n子の本文です。\n\nSetext\n======\n"
+    chunks = split_markdown(text, chunk_size=1000, chunk_overlap=0)
+    assert chunks == [("# A\n\n本文です。\n\n## 空の節\n\n### 子\n\n子の本文です。", ("A",))]
+
+    # 次のセクションが新しいチャンクになる場合は、見出しパスとして先頭に付く
+    chunks = split_markdown(text, chunk_size=30, chunk_overlap=0)
+    assert [chunk.text for chunk in chunks] == ["# A\n\n本文です。", "# A\n\n## 空の節\n\n### 子\n\n子の本文です。"]
+    assert chunks[1].heading_path == ("A", "空の節", "子")
+
+
+def test_split_text_markdown_option():
+    """split_textのsplitter="markdown"がチャンクの本文を返すこと"""
+    expected = [chunk.text for chunk in split_markdown(MARKDOWN, 150, 30)]
+    assert split_text(MARKDOWN, 150, 30, splitter="markdown") == expected
+    assert split_text("", 150, 30, splitter="markdown") == []
+
+
+if __name__ == "__main__":
+    test_sections_blocks_and_heading_paths()
+    test_heading_only_sections_are_not_chunks()
+    test_split_text_markdown_option()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""OpenAI互換モックサーバーのテスト"""
+
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.generators.rate_limiter import configure_rate_limit, get_rate_limiter, reset_rate_limits
+from easy_dataset_cli.generators.qa_generator import _parse_qa_response
+from easy_dataset_cli.generators.retry import configure_retry_policy, get_retry_policy
+from easy_dataset_cli.generators.stream_parser import PairStreamMonitor
+from easy_dataset_cli.mock_server import MockLLMServer, MALFORMED_VARIANTS, build_qa_response
+
+
+MESSAGES = [
+    {"role": "system", "content": "あなたは、XML形式で厳密に出力する優秀なアシスタントです。"},
+    {"role": "user", "content": "文章に基づいて、4個のユニークで洞察に富んだQ&Aペアを生成してください。"}
+]
+
+
+def _chat(server, **kwargs):
+    return llm_client.complete_chat(
+        model="mock-model",
+        messages=MESSAGES,
+        base_url=server.base_url,
+        api_key="mock",
+        **kwargs
+    )
+
+
+def test_canned_responses_follow_prompt_and_variants_stay_parseable():
+    """要求されたQ&A数の定型XMLが返り、壊れたXMLのバリエーションも解析できること"""
+    prompt = MESSAGES[1]["content"]
+    assert len(_parse_qa_response(build_qa_response(prompt))) == 4
+    for variant in MALFORMED_VARIANTS:
+        assert len(_parse_qa_response(build_qa_response(prompt, variant=variant))) == 4, variant
+
+
+def test_chat_completion_and_streaming():
+    """通常のレスポンスとストリーミングの両方でQ&Aが受信できること"""
+    with MockLLMServer(stream_chunk_chars=5) as server:
+        content = _chat(server)
+        assert len(_parse_qa_response(content)) == 4
+
+        llm_client.configure_streaming(True)
+        try:
+            streamed = _chat(server, stream_monitor=PairStreamMonitor(max_pairs=2))
+        finally:
+            llm_client.configure_streaming(False)
+
+        assert len(_parse_qa_response(streamed)) == 2
+        assert server.stats["streamed"] == 1
+    llm_client.close_all_clients()
+
+
+def test_streaming_records_usage_for_tpm_correction():
+    """ストリーミングでもusageを要求し、受信したトークン数でTPMの予約量が補正されること"""
+    recorded = []
+    with MockLLMServer(stream_chunk_chars=5) as server:
+        configure_rate_limit(tpm=100000, base_url=server.base_url)
+        limiter = get_rate_limiter(server.base_url, "mock-model")
+        original_record_usage = limiter.record_usage
+        limiter.record_usage = lambda estimated, actual: (recorded.append(actual), original_record_usage(estimated, actual))
+        llm_client.configure_streaming(True)
+        try:
+            _chat(server)
+        finally:
+            llm_client.configure_streaming(False)
+            reset_rate_limits()
+    llm_client.close_all_clients()
+
+    assert len(recorded) == 1 and recorded[0] is not None and recorded[0] > 0
+
+
+def test_injected_rate_limits_are_retried():
+    """注入された429がRetry-Afterに従って再試行され、最終的に成功すること"""
+    previous_max_retries = get_retry_policy().max_retries
+    configure_retry_policy(max_retries=20)
+    try:
+        with MockLLMServer(rate_limit_rate=0.5, retry_after=0, seed=1) as server:
+            for _ in range(5):
+                assert "<QAPairs>" in _chat(server)
+            assert server.stats["rate_limited"] > 0
+            assert server.stats["ok"] == 5
+    finally:
+        configure_retry_policy(max_retries=previous_max_retries)
+        llm_client.close_all_clients()
+
+
+if __name__ == "__main__":
+    test_canned_responses_follow_prompt_and_variants_stay_parseable()
+    test_chat_completion_and_streaming()
+    test_streaming_records_usage_for_tpm_correction()
+    test_injected_rate_limits_are_retried()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""複数GAペア一括生成のテスト"""
+
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli.generators import llm_client, qa_generator_multi_ga
+from easy_dataset_cli.generators.qa_generator_multi_ga import (
+    format_ga_groups,
+    parse_multi_ga_response,
+    generate_qa_for_chunk_with_multiple_ga
+)
+from easy_dataset_cli.generators.stream_parser import PairStreamMonitor
+from easy_dataset_cli.mock_server import MockLLMServer
+from easy_dataset_cli.job_manifest import JobManifest, create_resumable_batched_runner
+from easy_dataset_cli.task_engine import (
+    build_qa_tasks,
+    build_batched_qa_tasks,
+    run_qa_tasks,
+    expand_task_results,
+    count_task_cells
+)
+
+
+GA_PAIRS = [
+    {"genre": {"title": f"Genre{i}", "description": f"体裁{i}"}, "audience": {"title": f"Audience{i}", "description": f"読者{i}"}}
+    for i in range(5)
+]
+CHUNKS = ["チャンク0", "チャンク1"]
+
+
+def test_format_ga_groups_numbers_from_one():
+    """GAグループが1始まりの番号で整形されること"""
+    text = format_ga_groups(GA_PAIRS[:2])
+    assert "### GAグループ 1" in text
+    assert "### GAグループ 2" in text
+    assert "Genre1" in text and "読者1" in text
+
+
+def test_parse_multi_ga_response_fans_out_by_group():
+    """<GAGroup>ごとのQ&Aペアが正しいGAペアに振り分けられること"""
+    response = """```xml
+<QAPairs>
+<GAGroup id="2"><Pair><Question>Q2</Question><Answer>A2 &amp; B</Answer></Pair></GAGroup>
+<GAGroup id="1">
+<Pair><Question>Q1a</Question><Answer>A1a</Answer></Pair>
+<Pair><Question>Q1b</Question><Answer>A1b</Answer></Pair>
+</GAGroup>
+<GAGroup id="9"><Pair><Question>X</Question><Answer>X</Answer></Pair></GAGroup>
+</QAPairs>
+```"""
+    grouped = parse_multi_ga_response(response, 3)
+
+    assert [pair["question"] for pair in grouped[0]] == ["Q1a", "Q1b"]
+    assert grouped[1] == [{"question": "Q2", "answer": "A2 & B"}]
+    assert grouped[2] == []
+
+
+def test_batched_tasks_expand_to_same_order_as_per_ga_tasks():
+    """まとめたタスクを展開した結果が、GAペアごとのタスクと同じ順序になること"""
+    batched = list(build_batched_qa_tasks(CHUNKS, GA_PAIRS, ga_batch_size=2))
+    assert [count_task_cells(task) for task in batched] == [2, 2, 1, 2, 2, 1]
+
+    expanded = []
+    for task in batched:
+        fake_result = [[{"question": f"{task['chunk_index']}-{ga['genre']['title']}", "answer": ""}] for ga in task["ga_pairs"]]
+        expanded.extend(expand_task_results(task, fake_result))
+
+    expected = list(build_qa_tasks(CHUNKS, GA_PAIRS))
+    assert [(t["chunk_index"], t["ga_index"]) for t, _ in expanded] == [(t["chunk_index"], t["ga_index"]) for t in expected]
+    assert all(t["ga_pair"] is GA_PAIRS[t["ga_index"]] for t, _ in expanded)
+
+
+def test_resumable_batched_runner_records_per_ga():
+    """まとめたタスクの結果がGAペア単位で記録され、再開時に再利用されること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest = JobManifest(Path(temp_dir) / "manifest.sqlite")
+        called = []
+
+        def runner(task):
+            called.append(task["index"])
+            return [[{"question": ga["genre"]["title"], "answer": "A"}] for ga in task["ga_pairs"]]
+
+        def run(resume):
+            resumable = create_resumable_batched_runner(runner, manifest, "doc.txt", "multi_ga", resume=resume)
+            tasks = build_batched_qa_tasks(CHUNKS, GA_PAIRS, ga_batch_size=5)
+            return [result for _, result in run_qa_tasks(tasks, resumable)]
+
+        first = run(resume=False)
+        assert manifest.stats()["done"] == len(CHUNKS) * len(GA_PAIRS)
+
+        second = run(resume=True)
+        assert called == [0, 1]
+        assert second == first
+        manifest.close()
+
+
+def test_streamed_batch_stops_after_all_groups_and_keeps_last_group():
+    """ストリーミング時は全グループ分のペアが揃った時点で打ち切り、最後のGAグループのQ&Aも失われないこと"""
+    monitors = []
+
+    class RecordingMonitor(PairStreamMonitor):
+        def __init__(self, max_pairs=None):
+            super().__init__(max_pairs=max_pairs)
+            monitors.append(self)
+
+    previous_credentials = llm_client._default_credentials
+    with MockLLMServer(stream_chunk_chars=5) as server:
+        llm_client.configure_default_endpoint(server.base_url, "mock")
+        llm_client.configure_streaming(True)
+        qa_generator_multi_ga.PairStreamMonitor = RecordingMonitor
+        try:
+            grouped = generate_qa_for_chunk_with_multiple_ga(CHUNKS[0], "mock-model", GA_PAIRS[:3], num_qa_pairs=2)
+        finally:
+            qa_generator_multi_ga.PairStreamMonitor = PairStreamMonitor
+            llm_client.configure_streaming(False)
+            llm_client._default_credentials = previous_credentials
+            llm_client.close_all_clients()
+
+    assert monitors[0].max_pairs == 6 and monitors[0].stopped_early
+    assert [len(qa_pairs) for qa_pairs in grouped] == [2, 2, 2]
+
+
+if __name__ == "__main__":
+    test_format_ga_groups_numbers_from_one()
+    test_parse_multi_ga_response_fans_out_by_group()
+    test_batched_tasks_expand_to_same_order_as_per_ga_tasks()
+    test_streamed_batch_stops_after_all_groups_and_keeps_last_group()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Genre別ファイルへ逐次書き出す出力シンクのテスト"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli.output_sinks import open_output_sinks
+from easy_dataset_cli.xml_utils import convert_to_xml_by_genre, load_existing_xml_file, load_qa_pairs_from_xml
+
+
+QA_PAIRS = [
+    {"genre": "FAQ", "audience": "初心者", "question": "Q1", "answer": "<think>考え</think>回答1"},
+    {"genre": "教科書", "audience": "学生", "question": "Q2", "answer": "回答2"},
+    {"genre": "FAQ", "audience": "上級者", "question": "Q3 & <特殊>", "answer": "回答3"},
+]
+
+
+def test_sinks_write_xml_and_jsonl_per_genre():
+    """タスクごとに渡したQ&AがGenre別のXMLとJSONLに書き出され、XMLは一括変換と同じになること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        with open_output_sinks(qa_dir, "both", flush_interval=0) as sinks:
+            for pair in QA_PAIRS:
+                sinks.write_all([pair])
+                # フラッシュ済みなので、実行中でもJSONLは読める
+                jsonl_file = qa_dir / f"{pair['genre']}.jsonl"
+                assert json.loads(jsonl_file.read_text(encoding="utf-8").splitlines()[-1]) == pair
+
+        assert sinks.count == 3
+        assert sorted(path.name for path in sinks.paths) == ["FAQ.jsonl", "FAQ.xml", "教科書.jsonl", "教科書.xml"]
+        for genre, xml_content in convert_to_xml_by_genre(QA_PAIRS).items():
+            assert (qa_dir / f"{genre}.xml").read_text(encoding="utf-8") == xml_content
+
+
+def test_append_continues_existing_and_interrupted_files():
+    """追加モードで既存ファイルの続きに書き出し、閉じタグのない中断したファイルも再開できること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        with open_output_sinks(qa_dir, "both") as sinks:
+            sinks.write_all(QA_PAIRS[:2])
+
+        # FAQ.xmlを閉じタグが書かれる前に中断した状態にする
+        faq_file = qa_dir / "FAQ.xml"
+        faq_file.write_text(faq_file.read_text(encoding="utf-8").replace("</QAPairs>\n", ""), encoding="utf-8")
+
+        with open_output_sinks(qa_dir, "both", append_mode=True) as sinks:
+            sinks.write_all(QA_PAIRS[2:])
+
+        expected = convert_to_xml_by_genre(QA_PAIRS)
+        assert faq_file.read_text(encoding="utf-8") == expected["FAQ"]
+        assert len(load_existing_xml_file(qa_dir / "教科書.xml")) == 1
+        assert len((qa_dir / "FAQ.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_append_salvages_truncated_file():
+    """<Pair>の途中で切れたファイルに追加しても、読み取れたペア（<think>を含む）を残し、元のファイルを.bakに保存すること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        pairs = [dict(QA_PAIRS[0], question=f"Q{i}") for i in range(50)]
+        with open_output_sinks(qa_dir, "xml") as sinks:
+            sinks.write_all(pairs)
+
+        # 強制終了でバッファの途中までしか書かれなかった状態にする
+        faq_file = qa_dir / "FAQ.xml"
+        content = faq_file.read_text(encoding="utf-8")
+        faq_file.write_text(content[:len(content) // 2], encoding="utf-8")
+        readable = len(load_qa_pairs_from_xml(faq_file))
+        assert 0 < readable < 50
+
+        with open_output_sinks(qa_dir, "xml", append_mode=True) as sinks:
+            sinks.write_all([dict(QA_PAIRS[0], question="新しい質問")])
+
+        salvaged = load_qa_pairs_from_xml(faq_file)
+        assert salvaged == pairs[:readable] + [dict(QA_PAIRS[0], question="新しい質問")]
+        assert (qa_dir / "FAQ.xml.bak").read_text(encoding="utf-8") == content[:len(content) // 2]
+
+
+if __name__ == "__main__":
+    test_sinks_write_xml_and_jsonl_per_genre()
+    test_append_continues_existing_and_interrupted_files()
+    test_append_salvages_truncated_file()
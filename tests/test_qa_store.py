@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""SQLiteのQ&Aストアのテスト"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli import qa_store as qa_store_module
+from easy_dataset_cli.alpaca_converter import convert_store_to_alpaca
+from easy_dataset_cli.output_sinks import export_qa_store, open_output_sinks
+from easy_dataset_cli.qa_store import QA_STORE_FILENAME, QAStore
+from easy_dataset_cli.xml_utils import aggregate_logs_xml_to_qa, convert_to_xml_by_genre, load_existing_xml_file
+
+
+QA_PAIRS = [
+    {"genre": "FAQ", "audience": "初心者", "question": "Q1", "answer": "<think>考え</think>回答1"},
+    {"genre": "教科書", "audience": "学生", "question": "Q2", "answer": "回答2"},
+    {"genre": "FAQ", "audience": "上級者", "question": "Q3 & <特殊>", "answer": "回答3"},
+]
+
+
+def test_add_query_and_paginate():
+    """追加したペアをGenre順・追加順に読み出せ、重複チェックと入力ファイル単位の削除ができること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = QAStore(Path(temp_dir) / QA_STORE_FILENAME)
+        original_batch_size = qa_store_module.READ_BATCH_SIZE
+        qa_store_module.READ_BATCH_SIZE = 2
+        try:
+            assert store.add_pairs(QA_PAIRS, source="a.txt", model="mock") == 3
+            store.add_pairs([dict(QA_PAIRS[0], question="Q4")], source="b.txt")
+
+            pairs = list(store.iter_pairs())
+            assert [pair["question"] for pair in pairs] == ["Q1", "Q3 & <特殊>", "Q4", "Q2"]
+            assert pairs[0]["source"] == "a.txt" and pairs[0]["model"] == "mock"
+            assert [pair["question"] for pair in store.iter_pairs(genre="FAQ", audience="初心者")] == ["Q1", "Q4"]
+
+            assert store.has_question("FAQ", "Q1")
+            assert not store.has_question("教科書", "Q1")
+            assert store.genres() == ["FAQ", "教科書"]
+            assert store.stats() == [("FAQ", "上級者", 1), ("FAQ", "初心者", 2), ("教科書", "学生", 1)]
+
+            assert store.delete_source("a.txt") == 3
+            assert store.count() == 1
+        finally:
+            qa_store_module.READ_BATCH_SIZE = original_batch_size
+            store.close()
+
+
+def test_store_sink_and_exports():
+    """シンク経由で記録したストアからの書き出しが、一括変換したXML・Alpaca形式と同じになること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        (base_dir / "qa").mkdir()
+        store = QAStore(base_dir / QA_STORE_FILENAME)
+        try:
+            for _ in range(2):
+                # 追加モードでなければ、同じ入力ファイルの以前のペアは置き換えられる
+                with open_output_sinks(base_dir / "qa", "xml", store=store, source="doc.txt", model="mock") as sinks:
+                    sinks.write_all(QA_PAIRS, chunk_hash="abc")
+            assert store.count() == 3
+            assert store.db_path in sinks.paths
+
+            export_dir = base_dir / "export"
+            saved_files = export_qa_store(store, export_dir, "xml")
+            assert sorted(path.name for path in saved_files) == ["FAQ.xml", "教科書.xml"]
+            for genre, xml_content in convert_to_xml_by_genre(QA_PAIRS).items():
+                assert (export_dir / f"{genre}.xml").read_text(encoding="utf-8") == xml_content
+
+            alpaca_file = base_dir / "dataset_alpaca.json"
+            alpaca_stats = convert_store_to_alpaca(store, alpaca_file)
+            alpaca_data = json.loads(alpaca_file.read_text(encoding="utf-8"))
+            assert alpaca_stats["total_entries"] == len(alpaca_data) == 3
+            assert alpaca_data[0]["output"] == "<think>考え</think>回答1"
+            assert {entry["instruction"] for entry in alpaca_data} == {"Q1", "Q2", "Q3 & <特殊>"}
+        finally:
+            store.close()
+
+
+def test_aggregate_deduplicates_with_store():
+    """ログの集約でストアに記録済みの質問をスキップし、新しいペアだけをストアとXMLに追加すること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base_dir = Path(temp_dir)
+        logs_dir = base_dir / "logs"
+        logs_dir.mkdir()
+        qa_dir = base_dir / "qa"
+        xml_content = convert_to_xml_by_genre([QA_PAIRS[0], dict(QA_PAIRS[0], question="Q5")])["FAQ"]
+        (logs_dir / "qa_pairs_FAQ_初心者_c00000-0123456789-a1.xml").write_text(xml_content, encoding="utf-8")
+
+        store = QAStore(base_dir / QA_STORE_FILENAME)
+        try:
+            store.add_pairs(QA_PAIRS[:1], source="doc.txt")
+            aggregate_logs_xml_to_qa(logs_dir, qa_dir, store=store)
+
+            assert [pair["question"] for pair in store.iter_pairs(genre="FAQ")] == ["Q1", "Q5"]
+            assert [pair["question"] for pair in load_existing_xml_file(qa_dir / "FAQ.xml")] == ["Q5"]
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    test_add_query_and_paginate()
+    test_store_sink_and_exports()
+    test_aggregate_deduplicates_with_store()
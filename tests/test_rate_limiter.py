@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""トークンバケット方式のレートリミッターのテスト"""
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.generators.rate_limiter import (
+    TokenBucket,
+    RateLimiter,
+    estimate_prompt_tokens,
+    configure_rate_limit,
+    get_rate_limiter,
+    reset_rate_limits
+)
+from easy_dataset_cli.token_counter import estimate_tokens
+
+
+def test_prompt_estimation_uses_shared_token_estimator():
+    """プロンプトのトークン数がチャンク分割と同じ推定（+メッセージごとのオーバーヘッド）で概算されること"""
+    messages = [{"role": "user", "content": "日本語"}, {"role": "user", "content": "abcdefgh"}]
+    assert estimate_prompt_tokens(messages) == estimate_tokens("日本語") + estimate_tokens("abcdefgh") + 8 == 13
+    assert estimate_prompt_tokens([{"role": "user", "content": None}]) == 4
+
+
+def test_bucket_returns_wait_when_exhausted():
+    """容量を使い切ると補充までの待ち時間が返ること"""
+    bucket = TokenBucket(per_minute=60)  # 1秒に1トークン
+    assert bucket.reserve(60, now=bucket.updated_at) == 0.0
+    assert bucket.reserve(2, now=bucket.updated_at) == 2.0
+    # 1秒後には1トークン補充される
+    assert bucket.reserve(0, now=bucket.updated_at + 1.0) == 1.0
+
+
+def test_usage_correction_returns_overestimated_tokens():
+    """実際の使用量が推定より少ない場合は差分がバケットに返却されること"""
+    limiter = RateLimiter(tpm=1000)
+    assert limiter.acquire(800) == 0.0
+    limiter.record_usage(800, 300)
+    assert limiter.acquire(600) == 0.0
+    stats = limiter.stats()
+    assert stats["requests"] == 2
+    assert stats["throttled_requests"] == 0
+
+
+def test_limits_resolve_per_base_url_and_model():
+    """base_url・モデルの具体的な設定が既定値より優先されること"""
+    reset_rate_limits()
+    assert get_rate_limiter("http://a/v1", "model-x") is None
+
+    configure_rate_limit(rpm=100)
+    configure_rate_limit(rpm=10, base_url="http://a/v1", model="model-x")
+
+    specific = get_rate_limiter("http://a/v1", "model-x")
+    default = get_rate_limiter("http://b/v1", "model-y")
+    assert specific.rpm == 10
+    assert default.rpm == 100
+    assert get_rate_limiter("http://a/v1", "model-x") is specific
+    reset_rate_limits()
+
+
+def test_failed_attempt_refunds_reserved_tokens():
+    """429で失敗した試行の予約トークンが返却され、成功した試行の実際の使用量だけがTPMから引かれること"""
+    request = httpx.Request("POST", "http://refund-test/v1/chat/completions")
+    responses = [
+        openai.RateLimitError(
+            "status 429", response=httpx.Response(429, headers={"retry-after": "0"}, request=request), body=None
+        ),
+        SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="<QAPairs></QAPairs>"))],
+            usage=SimpleNamespace(total_tokens=300)
+        ),
+    ]
+
+    def create(**kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    key = ("http://refund-test/v1", "key")
+    llm_client._clients[key] = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    configure_rate_limit(rpm=600, tpm=10000, base_url=key[0])
+    try:
+        limiter = get_rate_limiter(key[0], "test-model")
+        llm_client.complete_chat(
+            model="test-model", messages=[{"role": "user", "content": "x"}], base_url=key[0], api_key=key[1]
+        )
+        # 推定量（約1000トークン）を2回予約しても、返却と補正の後は実際の300トークン分だけ減っている
+        assert not responses
+        assert 10000 - 300 <= limiter._token_bucket.tokens < 10000 - 300 + 50
+        # リクエスト数の枠は失敗した試行の分も消費したまま
+        assert limiter._request_bucket.tokens < 600 - 1.5
+        assert limiter.stats()["requests"] == 2
+    finally:
+        llm_client._clients.pop(key, None)
+        reset_rate_limits()
+
+
+if __name__ == "__main__":
+    test_prompt_estimation_uses_shared_token_estimator()
+    test_bucket_returns_wait_when_exhausted()
+    test_usage_correction_returns_overestimated_tokens()
+    test_limits_resolve_per_base_url_and_model()
+    test_failed_attempt_refunds_reserved_tokens()
+    print("✅ すべてのテストが成功しました！")
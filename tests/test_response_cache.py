@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""LLMレスポンスキャッシュのテスト"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from easy_dataset_cli.generators.response_cache import ResponseCache
+
+
+MESSAGES = [
+    {"role": "system", "content": "system"},
+    {"role": "user", "content": "チャンク本文"}
+]
+
+
+def test_cache_key_depends_on_model_messages_and_params():
+    """キャッシュキーがモデル・メッセージ・パラメータで変わること"""
+    base = ResponseCache.make_key("model-a", MESSAGES)
+    assert base == ResponseCache.make_key("model-a", [dict(m) for m in MESSAGES])
+    assert base != ResponseCache.make_key("model-b", MESSAGES)
+    assert base != ResponseCache.make_key("model-a", MESSAGES[:1])
+    assert base != ResponseCache.make_key("model-a", MESSAGES, {"temperature": 0.2})
+
+
+def test_hit_miss_and_persistence():
+    """保存したレスポンスが再オープン後も取得でき、ヒット/ミスが数えられること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = Path(temp_dir) / "cache" / "llm_responses.sqlite"
+        key = ResponseCache.make_key("model-a", MESSAGES)
+
+        cache = ResponseCache(db_path)
+        assert cache.get(key) is None
+        cache.put(key, "model-a", "<QAPairs></QAPairs>")
+        assert cache.get(key) == "<QAPairs></QAPairs>"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        cache.close()
+
+        reopened = ResponseCache(db_path)
+        assert reopened.get(key) == "<QAPairs></QAPairs>"
+        reopened.close()
+
+
+def test_lru_eviction_respects_size_cap():
+    """サイズ上限を超えると最後に参照された時刻が古いものから削除されること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ResponseCache(Path(temp_dir) / "cache.sqlite", max_bytes=250)
+        cache.put("a", "m", "a" * 100)
+        time.sleep(0.01)
+        cache.put("b", "m", "b" * 100)
+        time.sleep(0.01)
+        assert cache.get("a") is not None  # aを最近参照したことにする
+        time.sleep(0.01)
+        cache.put("c", "m", "c" * 100)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["size_bytes"] <= 250
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_cache_key_depends_on_model_messages_and_params()
+    test_hit_miss_and_persistence()
+    test_lru_eviction_respects_size_cap()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""LLM呼び出しのリトライポリシーのテスト"""
+
+import httpx
+import openai
+
+from easy_dataset_cli.generators.retry import (
+    RetryPolicy,
+    call_with_retry,
+    get_retry_after,
+    is_retryable_error,
+    get_retry_stats,
+    reset_retry_stats
+)
+
+
+REQUEST = httpx.Request("POST", "http://localhost/v1/chat/completions")
+
+
+def _status_error(status_code: int, headers: dict = None) -> openai.APIStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    error_class = {
+        400: openai.BadRequestError,
+        401: openai.AuthenticationError,
+        429: openai.RateLimitError,
+        502: openai.InternalServerError
+    }.get(status_code, openai.APIStatusError)
+    return error_class(f"status {status_code}", response=response, body=None)
+
+
+def test_retryable_and_fatal_errors_are_separated():
+    """タイムアウト・429・5xxは再試行対象、認証エラーや400は対象外であること"""
+    assert is_retryable_error(openai.APITimeoutError(request=REQUEST))
+    assert is_retryable_error(_status_error(429))
+    assert is_retryable_error(_status_error(502))
+    assert not is_retryable_error(_status_error(400))
+    assert not is_retryable_error(_status_error(401))
+    assert not is_retryable_error(ValueError("bug"))
+
+
+def test_retry_after_headers_are_parsed():
+    """Retry-After と retry-after-ms ヘッダーが秒数として解釈されること"""
+    assert get_retry_after(_status_error(429, {"retry-after": "3"})) == 3.0
+    assert get_retry_after(_status_error(429, {"retry-after-ms": "250"})) == 0.25
+    assert get_retry_after(_status_error(429)) is None
+
+    policy = RetryPolicy(base_delay=100.0, max_delay=100.0)
+    assert policy.delay_for(_status_error(429, {"retry-after": "2"}), 1) == 2.0
+
+
+def test_backoff_grows_exponentially_with_cap():
+    """バックオフの上限が指数的に増えて頭打ちになり、待ち時間は0から上限までに散らばること（フルジッター）"""
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for retry_number, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 5.0)):
+        delays = [policy.backoff_delay(retry_number) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert min(delays) < ceiling / 2 < max(delays)
+
+
+def test_transient_errors_are_retried_until_success():
+    """一時的なエラーの後に成功すれば結果が返り、リトライ数が記録されること"""
+    reset_retry_stats()
+    attempts = []
+    sleeps = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _status_error(502)
+        return "ok"
+
+    result = call_with_retry(flaky, policy=RetryPolicy(max_retries=5), sleep=sleeps.append)
+
+    assert result == "ok"
+    assert len(attempts) == 3
+    assert len(sleeps) == 2
+    stats = get_retry_stats()
+    assert stats["retries"] == 2
+    assert stats["recovered"] == 1
+
+
+def test_fatal_errors_and_exhausted_retries_are_raised():
+    """再試行不可のエラーは即座に、上限到達時は最後のエラーが送出されること"""
+    reset_retry_stats()
+    policy = RetryPolicy(max_retries=2)
+
+    fatal_calls = []
+
+    def fatal():
+        fatal_calls.append(1)
+        raise _status_error(401)
+
+    try:
+        call_with_retry(fatal, policy=policy, sleep=lambda _: None)
+        assert False, "例外が送出されるべき"
+    except openai.AuthenticationError:
+        pass
+    assert len(fatal_calls) == 1
+
+    def always_timeout():
+        raise openai.APITimeoutError(request=REQUEST)
+
+    try:
+        call_with_retry(always_timeout, policy=policy, sleep=lambda _: None)
+        assert False, "例外が送出されるべき"
+    except openai.APITimeoutError:
+        pass
+
+    stats = get_retry_stats()
+    assert stats["fatal"] == 1
+    assert stats["exhausted"] == 1
+    assert stats["retries"] == 2
+    reset_retry_stats()
+
+
+if __name__ == "__main__":
+    test_retryable_and_fatal_errors_are_separated()
+    test_retry_after_headers_are_parsed()
+    test_backoff_grows_exponentially_with_cap()
+    test_transient_errors_are_retried_until_success()
+    test_fatal_errors_and_exhausted_retries_are_raised()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""追記型JSONL実行ログのテスト"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli import run_log
+from easy_dataset_cli.log_writer import BackgroundLogWriter, flush_log_writer
+from easy_dataset_cli.run_log import (
+    RunLog,
+    configure_run_log,
+    close_run_log,
+    configure_log_level,
+    export_run_log,
+    get_task_logs_dir,
+    get_run_log_path,
+    read_run_log,
+    task_log_scope,
+    write_log_json,
+    write_log_text,
+    write_run_summary
+)
+
+
+def _write_task_artifacts(logs_dir, name):
+    write_log_json(logs_dir, f"request_{name}.json", {"prompt": "こんにちは", "length": 5})
+    write_log_text(logs_dir, f"qa_pairs_{name}.xml", "<QAPairs>\n  <Pair/>\n</QAPairs>\n")
+
+
+def test_append_and_random_access():
+    """レコードが1行ずつ追記され、インデックスから個別に読み出せること（圧縮あり・なし）"""
+    for suffix in ("jsonl", "jsonl.gz"):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / f"run_log.{suffix}"
+            log = RunLog(path)
+            for i in range(5):
+                log.append({"id": f"task{i}", "artifacts": [{"name": f"a{i}.md", "text": "x" * i}]})
+            log.close()
+
+            # 再オープンして追記してもオフセットが正しいこと
+            log = RunLog(path)
+            log.append({"id": "task5", "artifacts": []})
+            log.close()
+
+            records = list(read_run_log(path))
+            assert [r["id"] for r in records] == [f"task{i}" for i in range(6)]
+            selected = list(read_run_log(path, ["task3"]))
+            assert selected[0]["artifacts"][0]["text"] == "xxx"
+
+
+def test_task_scope_collects_one_record_and_export_matches_files():
+    """1タスク分の成果物が1レコードにまとまり、exportで個別ファイルと同じ内容が再生成されること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base = Path(temp_dir)
+        files_dir = base / "files"
+        jsonl_dir = base / "jsonl"
+        files_dir.mkdir()
+        jsonl_dir.mkdir()
+
+        configure_run_log(files_dir, "files")
+        with task_log_scope("t1"):
+            _write_task_artifacts(files_dir, "t1")
+
+        configure_run_log(jsonl_dir, "jsonl.gz")
+        try:
+            with task_log_scope("t1"):
+                _write_task_artifacts(jsonl_dir, "t1")
+            with task_log_scope("t2"):
+                _write_task_artifacts(jsonl_dir, "t2")
+        finally:
+            close_run_log()
+
+        assert run_log.get_run_log() is None
+        assert not list(jsonl_dir.glob("request_*"))
+
+        path = get_run_log_path(jsonl_dir, "jsonl.gz")
+        records = list(read_run_log(path))
+        assert [r["id"] for r in records] == ["t1", "t2"]
+        assert len(records[0]["artifacts"]) == 2
+
+        exported = base / "exported"
+        assert export_run_log(path, exported, ["t1"]) == 2
+        for name in ("request_t1.json", "qa_pairs_t1.xml"):
+            assert (exported / name).read_text(encoding="utf-8") == (files_dir / name).read_text(encoding="utf-8")
+        assert json.loads((exported / "request_t1.json").read_text(encoding="utf-8"))["prompt"] == "こんにちは"
+
+
+def test_background_writer_batches_and_survives_errors():
+    """ジョブがまとめて実行され、失敗したジョブがあっても後続のジョブが書き出されること"""
+    writer = BackgroundLogWriter(max_queue_size=4, max_batch_size=8)
+    written = []
+    flushed = []
+    writer.add_batch_hook(lambda: flushed.append(len(written)))
+    try:
+        writer.submit(lambda: 1 / 0)
+        for i in range(20):
+            writer.submit(lambda i=i: written.append(i))
+        writer.flush()
+        assert written == list(range(20))
+        assert writer.stats["errors"] == 1
+        assert flushed and flushed[-1] == 20
+    finally:
+        writer.close()
+
+
+def test_file_artifacts_are_rendered_in_background():
+    """個別ファイル形式でも、遅延生成のテキストがフラッシュ後にファイルとして存在すること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        logs_dir = Path(temp_dir)
+        for i in range(50):
+            write_log_text(logs_dir, f"summary_{i}.md", lambda i=i: f"# サマリー {i}\n")
+        flush_log_writer()
+        assert len(list(logs_dir.glob("summary_*.md"))) == 50
+        assert (logs_dir / "summary_7.md").read_text(encoding="utf-8") == "# サマリー 7\n"
+
+
+def test_log_levels_filter_artifacts():
+    """ログレベルに応じて、タスクの成果物・デバッグ情報・実行統計の書き出しが切り替わること"""
+    expected = {
+        "none": set(),
+        "summary": {"run_summary.jsonl"},
+        "full": {"run_summary.jsonl", "request_t.json"},
+        "debug": {"run_summary.jsonl", "request_t.json", "xml_debug_t.json"},
+    }
+    try:
+        for level, names in expected.items():
+            with tempfile.TemporaryDirectory() as temp_dir:
+                logs_dir = Path(temp_dir)
+                configure_log_level(level)
+                task_logs_dir = get_task_logs_dir(logs_dir)
+                assert (task_logs_dir is not None) == (level in ("full", "debug"))
+                if task_logs_dir:
+                    write_log_json(task_logs_dir, "request_t.json", {"a": 1})
+                    write_log_json(task_logs_dir, "xml_debug_t.json", {"b": 2}, level="debug")
+                write_run_summary(logs_dir, {"tasks": 1, "qa_pairs": 3})
+                flush_log_writer()
+                assert {path.name for path in logs_dir.iterdir()} == names, level
+                if names:
+                    summary = json.loads((logs_dir / "run_summary.jsonl").read_text(encoding="utf-8"))
+                    assert summary["qa_pairs"] == 3
+    finally:
+        configure_log_level("debug")
+
+
+if __name__ == "__main__":
+    test_append_and_random_access()
+    test_task_scope_collects_one_record_and_export_matches_files()
+    test_background_writer_batches_and_survives_errors()
+    test_file_artifacts_are_rendered_in_background()
+    test_log_levels_filter_artifacts()
+    print("✅ すべてのテストが成功しました！")
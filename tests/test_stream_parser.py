@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""ストリーミングレスポンスの逐次解析と打ち切りのテスト"""
+
+from types import SimpleNamespace
+
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.generators.stream_parser import IncrementalPairParser, PairStreamMonitor
+
+
+RESPONSE = (
+    "<QAPairs>"
+    "<Pair><Question>Q1</Question><Answer>A1 &amp; B</Answer></Pair>"
+    "<Pair><Question>Q2</Question><Answer><think>考え</think>A2</Answer></Pair>"
+    "<Pair><Question>Q3</Question><Answer>A3</Answer></Pair>"
+    "</QAPairs>"
+    "以降は不要な出力です"
+)
+
+
+def _deltas(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_emits_pairs_as_they_close():
+    """分割された差分から、<Pair>が閉じた時点でQ&Aペアが取り出されること"""
+    parser = IncrementalPairParser()
+    emitted = []
+    for delta in _deltas(RESPONSE):
+        emitted.extend(parser.feed(delta))
+
+    assert emitted == [
+        {"question": "Q1", "answer": "A1 & B"},
+        {"question": "Q2", "answer": "<think>考え</think>A2"},
+        {"question": "Q3", "answer": "A3"}
+    ]
+    assert parser.closed
+
+
+def test_monitor_stops_after_max_pairs_and_closes_root():
+    """指定数のペアが揃った時点で打ち切りを指示し、ルート要素を閉じること"""
+    monitor = PairStreamMonitor(max_pairs=2)
+    received = ""
+    for delta in _deltas(RESPONSE):
+        received += delta
+        if monitor.feed(delta):
+            break
+
+    assert len(monitor.parser.pairs) == 2
+    assert monitor.stopped_early
+    finished = monitor.finish(received)
+    assert finished.startswith("<QAPairs>")
+    assert finished.endswith("</Pair></QAPairs>")
+    assert "Q3" not in finished
+
+
+class _FakeStream:
+    def __init__(self, deltas):
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))], usage=None)
+            for delta in deltas
+        ]
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_complete_chat_stops_stream_at_root_close():
+    """ストリーミング時は</QAPairs>の受信で接続を閉じ、以降の出力を受信しないこと"""
+    stream = _FakeStream(_deltas(RESPONSE))
+    create = lambda **kwargs: stream
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    key = ("http://stream-test/v1", "key")
+    llm_client._clients[key] = fake_client
+    llm_client.configure_streaming(True)
+    try:
+        content = llm_client.complete_chat(
+            model="test-model",
+            messages=[{"role": "user", "content": "x"}],
+            base_url=key[0],
+            api_key=key[1],
+            stream_monitor=PairStreamMonitor(max_pairs=10)
+        )
+    finally:
+        llm_client.configure_streaming(False)
+        llm_client._clients.pop(key, None)
+
+    assert stream.closed
+    assert stream.consumed < len(stream.chunks)
+    assert "</QAPairs>" in content
+    assert "Q3" in content
+
+
+if __name__ == "__main__":
+    test_parser_emits_pairs_as_they_close()
+    test_monitor_stops_after_max_pairs_and_closes_root()
+    test_complete_chat_stops_stream_at_root_close()
+    print("✅ すべてのテストが成功しました！")
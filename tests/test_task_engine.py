@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""タスクエンジンの並列実行と出力順序のテスト"""
+
+import random
+import threading
+import time
+
+from easy_dataset_cli.task_engine import build_qa_tasks, run_qa_tasks, build_qa_entries
+
+
+def _make_ga_pairs(count):
+    return [
+        {
+            "genre": {"title": f"Genre{i}", "description": ""},
+            "audience": {"title": f"Audience{i}", "description": ""}
+        }
+        for i in range(count)
+    ]
+
+
+def _slow_runner(task):
+    """ランダムな待ち時間の後、タスク固有のQ&Aを返すランナー"""
+    time.sleep(random.uniform(0, 0.01))
+    return [{
+        "question": f"Q-{task['chunk_index']}-{task['ga_index']}",
+        "answer": f"A-{task['chunk_index']}-{task['ga_index']}"
+    }]
+
+
+def _collect_entries(concurrency):
+    chunks = [f"chunk{i}" for i in range(12)]
+    ga_pairs = _make_ga_pairs(3)
+    entries = []
+    for task, qa_pairs in run_qa_tasks(build_qa_tasks(chunks, ga_pairs), _slow_runner, concurrency=concurrency):
+        entries.extend(build_qa_entries(task["ga_pair"], qa_pairs))
+    return entries
+
+
+def test_build_qa_tasks_is_chunk_major():
+    """タスクがチャンク優先の順序で展開されること"""
+    tasks = list(build_qa_tasks(["a", "b"], _make_ga_pairs(2)))
+    assert [(t["chunk_index"], t["ga_index"]) for t in tasks] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert [t["index"] for t in tasks] == [0, 1, 2, 3]
+
+
+def test_parallel_output_order_matches_serial():
+    """並列実行しても逐次実行と同じ順序で結果が返ること"""
+    serial = _collect_entries(concurrency=1)
+    parallel = _collect_entries(concurrency=8)
+    assert len(serial) == 36
+    assert parallel == serial
+
+
+def test_runs_tasks_concurrently():
+    """指定した並列数でタスクが同時に実行されること"""
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def runner(task):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return []
+
+    done = []
+    tasks = build_qa_tasks([f"c{i}" for i in range(8)], _make_ga_pairs(2))
+    results = list(run_qa_tasks(tasks, runner, concurrency=4, on_task_done=lambda t, q: done.append(t["index"])))
+
+    assert len(results) == 16
+    assert sorted(done) == list(range(16))
+    assert 1 < peak <= 4
+
+
+if __name__ == "__main__":
+    test_build_qa_tasks_is_chunk_major()
+    test_parallel_output_order_matches_serial()
+    test_runs_tasks_concurrently()
+    print("✅ すべてのテストが成功しました！")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""ログ成果物に使うタスクIDのテスト"""
+
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from easy_dataset_cli.generators import llm_client
+from easy_dataset_cli.job_manifest import JobManifest, create_resumable_runner
+from easy_dataset_cli.log_writer import flush_log_writer
+from easy_dataset_cli.mock_server import MockLLMServer
+from easy_dataset_cli.task_engine import (
+    build_batched_qa_tasks,
+    build_qa_tasks,
+    create_qa_task_runner,
+    expand_task_results,
+    get_task_log_id,
+    run_qa_tasks
+)
+from easy_dataset_cli.xml_utils import aggregate_logs_xml_to_qa
+
+
+GA_PAIRS = [
+    {"genre": {"title": "FAQ", "description": ""}, "audience": {"title": "初心者", "description": ""}},
+    {"genre": {"title": "FAQ", "description": ""}, "audience": {"title": "上級_ゲーマー", "description": ""}},
+    {"genre": {"title": "教科書", "description": ""}, "audience": {"title": "学生", "description": ""}}
+]
+# 同じ内容のチャンクが複数あってもIDが重ならないことを確認する
+CHUNKS = ["チャンクA", "チャンクB", "チャンクA"]
+
+
+def test_task_ids_are_unique_and_stable():
+    """タスクIDがファイル・チャンク・GAペアごとに一意で、実行をまたいで変わらないこと"""
+    tasks = list(build_qa_tasks(CHUNKS, GA_PAIRS, source="doc.txt"))
+    ids = [task["task_id"] for task in tasks]
+    assert len(set(ids)) == len(ids)
+    assert ids == [task["task_id"] for task in build_qa_tasks(CHUNKS, GA_PAIRS, source="doc.txt")]
+    assert ids[0].startswith("c00000-")
+
+    other_ids = {task["task_id"] for task in build_qa_tasks(CHUNKS, GA_PAIRS, source="other.txt")}
+    assert not other_ids & set(ids)
+
+    batched = list(build_batched_qa_tasks(CHUNKS, GA_PAIRS, ga_batch_size=2, source="doc.txt"))
+    batched_ids = [task["task_id"] for task in batched]
+    assert len(set(batched_ids)) == len(batched_ids)
+    expanded, _ = next(expand_task_results(batched[0], [[], []]))
+    assert expanded["task_id"] == batched_ids[0]
+
+
+def test_log_id_includes_attempt():
+    """再実行するたびに試行回数が増え、前回のログと別の名前になること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest = JobManifest(Path(temp_dir) / "manifest.sqlite")
+        log_ids = []
+
+        def runner(task):
+            log_ids.append(get_task_log_id(task))
+            return []
+
+        resumable = create_resumable_runner(runner, manifest, source="doc.txt", mode="basic", resume=True)
+        task = next(build_qa_tasks(CHUNKS, GA_PAIRS, source="doc.txt"))
+        resumable(task)
+        resumable(task)
+        manifest.close()
+
+    assert log_ids == [f"{task['task_id']}-a1", f"{task['task_id']}-a2"]
+
+
+def test_concurrent_tasks_do_not_overwrite_logs():
+    """同じ秒に並列実行されたタスクのログが上書きされず、集約でGenre/Audienceが復元できること"""
+    previous_credentials = llm_client._default_credentials
+    with MockLLMServer() as server, tempfile.TemporaryDirectory() as temp_dir:
+        llm_client.configure_default_endpoint(server.base_url, "mock")
+        try:
+            logs_dir = Path(temp_dir) / "logs"
+            logs_dir.mkdir()
+            runner = create_qa_task_runner(model="mock-model", logs_dir=logs_dir, num_qa_pairs=2)
+            tasks = build_qa_tasks(CHUNKS, GA_PAIRS, source="doc.txt")
+            results = list(run_qa_tasks(tasks, runner, concurrency=4))
+            flush_log_writer()
+        finally:
+            llm_client._default_credentials = previous_credentials
+            llm_client.close_all_clients()
+
+        qa_files = sorted(logs_dir.glob("qa_pairs_*.xml"))
+        assert len(qa_files) == len(results) == len(CHUNKS) * len(GA_PAIRS)
+        assert len(list(logs_dir.glob("request_*.json"))) == len(results)
+
+        qa_dir = Path(temp_dir) / "qa"
+        aggregate_logs_xml_to_qa(logs_dir, qa_dir)
+        audiences = {
+            audience.text
+            for xml_file in qa_dir.glob("*.xml")
+            for audience in ET.parse(xml_file).iter("Audience")
+        }
+        assert audiences == {"初心者", "上級_ゲーマー", "学生"}
+
+
+if __name__ == "__main__":
+    test_task_ids_are_unique_and_stable()
+    test_log_id_includes_attempt()
+    test_concurrent_tasks_do_not_overwrite_logs()
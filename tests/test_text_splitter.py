@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""テキスト分割のテスト"""
+
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from easy_dataset_cli.text_splitter import ChunkCounter, build_sentence_boundaries, iter_split_file, split_text
+
+
+TEXTS = [
+    "第1章 はじめに\n\nこれは最初の段落です。" * 20 + "\n\n" + "短い段落\n\n" * 5 + "長い行 " * 300,
+    # 段落区切りのないテキスト
+    "改行だけで区切られた行\n" * 200,
+    # Windowsの改行（読み込み時に\nへ変換される）
+    "CRLFの段落です。\r\n\r\n次の行\r\n" * 100,
+    "空白のない長い文字列" * 200,
+    "",
+]
+
+
+def test_streaming_split_matches_split_text():
+    """小さなブロックで読み込みながら分割しても、read_text()してsplit_text()した結果と同じになること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text_file = Path(temp_dir) / "doc.txt"
+        for text in TEXTS:
+            text_file.write_bytes(text.encode("utf-8"))
+            for chunk_size, chunk_overlap in ((100, 20), (37, 0), (500, 100)):
+                expected = split_text(text_file.read_text(encoding="utf-8"), chunk_size, chunk_overlap)
+                for block_size in (1, 3, 64, 100000):
+                    actual = list(iter_split_file(text_file, chunk_size, chunk_overlap, block_size=block_size))
+                    assert actual == expected, (text[:20], chunk_size, block_size)
+
+
+def test_streaming_split_is_lazy():
+    """最初のチャンクがファイル全体を読む前に返され、取り出したチャンク数を数えられること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text_file = Path(temp_dir) / "doc.txt"
+        text_file.write_text("段落です。\n\n" * 10000, encoding="utf-8")
+
+        chunks = ChunkCounter(iter_split_file(text_file, chunk_size=100, chunk_overlap=0, block_size=64))
+        first = next(chunks)
+        # 最初のチャンクを返した時点でファイルはまだ開かれたまま（読み込み途中）
+        assert chunks._chunks.gi_frame is not None
+        assert first == split_text("段落です。\n\n" * 20, 100, 0)[0]
+        assert 1 + sum(1 for _ in chunks) == chunks.count == len(split_text(text_file.read_text(encoding="utf-8"), 100, 0))
+
+
+def test_native_splitter_matches_langchain():
+    """組み込みの分割がLangChainのRecursiveCharacterTextSplitterと同じチャンクを返すこと"""
+    rng = random.Random(0)
+    pieces = ["a", "bc", " ", "  ", "\n", "\n\n", "日本語", "。", "\r\n", "x" * 15]
+    texts = TEXTS + ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 300))) for _ in range(300)]
+    for text in texts:
+        chunk_size = rng.randint(1, 60)
+        chunk_overlap = rng.randint(0, chunk_size)
+        expected = split_text(text, chunk_size, chunk_overlap, splitter="langchain")
+        assert split_text(text, chunk_size, chunk_overlap) == expected, (text, chunk_size, chunk_overlap)
+
+
+def test_cli_does_not_import_langchain():
+    """CLIの読み込みと既定の分割でLangChainをインポートしないこと"""
+    code = (
+        "import sys\n"
+        "import easy_dataset_cli.commands\n"
+        "from easy_dataset_cli.text_splitter import split_text\n"
+        "split_text('段落\\n\\n' * 100, 50, 10)\n"
+        "assert 'langchain_text_splitters' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).resolve().parent.parent)
+
+
+def test_japanese_splitter_packs_whole_sentences():
+    """jaの分割が文の途中で切らずにchunk_sizeまで文を詰め、オーバーラップも文単位になること"""
+    sentences = ["今日は晴れです。", "明日は雨でしょうか？", "「そうですね！」", "と彼は言った。\n", "次の段落です。"]
+    text = "".join(sentences) * 5
+    assert build_sentence_boundaries("文です。次\n\n最後") == [4, 7, 9]
+
+    chunks = split_text(text, chunk_size=40, chunk_overlap=15, splitter="ja")
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert len(chunk) <= 40
+        # 各チャンクは文の先頭から始まり、最初の文は前のチャンクの末尾（オーバーラップ）の文と重なる
+        first_sentence = chunk[:build_sentence_boundaries(chunk)[0]].strip()
+        assert first_sentence in [sentence.strip() for sentence in sentences]
+        assert first_sentence in previous[-15:]
+
+    # chunk_sizeを超える1文だけは文字単位で分割する
+    long_chunks = split_text("短い文。" + "長" * 25 + "。", chunk_size=10, chunk_overlap=0, splitter="ja")
+    assert long_chunks == ["短い文。", "長" * 10, "長" * 10, "長" * 5 + "。"]
+
+
+if __name__ == "__main__":
+    test_streaming_split_matches_split_text()
+    test_streaming_split_is_lazy()
+    test_native_splitter_matches_langchain()
+    test_cli_does_not_import_langchain()
+    test_japanese_splitter_packs_whole_sentences()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""トークン数の推定とトークン数でのチャンク分割のテスト"""
+
+from easy_dataset_cli.text_splitter import split_text
+from easy_dataset_cli.token_counter import estimate_tokens, get_length_function
+
+
+def test_estimate_tokens_by_character_class():
+    """英数字・記号・かな・漢字の係数からトークン数を推定し、実測値に近い値になること"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh ijk") == 3
+    assert estimate_tokens("a, b.\n\n") == 5
+    assert estimate_tokens("ひらがな") == 3
+    assert estimate_tokens("漢字。") == 3
+    # GPT-4oの発表時の例文（cl100k_base: 37 / o200k_base: 26トークン）
+    assert 26 <= estimate_tokens("こんにちは、私の名前はGPT−4oです。私は新しいタイプの言語モデルです。初めまして！") <= 37
+    assert get_length_function("chars") is len
+
+
+def test_split_text_in_tokens():
+    """--chunk-unit tokensで、各チャンクの推定トークン数がchunk_size以下になること"""
+    text = ("日本語の文章です。" * 30 + "\n\n" + "English words are cheaper per character. " * 30) * 3
+    chunks = split_text(text, chunk_size=100, chunk_overlap=20, length_unit="tokens")
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    # 英語は1文字あたりのトークン数が少ないため、同じchunk_sizeでも長いチャンクになる
+    english = [chunk for chunk in chunks if chunk.startswith("English")]
+    japanese = [chunk for chunk in chunks if chunk.startswith("日本語")]
+    assert min(len(chunk) for chunk in english) > max(len(chunk) for chunk in japanese)
+
+
+if __name__ == "__main__":
+    test_estimate_tokens_by_character_class()
+    test_split_text_in_tokens()
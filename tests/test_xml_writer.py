@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""ストリーミングXMLライターのテスト"""
+
+import io
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from xml.dom import minidom
+
+from easy_dataset_cli.xml_utils import (
+    convert_to_xml_by_genre,
+    load_existing_xml_file,
+    load_qa_pairs_from_xml,
+    write_xml_by_genre
+)
+from easy_dataset_cli.xml_writer import XMLStreamWriter, to_pretty_xml
+
+
+QA_PAIRS = [
+    {"genre": "FAQ", "audience": "初心者", "question": "A & B <とは>？", "answer": "<think>\"引用\"を整理</think>答えは\r\n2行です"},
+    {"genre": "FAQ", "audience": "上級者", "question": "空の回答", "answer": ""},
+    {"genre": "教科書", "audience": "学生", "question": "Q", "answer": "<think></think>思考なし"},
+]
+
+
+def _minidom_pretty(root):
+    """従来の整形方法（ET.tostring → minidom → toprettyxml）"""
+    return minidom.parseString(ET.tostring(root, "utf-8")).toprettyxml(indent="  ")
+
+
+def test_matches_minidom_output():
+    """混在テキスト・空要素・属性・特殊文字を含む要素がminidomと同じ文字列になること"""
+    root = ET.Element("QAPairs", {"genre": "改行\nと\"引用\""})
+    pair = ET.SubElement(root, "Pair")
+    ET.SubElement(pair, "Question").text = "x < y && y > z"
+    answer = ET.SubElement(pair, "Answer")
+    answer.text = "前置き"
+    think = ET.SubElement(answer, "think")
+    think.text = "考え\r中"
+    think.tail = "  回答  "
+    ET.SubElement(pair, "Empty")
+    ET.SubElement(root, "Pair").text = ""
+
+    assert to_pretty_xml(root) == _minidom_pretty(root)
+    assert to_pretty_xml(ET.Element("QAPairs")) == _minidom_pretty(ET.Element("QAPairs"))
+
+
+def test_stream_writer_matches_tree_output():
+    """子要素を1つずつ書き出した結果が、ツリー全体を整形した結果と同じになること"""
+    root = ET.Element("QAPairs", {"genre": "FAQ"})
+    buffer = io.StringIO()
+    with XMLStreamWriter(buffer, "QAPairs", {"genre": "FAQ"}) as writer:
+        for i in range(3):
+            pair = ET.SubElement(root, "Pair")
+            ET.SubElement(pair, "Question").text = f"Q{i}"
+            writer.write(pair)
+
+    assert buffer.getvalue() == _minidom_pretty(root)
+
+
+def test_write_xml_by_genre_matches_convert_to_xml_by_genre():
+    """ファイルへの直接書き出しが文字列への変換と同じ内容になり、追加モードでも読み戻せること"""
+    xml_outputs = convert_to_xml_by_genre(QA_PAIRS)
+    assert "<think>&quot;引用&quot;を整理</think>" in xml_outputs["FAQ"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        saved_files = write_xml_by_genre(QA_PAIRS, qa_dir)
+        assert sorted(path.name for path in saved_files) == ["FAQ.xml", "教科書.xml"]
+        for genre, xml_content in xml_outputs.items():
+            assert (qa_dir / f"{genre}.xml").read_text(encoding="utf-8") == xml_content
+        assert not list(qa_dir.glob("*.tmp"))
+
+        write_xml_by_genre(QA_PAIRS[:1], qa_dir, append_mode=True)
+        assert len(load_existing_xml_file(qa_dir / "FAQ.xml")) == 3
+
+
+def test_append_inserts_before_closing_tag():
+    """追記モードで閉じタグの直前に挿入した結果が、まとめて書き出した場合と同じになること"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        qa_dir = Path(temp_dir)
+        write_xml_by_genre(QA_PAIRS[:1], qa_dir)
+        write_xml_by_genre(QA_PAIRS[1:], qa_dir, append_mode=True)
+        expected = convert_to_xml_by_genre(QA_PAIRS)
+        for genre, xml_content in expected.items():
+            assert (qa_dir / f"{genre}.xml").read_text(encoding="utf-8") == xml_content
+
+        # 閉じタグで終わっていないファイル（空のルート要素）は読み込んで書き直す
+        empty_file = qa_dir / "空.xml"
+        empty_file.write_text('<?xml version="1.0" ?>\n<QAPairs genre="空"/>\n', encoding="utf-8")
+        write_xml_by_genre([dict(QA_PAIRS[2], genre="空")], qa_dir, append_mode=True)
+        assert len(load_existing_xml_file(empty_file)) == 1
+
+        # <Pair>の途中で切れたファイルは、読み取れたペアを<think>ごと残して書き直す
+        faq_file = qa_dir / "FAQ.xml"
+        faq_content = faq_file.read_text(encoding="utf-8")
+        faq_file.write_text(faq_content[:faq_content.rindex("<Pair>") + 20], encoding="utf-8")
+        readable = load_qa_pairs_from_xml(faq_file)
+        write_xml_by_genre([dict(QA_PAIRS[0], question="追加")], qa_dir, append_mode=True)
+        rewritten = load_qa_pairs_from_xml(faq_file)
+        assert rewritten[:-1] == readable and rewritten[-1]["question"] == "追加"
+        assert any("<think>" in pair["answer"] for pair in readable)
+        assert (qa_dir / "FAQ.xml.bak").exists()
+
+
+if __name__ == "__main__":
+    test_matches_minidom_output()
+    test_stream_writer_matches_tree_output()
+    test_write_xml_by_genre_matches_convert_to_xml_by_genre()
+    test_append_inserts_before_closing_tag()